@@ -1,7 +1,11 @@
 import os
-from fastapi import APIRouter, UploadFile, File, HTTPException, status, Form
-from typing import Optional
+import asyncio
+from datetime import date
+from fastapi import APIRouter, UploadFile, File, HTTPException, status, Form, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Optional
 from app.utils.response import ok_response, error_response
+from app.core.config import AppConfig
 import logging
 
 router = APIRouter(prefix="/comprovantes", tags=["Comprovantes"])
@@ -16,7 +20,9 @@ logger = logging.getLogger(__name__)
 )
 async def upload_comprovante_automatico(
     file: UploadFile = File(...),
-    session_id: Optional[str] = Form(None)
+    session_id: Optional[str] = Form(None),
+    user_id: Optional[str] = Form(None),
+    assincrono: Optional[bool] = Form(None)
 ):
     """
     Rota inteligente: extrai CPF automaticamente do comprovante via OCR.
@@ -24,6 +30,9 @@ async def upload_comprovante_automatico(
     
     Se session_id for fornecido, valida que o CPF do comprovante corresponde
     ao CPF autenticado na sessão (segurança contra fraude).
+    
+    Em modo assíncrono (assincrono=true ou RECEIPT_JOBS_ASYNC) o arquivo é
+    enfileirado e a rota responde 202 com o id do job imediatamente.
     """
     import traceback
     
@@ -34,27 +43,41 @@ async def upload_comprovante_automatico(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="O comprovante precisa ter um nome de arquivo válido."
             )
-        contents = await file.read()
-        tamanho = len(contents)
+        if file.size is not None and file.size > AppConfig.RECEIPT_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Arquivo muito grande. Máximo: {AppConfig.RECEIPT_MAX_BYTES // (1024 * 1024)}MB."
+            )
         
+        from app.utils.upload_spool import ler_upload, UploadRejeitado
         
-        if tamanho > 5 * 1024 * 1024:
+        try:
+            conteudo, extensao = await asyncio.to_thread(ler_upload, file.file, AppConfig.RECEIPT_MAX_BYTES)
+        except UploadRejeitado as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Arquivo muito grande. Máximo: 5MB."
+                detail=e.mensagem
             )
-
-        import tempfile
-        from pathlib import Path
         
-        suffix = Path(file.filename).suffix or '.pdf'
+        if AppConfig.RECEIPT_JOBS_ASYNC if assincrono is None else assincrono:
+            return await _enfileirar_upload(conteudo, extensao, file.filename, session_id, user_id)
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-            temp_file.write(contents)
-            temp_path = temp_file.name
-        from app.services.comprovante_service import processar_comprovante_from_path
+        from app.services.comprovante_service import processar_comprovante
+        from app.services.comprovante_executor import get_comprovante_pool, FilaComprovantesCheia
         
-        resultado = processar_comprovante_from_path(temp_path, file.filename, validar=True)
+        try:
+            resultado = await get_comprovante_pool().executar(
+                processar_comprovante, conteudo, extensao, file.filename, True
+            )
+        except FilaComprovantesCheia as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail={
+                    "message": "Muitos comprovantes em processamento no momento. Tente novamente em instantes.",
+                    "code": "FILA_CHEIA"
+                },
+                headers={"Retry-After": str(e.retry_after)}
+            )
         
 
         if not resultado:
@@ -65,45 +88,19 @@ async def upload_comprovante_automatico(
         
         if session_id:
             from app.services.agent_service import get_authenticated_cpf
+            from app.services.comprovante_service import cpf_diverge, detalhe_cpf_divergente, descartar_comprovante
             
             cpf_sessao = await get_authenticated_cpf(session_id)
             cpf_comprovante = resultado.get('cpf_identificado')
             
             
             if cpf_sessao and cpf_comprovante:
-                cpf_sessao_limpo = ''.join(filter(str.isdigit, cpf_sessao))
-                cpf_comprovante_limpo = ''.join(filter(str.isdigit, cpf_comprovante))
-                
-                if cpf_sessao_limpo != cpf_comprovante_limpo:
-                    try:
-                        import os
-                        arquivo_salvo = resultado.get('arquivo_salvo')
-                        if arquivo_salvo and os.path.exists(arquivo_salvo):
-                            os.unlink(arquivo_salvo)
-                        
-                        registro_id = resultado.get('registro_id')
-                        if registro_id:
-                            from app.infrastructure.database.connection import SessionLocal
-                            from app.domain.models.database_models import Receipt
-                            session = SessionLocal()
-                            try:
-                                receipt = session.query(Receipt).filter_by(id=registro_id).first()
-                                if receipt:
-                                    session.delete(receipt)
-                                    session.commit()
-                            finally:
-                                session.close()
-                    except Exception as cleanup_error:
-                        logger.error(f"Erro ao limpar arquivo/registro: {cleanup_error}")
+                if cpf_diverge(cpf_sessao, cpf_comprovante):
+                    descartar_comprovante(resultado)
                     
                     raise HTTPException(
                         status_code=status.HTTP_403_FORBIDDEN,
-                        detail={
-                            "message": f"ATENÇÃO: Este comprovante pertence ao CPF ***{cpf_comprovante_limpo[-3:]} (terminação {cpf_comprovante_limpo[-3:]}), mas você está negociando a dívida do CPF ***{cpf_sessao_limpo[-3:]} (terminação {cpf_sessao_limpo[-3:]}). Por favor, envie o comprovante CORRETO da SUA negociação.",
-                            "code": "CPF_MISMATCH",
-                            "cpf_esperado": f"***{cpf_sessao_limpo[-3:]}",
-                            "cpf_recebido": f"***{cpf_comprovante_limpo[-3:]}"
-                        }
+                        detail=detalhe_cpf_divergente(cpf_sessao, cpf_comprovante)
                     )
                 
             elif cpf_sessao:
@@ -142,6 +139,15 @@ async def upload_comprovante_automatico(
                         "code": "SEM_BOLETO"
                     }
                 )
+            elif erro_tipo == 'COMPROVANTE_SIMILAR':
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail={
+                        "message": resultado['mensagem'],
+                        "code": "COMPROVANTE_SIMILAR",
+                        "details": resultado.get('detalhes')
+                    }
+                )
             elif erro_tipo == 'VALIDACAO_FALHOU':
                 raise HTTPException(
                     status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -159,7 +165,7 @@ async def upload_comprovante_automatico(
 
         
         return ok_response({
-            'message': 'Comprovante validado e recebido com sucesso!',
+            'message': 'Este comprovante já havia sido recebido.' if resultado.get('duplicado') else 'Comprovante validado e recebido com sucesso!',
             'cpf_identificado': resultado.get('cpf_identificado'),
             'valor_boleto': resultado.get('valor_boleto', 0.0),
             'registro': resultado
@@ -174,3 +180,163 @@ async def upload_comprovante_automatico(
             detail=f"Erro interno: {str(e)}"
         )
 
+
+
+@router.post(
+    '/upload-lote',
+    summary="Upload de comprovantes em lote",
+    description="Recebe um ZIP e/ou vários arquivos, valida em paralelo e devolve um relatório NDJSON por arquivo à medida que cada um termina"
+)
+async def upload_comprovantes_lote(files: List[UploadFile] = File(...)):
+    """
+    Rota para o back-office: mesmas regras de /upload-auto, sem vínculo com
+    sessão do agente. Cada linha da resposta é o resultado de um arquivo; a
+    última linha traz o resumo do lote.
+    """
+    from app.services.comprovante_lote import processar_lote, salvar_fonte_temporaria
+    
+    fontes = []
+    try:
+        for file in files:
+            if not file.filename:
+                continue
+            fontes.append(await asyncio.to_thread(salvar_fonte_temporaria, file.file, file.filename))
+    except Exception as e:
+        for _, caminho, _ in fontes:
+            if caminho and os.path.exists(caminho):
+                os.unlink(caminho)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao receber arquivos do lote: {str(e)}"
+        )
+    
+    if not fontes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nenhum arquivo válido enviado."
+        )
+    
+    return StreamingResponse(processar_lote(fontes), media_type="application/x-ndjson")
+
+
+async def _enfileirar_upload(conteudo: bytes, extensao: str, filename: str, session_id: Optional[str], user_id: Optional[str]) -> JSONResponse:
+    from app.services.comprovante_jobs import enfileirar_comprovante
+    
+    cpf_sessao = None
+    if session_id:
+        from app.services.agent_service import get_authenticated_cpf
+        cpf_sessao = await get_authenticated_cpf(session_id)
+    
+    job = await asyncio.to_thread(
+        enfileirar_comprovante, conteudo, extensao, filename, session_id, user_id, cpf_sessao
+    )
+    
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=ok_response({
+            'message': 'Comprovante recebido e aguardando validação.',
+            'job_id': job['id_job'],
+            'status': job['status'],
+            'status_url': f"/comprovantes/jobs/{job['id_job']}"
+        })
+    )
+
+
+@router.get(
+    '/jobs/{job_id}',
+    response_model=dict,
+    summary="Status da validação assíncrona",
+    description="Consulta o andamento e o resultado de um comprovante enviado em modo assíncrono"
+)
+async def status_job_comprovante(job_id: str):
+    from app.infrastructure.database.connection import obter_job_comprovante
+    
+    job = await asyncio.to_thread(obter_job_comprovante, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job não encontrado."
+        )
+    
+    return ok_response({
+        'job_id': job['id_job'],
+        'status': job['status'],
+        'tentativas': job['tentativas'],
+        'max_tentativas': job['max_tentativas'],
+        'resultado': job['resultado'],
+        'ultimo_erro': job['ultimo_erro'],
+        'criado_em': job['criado_em'],
+        'concluido_em': job['concluido_em']
+    })
+
+
+@router.get(
+    '/ocr-cache',
+    response_model=dict,
+    summary="Estatísticas do processamento de comprovantes",
+    description="Retorna a ocupação do pool de OCR e os acertos, falhas e tempo economizado pelo cache de comprovantes"
+)
+async def estatisticas_cache_ocr():
+    from app.services.comprovante_executor import get_comprovante_pool
+    
+    return ok_response(get_comprovante_pool().estatisticas())
+
+
+@router.get(
+    '/busca',
+    response_model=dict,
+    summary="Busca de comprovantes",
+    description="Consulta comprovantes aceitos pelos campos extraídos (valor, data do pagamento, CPF, boleto, linha digitável) ou pelo texto lido, sem reprocessar os arquivos"
+)
+async def buscar_comprovantes(
+    valor: Optional[float] = None,
+    valor_min: Optional[float] = None,
+    valor_max: Optional[float] = None,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    cpf: Optional[str] = None,
+    id_boleto: Optional[str] = None,
+    linha_digitavel: Optional[str] = None,
+    texto: Optional[str] = None,
+    limite: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Rota para o back-office, ex.: comprovantes de R$ 150,00 pagos em outubro
+    (`?valor=150&data_inicio=2026-10-01&data_fim=2026-10-31`).
+    """
+    from app.infrastructure.database.connection import buscar_comprovantes as buscar_comprovantes_db
+    
+    comprovantes = await asyncio.to_thread(
+        buscar_comprovantes_db,
+        valor=valor,
+        valor_min=valor_min,
+        valor_max=valor_max,
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+        cpf=cpf,
+        id_boleto=id_boleto,
+        linha_digitavel=linha_digitavel,
+        texto=texto,
+        limite=limite,
+        offset=offset
+    )
+    return ok_response({'comprovantes': comprovantes, 'quantidade': len(comprovantes)})
+
+
+@router.get(
+    '/registros/{comprovante_id}',
+    response_model=dict,
+    summary="Extração de um comprovante",
+    description="Retorna os campos extraídos, as validações, os tempos por etapa e o texto lido de um comprovante aceito"
+)
+async def obter_comprovante(comprovante_id: str):
+    from app.infrastructure.database.connection import obter_comprovante as obter_comprovante_db
+    
+    comprovante = await asyncio.to_thread(obter_comprovante_db, comprovante_id)
+    if not comprovante:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Comprovante não encontrado."
+        )
+    return ok_response(comprovante)
@@ -1,16 +1,80 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
-import os
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+import json
+import asyncio
 import logging
-from typing import List, Dict
+import weakref
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Dict, Optional, Tuple
 
-from app.infrastructure.database.connection import obter_boleto, listar_todos_boletos
+from app.core.config import AppConfig
+from app.domain.schemas import BoletoLoteRequest
+from app.infrastructure.database.connection import listar_todos_boletos
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/boletos", tags=["Boletos"])
 
 
+@router.post(
+    "/lote",
+    summary="Geração de boletos em lote",
+    description="Gera boletos para vários pares (CPF, plano) e devolve um relatório NDJSON por boleto à medida que cada bloco termina"
+)
+async def gerar_boletos_lote(request: BoletoLoteRequest, http_request: Request):
+    """
+    Rota para campanhas de cobrança: cada linha da resposta é um boleto
+    gerado ou um par recusado; a última linha traz o resumo do lote.
+    Um lote por vez: enquanto outro está em andamento a rota responde 503.
+    """
+    from app.services.boleto_lote import RETRY_AFTER_LOTE, gerar_boletos_em_lote, reservar_lote
+    
+    if len(request.itens) > AppConfig.BOLETO_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Lote muito grande. Máximo: {AppConfig.BOLETO_BATCH_MAX_ITEMS} boletos."
+        )
+    
+    reserva = reservar_lote()
+    if reserva is None:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "message": "Já há um lote de boletos em geração. Tente novamente em instantes.",
+                "code": "LOTE_EM_ANDAMENTO"
+            },
+            headers={"Retry-After": str(RETRY_AFTER_LOTE)}
+        )
+    
+    linhas = gerar_boletos_em_lote(
+        [(item.cpf, item.id_plano) for item in request.itens],
+        dias_vencimento=request.dias_vencimento,
+        reserva=reserva
+    )
+    
+    async def corpo():
+        try:
+            while not await http_request.is_disconnected():
+                # Gerador síncrono (banco e pool de processos): uma linha por vez em uma thread.
+                linha = await asyncio.to_thread(next, linhas, None)
+                if linha is None:
+                    break
+                yield json.dumps(linha, ensure_ascii=False, default=str) + "\n"
+        finally:
+            try:
+                linhas.close()
+            except ValueError:
+                # Ainda em execução na thread: ao terminar a linha atual ele
+                # é coletado e o `finally` do gerador cancela o resto.
+                pass
+            reserva.liberar()
+    
+    resposta = corpo()
+    # Se a resposta nem começar (cliente já desconectado), o corpo nunca roda.
+    weakref.finalize(resposta, reserva.liberar)
+    return StreamingResponse(resposta, media_type="application/x-ndjson")
+
+
 @router.get("/recentes")
 async def listar_boletos_recentes(limit: int = 10) -> List[Dict]:
     try:
@@ -21,29 +85,103 @@ async def listar_boletos_recentes(limit: int = 10) -> List[Dict]:
         raise HTTPException(status_code=500, detail=f"Erro ao listar boletos: {str(e)}")
 
 
+def _nao_modificado(request: Request, pdf) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etags = [etag.strip().removeprefix("W/") for etag in if_none_match.split(",")]
+        return "*" in etags or pdf.etag in etags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return pdf.modificado_em <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _intervalo(request: Request, pdf, tamanho: int) -> Optional[Tuple[int, int]]:
+    """
+    Intervalo pedido em Range (início, fim inclusivo), ou None para enviar o
+    arquivo inteiro. Só um intervalo é atendido; pedidos com vários recebem o
+    arquivo completo, como a RFC 9110 permite.
+    """
+    cabecalho = request.headers.get("range")
+    if not cabecalho or not cabecalho.startswith("bytes=") or "," in cabecalho:
+        return None
+
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != pdf.etag:
+        return None
+
+    inicio, _, fim = cabecalho[len("bytes="):].strip().partition("-")
+    try:
+        if not inicio:
+            sufixo = int(fim)
+            if sufixo <= 0:
+                raise ValueError
+            return max(0, tamanho - sufixo), tamanho - 1
+        inicio = int(inicio)
+        fim = min(int(fim), tamanho - 1) if fim else tamanho - 1
+    except ValueError:
+        return None
+
+    if inicio >= tamanho or fim < inicio:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{tamanho}"})
+    return inicio, fim
+
+
 @router.get("/download/{id_boleto}")
-async def download_boleto(id_boleto: str):
+async def download_boleto(id_boleto: str, request: Request):
+    from app.services.boleto_documento import obter_pdf_boleto
+    from app.utils.boleto_storage import get_boleto_storage
+
     try:
-        boleto = obter_boleto(id_boleto)
+        # Do armazenamento quando já foi gerado; senão é gerado agora a partir do Invoice.
+        pdf = await asyncio.to_thread(obter_pdf_boleto, id_boleto)
         
-        if not boleto:
+        if not pdf:
             raise HTTPException(status_code=404, detail="Boleto não encontrado")
         
-        boletos_dir = os.path.join(os.getcwd(), "data", "boletos")
         filename = f"boleto_{id_boleto}.pdf"
-        file_path = os.path.join(boletos_dir, filename)
+        headers = {
+            "ETag": pdf.etag,
+            "Last-Modified": formatdate(pdf.modificado_em, usegmt=True),
+            "Cache-Control": "private, max-age=86400",
+            "Accept-Ranges": "bytes",
+        }
+        
+        if _nao_modificado(request, pdf):
+            return Response(status_code=304, headers=headers)
+        
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        
+        # O proxy entrega o arquivo do disco (e trata o Range por conta própria).
+        modo = AppConfig.BOLETO_DOWNLOAD_OFFLOAD
+        if modo in ("x-accel-redirect", "x-sendfile") and pdf.caminho.exists():
+            if modo == "x-accel-redirect":
+                relativo = pdf.caminho.relative_to(get_boleto_storage().diretorio).as_posix()
+                headers["X-Accel-Redirect"] = f"{AppConfig.BOLETO_DOWNLOAD_ACCEL_PREFIX.rstrip('/')}/{relativo}"
+            else:
+                headers["X-Sendfile"] = str(pdf.caminho.resolve())
+            return Response(media_type="application/pdf", headers=headers)
         
-        if not os.path.exists(file_path):
-            logger.error(f"Arquivo não encontrado: {file_path}")
-            raise HTTPException(status_code=404, detail="Arquivo PDF não encontrado")
+        tamanho = len(pdf.conteudo)
+        intervalo = _intervalo(request, pdf, tamanho)
+        if intervalo:
+            inicio, fim = intervalo
+            headers["Content-Range"] = f"bytes {inicio}-{fim}/{tamanho}"
+            return Response(
+                content=pdf.conteudo[inicio:fim + 1],
+                status_code=206,
+                media_type="application/pdf",
+                headers=headers
+            )
         
-        return FileResponse(
-            path=file_path,
+        return Response(
+            content=pdf.conteudo,
             media_type="application/pdf",
-            filename=filename,
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}"'
-            }
+            headers=headers
         )
     
     except HTTPException:
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Request
+
+from app.api.v1.endpoints.download_boletos import _intervalo, _nao_modificado
+
+
+PDF = SimpleNamespace(etag='"abc123"', modificado_em=1773100800.0)  # 10/03/2026 00:00 UTC
+TAMANHO = 1000
+
+
+def _request(**cabecalhos) -> Request:
+    return Request({
+        'type': 'http',
+        'headers': [(nome.replace('_', '-').encode(), valor.encode()) for nome, valor in cabecalhos.items()],
+    })
+
+
+@pytest.mark.parametrize('cabecalho, esperado', [
+    ('bytes=0-99', (0, 99)),
+    ('bytes=900-', (900, 999)),
+    ('bytes=-100', (900, 999)),
+    ('bytes=-5000', (0, 999)),
+    ('bytes=500-5000', (500, 999)),
+    ('bytes=0-0', (0, 0)),
+])
+def test_intervalo(cabecalho, esperado):
+    assert _intervalo(_request(range=cabecalho), PDF, TAMANHO) == esperado
+
+
+@pytest.mark.parametrize('cabecalho', [
+    None,
+    'items=0-99',
+    'bytes=0-99,200-299',
+    'bytes=abc-',
+    'bytes=-0',
+    'bytes=-',
+])
+def test_intervalo_arquivo_inteiro(cabecalho):
+    cabecalhos = {'range': cabecalho} if cabecalho else {}
+    assert _intervalo(_request(**cabecalhos), PDF, TAMANHO) is None
+
+
+@pytest.mark.parametrize('cabecalho', ['bytes=1000-', 'bytes=500-100'])
+def test_intervalo_nao_satisfazivel(cabecalho):
+    with pytest.raises(HTTPException) as erro:
+        _intervalo(_request(range=cabecalho), PDF, TAMANHO)
+    assert erro.value.status_code == 416
+    assert erro.value.headers['Content-Range'] == 'bytes */1000'
+
+
+def test_if_range():
+    assert _intervalo(_request(range='bytes=0-99', if_range='"abc123"'), PDF, TAMANHO) == (0, 99)
+    assert _intervalo(_request(range='bytes=0-99', if_range='"outro"'), PDF, TAMANHO) is None
+
+
+def test_nao_modificado_por_etag():
+    assert _nao_modificado(_request(if_none_match='"abc123"'), PDF)
+    assert _nao_modificado(_request(if_none_match='"x", W/"abc123"'), PDF)
+    assert _nao_modificado(_request(if_none_match='*'), PDF)
+    assert not _nao_modificado(_request(if_none_match='"x"'), PDF)
+
+
+def test_etag_tem_prioridade_sobre_data():
+    assert not _nao_modificado(
+        _request(if_none_match='"x"', if_modified_since='Wed, 11 Mar 2026 00:00:00 GMT'), PDF
+    )
+
+
+def test_nao_modificado_por_data():
+    assert _nao_modificado(_request(if_modified_since='Tue, 10 Mar 2026 00:00:00 GMT'), PDF)
+    assert not _nao_modificado(_request(if_modified_since='Mon, 09 Mar 2026 00:00:00 GMT'), PDF)
+    assert not _nao_modificado(_request(if_modified_since='ontem'), PDF)
@@ -38,8 +38,59 @@ class AppConfig:
     PORT = int(os.getenv("SERVER_PORT", "5000"))
     
     COMPROVANTES_DIR = DATA_DIR / "comprovantes"
+    COMPROVANTES_PENDENTES_DIR = DATA_DIR / "comprovantes_pendentes"
+    UPLOAD_SPOOL_DIR = DATA_DIR / "uploads_tmp"
+    REVALIDACAO_DIR = DATA_DIR / "revalidacao"
+    BOLETOS_DIR = DATA_DIR / "boletos"
     LOGS_DIR = DATA_DIR / "logs"
     
+    RECEIPT_MAX_BYTES = 5 * 1024 * 1024
+    RECEIPT_BATCH_MAX_FILES = int(os.getenv("RECEIPT_BATCH_MAX_FILES", "1000"))
+    RECEIPT_NEAR_DUPLICATES = os.getenv("RECEIPT_NEAR_DUPLICATES", "flag").lower()
+    RECEIPT_PHASH_MAX_DISTANCE = int(os.getenv("RECEIPT_PHASH_MAX_DISTANCE", "10"))
+    RECEIPT_STORAGE_FORMAT = os.getenv("RECEIPT_STORAGE_FORMAT", "webp").lower()
+    RECEIPT_STORAGE_QUALITY = int(os.getenv("RECEIPT_STORAGE_QUALITY", "85"))
+    RECEIPT_ARCHIVE_AFTER_DAYS = int(os.getenv("RECEIPT_ARCHIVE_AFTER_DAYS", "90"))
+    
+    OCR_CACHE_DIR = DATA_DIR / "ocr_cache"
+    OCR_CACHE_MEMORY_ITEMS = int(os.getenv("OCR_CACHE_MEMORY_ITEMS", "256"))
+    OCR_CACHE_DISK_MAX_MB = int(os.getenv("OCR_CACHE_DISK_MAX_MB", "200"))
+    
+    BOLETO_STORAGE_MEMORY_ITEMS = int(os.getenv("BOLETO_STORAGE_MEMORY_ITEMS", "512"))
+    BOLETO_TIMEZONE = os.getenv("BOLETO_TIMEZONE", "America/Sao_Paulo")
+    BOLETO_DOWNLOAD_OFFLOAD = os.getenv("BOLETO_DOWNLOAD_OFFLOAD", "").lower()
+    BOLETO_DOWNLOAD_ACCEL_PREFIX = os.getenv("BOLETO_DOWNLOAD_ACCEL_PREFIX", "/protected/boletos/")
+    BOLETO_BATCH_MAX_ITEMS = int(os.getenv("BOLETO_BATCH_MAX_ITEMS", "50000"))
+    BOLETO_BATCH_CHUNK_SIZE = int(os.getenv("BOLETO_BATCH_CHUNK_SIZE", "500"))
+    BOLETO_BATCH_WORKERS = int(os.getenv("BOLETO_BATCH_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+    
+    OCR_LANG = os.getenv("OCR_LANG", "por")
+    OCR_BACKEND = os.getenv("OCR_BACKEND", "auto").lower()
+    OCR_ENGINE_POOL_SIZE = int(os.getenv("OCR_ENGINE_POOL_SIZE", "2"))
+    OCR_TESSDATA_PATH = os.getenv("OCR_TESSDATA_PATH") or None
+    OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "True").lower() == "true"
+    OCR_PIXEL_BUDGET = int(os.getenv("OCR_PIXEL_BUDGET", "3000000"))
+    OCR_PIXEL_BUDGET_HIGH = int(os.getenv("OCR_PIXEL_BUDGET_HIGH", "12000000"))
+    OCR_PDF_DPI = int(os.getenv("OCR_PDF_DPI", "150"))
+    OCR_PDF_DPI_HIGH = int(os.getenv("OCR_PDF_DPI_HIGH", "300"))
+    OCR_PDF_MAX_PAGES = int(os.getenv("OCR_PDF_MAX_PAGES", "10"))
+    OCR_PDF_THREADS = int(os.getenv("OCR_PDF_THREADS", os.getenv("OCR_ENGINE_POOL_SIZE", "2")))
+    OCR_PSM = int(os.environ["OCR_PSM"]) if os.getenv("OCR_PSM") else None
+    OCR_TEMPLATES = os.getenv("OCR_TEMPLATES", "True").lower() == "true"
+    OCR_TEMPLATES_FILE = Path(os.getenv("OCR_TEMPLATES_FILE", str(APP_DIR / "utils" / "comprovante_templates.json")))
+    OCR_DECODE_CODES = os.getenv("OCR_DECODE_CODES", "True").lower() == "true"
+    
+    OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+    OCR_QUEUE_SIZE = int(os.getenv("OCR_QUEUE_SIZE", "8"))
+    OCR_POOL_START_METHOD = os.getenv("OCR_POOL_START_METHOD", "spawn")
+    
+    RECEIPT_JOBS_ASYNC = os.getenv("RECEIPT_JOBS_ASYNC", "False").lower() == "true"
+    RECEIPT_JOBS_MAX_ATTEMPTS = int(os.getenv("RECEIPT_JOBS_MAX_ATTEMPTS", "3"))
+    RECEIPT_JOBS_VISIBILITY_TIMEOUT = int(os.getenv("RECEIPT_JOBS_VISIBILITY_TIMEOUT", "300"))
+    RECEIPT_JOBS_RETRY_BACKOFF = int(os.getenv("RECEIPT_JOBS_RETRY_BACKOFF", "10"))
+    RECEIPT_JOBS_POLL_INTERVAL = float(os.getenv("RECEIPT_JOBS_POLL_INTERVAL", "2"))
+    RECEIPT_JOBS_NOTIFY_URL = os.getenv("RECEIPT_JOBS_NOTIFY_URL", "")
+    
     PROMPTS_DIR = APP_DIR / "infrastructure" / "llm" / "prompts"
     INSTRUCTIONS_FILE = PROMPTS_DIR / "instruction_agente_negociacao.txt"
     DESCRIPTIONS_FILE = PROMPTS_DIR / "description_agente_negociacao.txt"
@@ -47,7 +98,11 @@ class AppConfig:
     @classmethod
     def ensure_directories(cls):
         cls.COMPROVANTES_DIR.mkdir(parents=True, exist_ok=True)
+        cls.COMPROVANTES_PENDENTES_DIR.mkdir(parents=True, exist_ok=True)
+        cls.UPLOAD_SPOOL_DIR.mkdir(parents=True, exist_ok=True)
         cls.LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        cls.BOLETOS_DIR.mkdir(parents=True, exist_ok=True)
+        cls.OCR_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 
 class LoggingConfig:
@@ -3,7 +3,8 @@ SQLAlchemy Models - BancoAgil
 Schema do banco de dados usando SQLAlchemy ORM
 """
 from datetime import datetime
-from sqlalchemy import Column, String, Numeric, DateTime, Integer, ForeignKey
+from sqlalchemy import Column, String, Numeric, DateTime, Integer, ForeignKey, Text, Index, Computed
+from sqlalchemy.dialects.postgresql import JSONB, BIT, TSVECTOR
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -77,6 +78,11 @@ class Invoice(Base):
     customer = relationship("Customer", back_populates="invoices")
     payment_plan = relationship("PaymentPlan", back_populates="invoices")
     receipts = relationship("Receipt", back_populates="invoice", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index('ix_invoice_cpf_status_amount', 'cpf', 'status', 'totalAmount'),
+        Index('ix_invoice_cpf_status_due', 'cpf', 'status', 'dueDate'),
+    )
 
 
 class Receipt(Base):
@@ -91,9 +97,73 @@ class Receipt(Base):
     invoiceId = Column(String, ForeignKey('Invoice.id', ondelete='CASCADE'), nullable=False, doc="ID do boleto pago")
     filePath = Column(String, nullable=False, doc="Caminho do arquivo no servidor")
     originalName = Column(String, nullable=False, doc="Nome original do arquivo")
+    contentHash = Column(String(64), nullable=True, doc="SHA-256 do conteúdo do arquivo")
+    perceptualHash = Column(BIT(256), nullable=True, doc="dHash da imagem (busca de quase-duplicatas)")
+    similarReceiptId = Column(String, ForeignKey('Receipt.id', ondelete='SET NULL'), nullable=True, doc="Comprovante anterior visualmente parecido")
+    similarDistance = Column(Integer, nullable=True, doc="Distância de Hamming até o comprovante parecido")
+    payerCpf = Column(String, nullable=True, doc="CPF lido no comprovante")
+    paidAmount = Column(Numeric(12, 2), nullable=True, doc="Valor pago lido no comprovante")
+    paymentDate = Column(DateTime, nullable=True, doc="Data do pagamento lida no comprovante")
+    ocrText = Column(Text, nullable=True, doc="Texto extraído do comprovante")
+    extraction = Column(JSONB, nullable=True, doc="Campos extraídos, validações e tempos por etapa")
+    searchVector = Column(
+        TSVECTOR,
+        Computed("to_tsvector('portuguese', coalesce(\"ocrText\", ''))", persisted=True),
+        doc="Índice de texto completo do texto extraído"
+    )
     receivedAt = Column(DateTime, default=datetime.utcnow, doc="Data de recebimento")
     updatedAt = Column(DateTime, nullable=True, doc="Data de atualização")
     deactivatedAt = Column(DateTime, nullable=True, doc="Data de desativação")
     deletedAt = Column(DateTime, nullable=True, doc="Data de exclusão lógica")
     
     invoice = relationship("Invoice", back_populates="receipts")
+    
+    __table_args__ = (
+        Index('ux_receipt_content_hash', 'contentHash', unique=True),
+        Index(
+            'ix_receipt_perceptual_hash', 'perceptualHash',
+            postgresql_using='hnsw',
+            postgresql_ops={'perceptualHash': 'bit_hamming_ops'}
+        ),
+        Index('ix_receipt_paid_amount_date', 'paidAmount', 'paymentDate'),
+        Index('ix_receipt_payment_date', 'paymentDate'),
+        Index('ix_receipt_payer_cpf', 'payerCpf'),
+        Index(
+            'ix_receipt_extraction', 'extraction',
+            postgresql_using='gin',
+            postgresql_ops={'extraction': 'jsonb_path_ops'}
+        ),
+        Index('ix_receipt_search_vector', 'searchVector', postgresql_using='gin'),
+    )
+
+
+
+class ReceiptJob(Base):
+    """
+    Model de Job de Validação de Comprovante
+    
+    Fila durável de comprovantes aguardando validação assíncrona.
+    Os workers reservam jobs com SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+    __tablename__ = 'ReceiptJob'
+    
+    id = Column(String, primary_key=True, doc="UUID do job")
+    status = Column(String, nullable=False, default='PENDING', doc="Status: PENDING, RUNNING, DONE, FAILED")
+    filePath = Column(String, nullable=False, doc="Caminho do arquivo aguardando validação")
+    originalName = Column(String, nullable=False, doc="Nome original do arquivo")
+    sessionId = Column(String, nullable=True, doc="Sessão do agente que enviou o comprovante")
+    userId = Column(String, nullable=True, doc="Usuário da sessão do agente")
+    expectedCpf = Column(String, nullable=True, doc="CPF autenticado na sessão no momento do envio")
+    attempts = Column(Integer, nullable=False, default=0, doc="Tentativas de processamento já iniciadas")
+    maxAttempts = Column(Integer, nullable=False, default=3, doc="Máximo de tentativas antes de falhar")
+    availableAt = Column(DateTime, nullable=False, default=datetime.utcnow, doc="Quando o job fica visível para os workers")
+    lockedBy = Column(String, nullable=True, doc="Worker que reservou o job")
+    result = Column(JSONB, nullable=True, doc="Resultado do processamento")
+    lastError = Column(Text, nullable=True, doc="Último erro de processamento")
+    createdAt = Column(DateTime, default=datetime.utcnow, doc="Data de criação")
+    updatedAt = Column(DateTime, nullable=True, doc="Data de atualização")
+    finishedAt = Column(DateTime, nullable=True, doc="Data de conclusão")
+    
+    __table_args__ = (
+        Index('ix_receiptjob_status_available', 'status', 'availableAt'),
+    )
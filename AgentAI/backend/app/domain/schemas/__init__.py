@@ -2,11 +2,14 @@
 
 from .chat_schemas import ChatRequest, ChatResponse, EndSessionRequest
 from .comprovante_schemas import ComprovanteResponse
+from .boleto_schemas import BoletoLoteItem, BoletoLoteRequest
 
 __all__ = [
     "ChatRequest",
     "ChatResponse", 
     "EndSessionRequest",
-    "ComprovanteResponse"
+    "ComprovanteResponse",
+    "BoletoLoteItem",
+    "BoletoLoteRequest"
 ]
 
@@ -0,0 +1,32 @@
+"""Boleto Request Schemas"""
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class BoletoLoteItem(BaseModel):
+    """Plano acordado para o qual será gerado um boleto"""
+    cpf: str = Field(
+        ...,
+        description="CPF do cliente",
+        examples=["12345678909"]
+    )
+    id_plano: str = Field(
+        ...,
+        description="ID do plano de pagamento do cliente",
+        examples=["550e8400-e29b-41d4-a716-446655440000"]
+    )
+
+
+class BoletoLoteRequest(BaseModel):
+    """Request para gerar boletos em lote (campanhas de cobrança)"""
+    itens: List[BoletoLoteItem] = Field(
+        ...,
+        description="Pares (CPF, plano) para gerar boletos",
+        min_length=1
+    )
+    dias_vencimento: int = Field(
+        default=7,
+        ge=1,
+        le=90,
+        description="Dias até o vencimento, contados a partir de hoje"
+    )
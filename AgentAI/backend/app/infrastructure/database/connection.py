@@ -1,12 +1,13 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 import logging
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import and_, create_engine, func, insert, or_, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer, sessionmaker
 from sqlalchemy.pool import QueuePool
 
-from app.domain.models.database_models import Base, Customer, PaymentPlan, Invoice, Receipt
+from app.domain.models.database_models import Base, Customer, PaymentPlan, Invoice, Receipt, ReceiptJob
 from app.core.config import DatabaseConfig
 
 logger = logging.getLogger(__name__)
@@ -33,9 +34,49 @@ def _decimal_to_float(value: Optional[Decimal]) -> Optional[float]:
     return float(value) if value is not None else None
 
 
+# Extensões exigidas pelos índices do schema (pgvector: HNSW sobre bit).
+EXTENSOES = [
+    'CREATE EXTENSION IF NOT EXISTS vector',
+]
+
+# DDL idempotente para bancos criados antes das colunas/índices novos;
+# create_all só cria tabelas inexistentes.
+MIGRACOES = [
+    'ALTER TABLE "Receipt" ADD COLUMN IF NOT EXISTS "contentHash" VARCHAR(64)',
+    'CREATE UNIQUE INDEX IF NOT EXISTS ux_receipt_content_hash ON "Receipt" ("contentHash")',
+    'ALTER TABLE "Receipt" ADD COLUMN IF NOT EXISTS "perceptualHash" BIT(256)',
+    'ALTER TABLE "Receipt" ADD COLUMN IF NOT EXISTS "similarReceiptId" VARCHAR REFERENCES "Receipt" (id) ON DELETE SET NULL',
+    'ALTER TABLE "Receipt" ADD COLUMN IF NOT EXISTS "similarDistance" INTEGER',
+    'CREATE INDEX IF NOT EXISTS ix_receipt_perceptual_hash ON "Receipt" USING hnsw ("perceptualHash" bit_hamming_ops)',
+    'ALTER TABLE "Receipt" ADD COLUMN IF NOT EXISTS "payerCpf" VARCHAR',
+    'ALTER TABLE "Receipt" ADD COLUMN IF NOT EXISTS "paidAmount" NUMERIC(12, 2)',
+    'ALTER TABLE "Receipt" ADD COLUMN IF NOT EXISTS "paymentDate" TIMESTAMP WITHOUT TIME ZONE',
+    'ALTER TABLE "Receipt" ADD COLUMN IF NOT EXISTS "ocrText" TEXT',
+    'ALTER TABLE "Receipt" ADD COLUMN IF NOT EXISTS extraction JSONB',
+    'ALTER TABLE "Receipt" ADD COLUMN IF NOT EXISTS "searchVector" TSVECTOR '
+    """GENERATED ALWAYS AS (to_tsvector('portuguese', coalesce("ocrText", ''))) STORED""",
+    'CREATE INDEX IF NOT EXISTS ix_receipt_paid_amount_date ON "Receipt" ("paidAmount", "paymentDate")',
+    'CREATE INDEX IF NOT EXISTS ix_receipt_payment_date ON "Receipt" ("paymentDate")',
+    'CREATE INDEX IF NOT EXISTS ix_receipt_payer_cpf ON "Receipt" ("payerCpf")',
+    'CREATE INDEX IF NOT EXISTS ix_receipt_extraction ON "Receipt" USING gin (extraction jsonb_path_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_receipt_search_vector ON "Receipt" USING gin ("searchVector")',
+    'CREATE INDEX IF NOT EXISTS ix_invoice_cpf_status_amount ON "Invoice" (cpf, status, "totalAmount")',
+    'CREATE INDEX IF NOT EXISTS ix_invoice_cpf_status_due ON "Invoice" (cpf, status, "dueDate")',
+    'CREATE INDEX IF NOT EXISTS ix_invoice_digitable_digits ON "Invoice" (regexp_replace("digitableLine", \'\\D\', \'\', \'g\'))',
+]
+
+
+def _executar_ddl(comandos: List[str]) -> None:
+    with engine.begin() as conn:
+        for comando in comandos:
+            conn.execute(text(comando))
+
+
 def init_db() -> None:
     try:
+        _executar_ddl(EXTENSOES)
         Base.metadata.create_all(bind=engine)
+        _executar_ddl(MIGRACOES)
         
         session = SessionLocal()
         try:
@@ -208,6 +249,73 @@ def registrar_boleto(cpf: str, id_plano: str, linha_digitavel: str, data_vencime
         session.close()
 
 
+def obter_planos_por_ids(ids_planos: List[str]) -> Dict[str, Dict]:
+    """Planos de pagamento pelos IDs, em uma única consulta (id -> plano)."""
+    if not ids_planos:
+        return {}
+    session = SessionLocal()
+    try:
+        consulta = select(PaymentPlan.id, PaymentPlan.cpf, PaymentPlan.installments, PaymentPlan.installmentAmount).where(
+            PaymentPlan.id.in_(set(ids_planos))
+        )
+        return {
+            linha.id: {
+                "id_plano": linha.id,
+                "cpf": linha.cpf,
+                "parcelas": linha.installments,
+                "valor_parcela": _decimal_to_float(linha.installmentAmount),
+            }
+            for linha in session.execute(consulta)
+        }
+    finally:
+        session.close()
+
+
+def registrar_boletos_em_lote(boletos: List[Dict]) -> int:
+    """
+    Insere vários boletos em uma transação (um INSERT em lote). Cada item
+    tem id_boleto, cpf, id_plano, linha_digitavel, data_vencimento,
+    valor_total e criado_em.
+    """
+    if not boletos:
+        return 0
+    session = SessionLocal()
+    try:
+        session.execute(insert(Invoice), [
+            {
+                "id": b["id_boleto"],
+                "cpf": b["cpf"],
+                "paymentPlanId": b["id_plano"],
+                "digitableLine": b["linha_digitavel"],
+                "dueDate": b["data_vencimento"],
+                "totalAmount": Decimal(str(b["valor_total"])),
+                "status": "PENDING",
+                "createdAt": b["criado_em"],
+            }
+            for b in boletos
+        ])
+        session.commit()
+        return len(boletos)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def _boleto_to_dict(invoice: Invoice) -> Dict:
+    return {
+        "id_boleto": invoice.id,
+        "cpf": invoice.cpf,
+        "id_plano": invoice.paymentPlanId,
+        "linha_digitavel": invoice.digitableLine,
+        "data_vencimento": invoice.dueDate.isoformat(),
+        "valor_total": _decimal_to_float(invoice.totalAmount),
+        "status": invoice.status,
+        "criado_em": invoice.createdAt.isoformat(),
+    }
+
+
 def listar_boletos(cpf: str) -> List[Dict]:
     """Lista todos os boletos de um CPF."""
     cpf_limpo = _normalize_cpf(cpf)
@@ -269,8 +377,98 @@ def obter_boleto(boleto_id: str) -> Optional[Dict]:
         session.close()
 
 
-def registrar_comprovante(boleto_id: str, file_path: str, original_name: str) -> Optional[Dict]:
-    """Registra comprovante de pagamento."""
+def obter_boleto_por_codigo(codigos: List[str]) -> Optional[Dict]:
+    """
+    Localiza o boleto cuja linha digitável, só com os dígitos, é uma das
+    sequências dadas (linha digitável ou código de barras lido do comprovante).
+    """
+    codigos = [c for c in codigos if c]
+    if not codigos:
+        return None
+    session = SessionLocal()
+    try:
+        digitos = func.regexp_replace(Invoice.digitableLine, r'\D', '', 'g')
+        invoice = (
+            session.query(Invoice)
+            .filter(digitos.in_(codigos))
+            .order_by(Invoice.createdAt.desc())
+            .first()
+        )
+        return _boleto_to_dict(invoice) if invoice else None
+    finally:
+        session.close()
+
+
+def buscar_boletos_candidatos(
+    cpf: str,
+    valores: List[float],
+    vencimentos: List[date],
+    limite: int = 10
+) -> List[Dict]:
+    """
+    Boletos pendentes do CPF com valor total ou vencimento entre os lidos no
+    comprovante. Usa os índices (cpf, status, totalAmount) e
+    (cpf, status, dueDate) em vez de carregar todos os boletos do cliente.
+    """
+    criterios = []
+    if valores:
+        criterios.append(Invoice.totalAmount.in_(sorted({Decimal(f'{v:.2f}') for v in valores})))
+    for dia in set(vencimentos):
+        inicio = datetime.combine(dia, datetime.min.time())
+        criterios.append(and_(Invoice.dueDate >= inicio, Invoice.dueDate < inicio + timedelta(days=1)))
+    if not criterios:
+        return []
+
+    session = SessionLocal()
+    try:
+        invoices = (
+            session.query(Invoice)
+            .filter(Invoice.cpf == _normalize_cpf(cpf), Invoice.status == 'PENDING', or_(*criterios))
+            .order_by(Invoice.createdAt.desc())
+            .limit(limite)
+            .all()
+        )
+        return [_boleto_to_dict(inv) for inv in invoices]
+    finally:
+        session.close()
+
+
+def obter_boleto_mais_recente(cpf: str) -> Optional[Dict]:
+    """Boleto mais recente do CPF, sem carregar os demais."""
+    session = SessionLocal()
+    try:
+        invoice = (
+            session.query(Invoice)
+            .filter_by(cpf=_normalize_cpf(cpf))
+            .order_by(Invoice.createdAt.desc())
+            .first()
+        )
+        return _boleto_to_dict(invoice) if invoice else None
+    finally:
+        session.close()
+
+
+def registrar_comprovante(
+    boleto_id: str,
+    file_path: str,
+    original_name: str,
+    content_hash: Optional[str] = None,
+    perceptual_hash: Optional[str] = None,
+    similar_a: Optional[Dict] = None,
+    cpf_pagador: Optional[str] = None,
+    valor_pago: Optional[float] = None,
+    data_pagamento: Optional[datetime] = None,
+    texto_ocr: Optional[str] = None,
+    extracao: Optional[Dict] = None
+) -> Optional[Dict]:
+    """
+    Registra comprovante de pagamento com o resultado da extração (campos,
+    validações e tempos em `extracao`), para consultas sem repetir o OCR.
+    
+    Se outro registro com o mesmo hash de conteúdo for gravado antes (envios
+    simultâneos do mesmo arquivo), devolve o registro existente com
+    `duplicado=True`.
+    """
     import uuid
     session = SessionLocal()
     try:
@@ -283,11 +481,27 @@ def registrar_comprovante(boleto_id: str, file_path: str, original_name: str) ->
             invoiceId=boleto_id,
             filePath=file_path,
             originalName=original_name,
+            contentHash=content_hash,
+            perceptualHash=perceptual_hash,
+            similarReceiptId=similar_a['id_comprovante'] if similar_a else None,
+            similarDistance=similar_a['distancia'] if similar_a else None,
+            payerCpf=cpf_pagador,
+            paidAmount=Decimal(f'{valor_pago:.2f}') if valor_pago is not None else None,
+            paymentDate=data_pagamento,
+            ocrText=texto_ocr,
+            extraction=extracao,
             receivedAt=datetime.utcnow()
         )
         
         session.add(receipt)
-        session.commit()
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            existente = obter_comprovante_por_hash(content_hash) if content_hash else None
+            if not existente:
+                raise
+            return {**existente, "duplicado": True}
         session.refresh(receipt)
         
         return {
@@ -302,3 +516,437 @@ def registrar_comprovante(boleto_id: str, file_path: str, original_name: str) ->
         raise e
     finally:
         session.close()
+
+
+def obter_comprovante_por_hash(content_hash: str) -> Optional[Dict]:
+    """Busca um comprovante já aceito pelo hash do conteúdo do arquivo."""
+    session = SessionLocal()
+    try:
+        resultado = (
+            session.query(Receipt, Invoice)
+            .join(Invoice, Receipt.invoiceId == Invoice.id)
+            .filter(Receipt.contentHash == content_hash)
+            .first()
+        )
+        if not resultado:
+            return None
+        
+        receipt, invoice = resultado
+        return {
+            "id_comprovante": receipt.id,
+            "id_boleto": receipt.invoiceId,
+            "cpf": invoice.cpf,
+            "valor_total": _decimal_to_float(invoice.totalAmount),
+            "caminho_arquivo": receipt.filePath,
+            "nome_original": receipt.originalName,
+            "recebido_em": receipt.receivedAt.isoformat(),
+        }
+    finally:
+        session.close()
+
+
+def _comprovante_to_dict(receipt: Receipt, detalhado: bool = False) -> Dict:
+    dados = {
+        "id_comprovante": receipt.id,
+        "id_boleto": receipt.invoiceId,
+        "cpf_pagador": receipt.payerCpf,
+        "valor_pago": _decimal_to_float(receipt.paidAmount),
+        "data_pagamento": receipt.paymentDate.isoformat() if receipt.paymentDate else None,
+        "nome_original": receipt.originalName,
+        "similar_a": receipt.similarReceiptId,
+        "recebido_em": receipt.receivedAt.isoformat(),
+    }
+    if detalhado:
+        dados["caminho_arquivo"] = receipt.filePath
+        dados["extracao"] = receipt.extraction
+        dados["texto_ocr"] = receipt.ocrText
+    return dados
+
+
+def buscar_comprovantes(
+    valor: Optional[float] = None,
+    valor_min: Optional[float] = None,
+    valor_max: Optional[float] = None,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    cpf: Optional[str] = None,
+    id_boleto: Optional[str] = None,
+    linha_digitavel: Optional[str] = None,
+    texto: Optional[str] = None,
+    limite: int = 50,
+    offset: int = 0
+) -> List[Dict]:
+    """
+    Busca de back-office sobre os campos persistidos na extração.
+
+    Valor e data do pagamento usam o índice (paidAmount, paymentDate); a
+    linha digitável usa o GIN do JSONB (`@>`) e `texto` a busca de texto
+    completo em português sobre o texto extraído. As datas são inclusivas.
+    """
+    filtros = []
+    if valor is not None:
+        filtros.append(Receipt.paidAmount == Decimal(f'{valor:.2f}'))
+    if valor_min is not None:
+        filtros.append(Receipt.paidAmount >= Decimal(f'{valor_min:.2f}'))
+    if valor_max is not None:
+        filtros.append(Receipt.paidAmount <= Decimal(f'{valor_max:.2f}'))
+    if data_inicio:
+        filtros.append(Receipt.paymentDate >= datetime.combine(data_inicio, datetime.min.time()))
+    if data_fim:
+        filtros.append(Receipt.paymentDate < datetime.combine(data_fim, datetime.min.time()) + timedelta(days=1))
+    if cpf:
+        filtros.append(Receipt.payerCpf == _normalize_cpf(cpf))
+    if id_boleto:
+        filtros.append(Receipt.invoiceId == id_boleto)
+    if linha_digitavel:
+        digitos = "".join(filter(str.isdigit, linha_digitavel))
+        filtros.append(Receipt.extraction.contains({"linhas_digitaveis": [digitos]}))
+    if texto:
+        filtros.append(Receipt.searchVector.bool_op('@@')(func.plainto_tsquery('portuguese', texto)))
+
+    session = SessionLocal()
+    try:
+        receipts = (
+            session.query(Receipt)
+            .options(*(defer(coluna) for coluna in (
+                Receipt.ocrText, Receipt.extraction, Receipt.searchVector, Receipt.perceptualHash
+            )))
+            .filter(Receipt.deletedAt.is_(None), *filtros)
+            .order_by(Receipt.paymentDate.desc().nullslast(), Receipt.receivedAt.desc())
+            .offset(offset)
+            .limit(limite)
+            .all()
+        )
+        return [_comprovante_to_dict(r) for r in receipts]
+    finally:
+        session.close()
+
+
+def obter_comprovante(comprovante_id: str) -> Optional[Dict]:
+    """Comprovante com a extração persistida e o texto lido."""
+    session = SessionLocal()
+    try:
+        receipt = session.query(Receipt).filter_by(id=comprovante_id).first()
+        return _comprovante_to_dict(receipt, detalhado=True) if receipt else None
+    finally:
+        session.close()
+
+
+def iterar_comprovantes_para_revalidacao(
+    apos_id: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None,
+    tamanho_lote: int = 1000
+) -> Iterator[Dict]:
+    """
+    Percorre os comprovantes em ordem de id com um cursor do lado do servidor
+    (`yield_per`): só `tamanho_lote` linhas ficam em memória por vez. Retomar
+    a partir de `apos_id` continua de onde uma execução anterior parou.
+    """
+    consulta = (
+        select(
+            Receipt.id, Receipt.filePath, Receipt.ocrText, Receipt.extraction, Receipt.receivedAt,
+            Invoice.cpf, Invoice.totalAmount, Invoice.dueDate, Invoice.digitableLine
+        )
+        .join(Invoice, Receipt.invoiceId == Invoice.id)
+        .where(Receipt.deletedAt.is_(None))
+        .order_by(Receipt.id)
+    )
+    if apos_id:
+        consulta = consulta.where(Receipt.id > apos_id)
+    if desde:
+        consulta = consulta.where(Receipt.receivedAt >= desde)
+    if ate:
+        consulta = consulta.where(Receipt.receivedAt < ate)
+
+    session = SessionLocal()
+    try:
+        for linha in session.execute(consulta.execution_options(yield_per=tamanho_lote)):
+            yield {
+                "id_comprovante": linha.id,
+                "caminho_arquivo": linha.filePath,
+                "texto_ocr": linha.ocrText,
+                "extracao": linha.extraction,
+                "recebido_em": linha.receivedAt,
+                "cpf": linha.cpf,
+                "valor_total": _decimal_to_float(linha.totalAmount),
+                "data_vencimento": linha.dueDate,
+                "linha_digitavel": linha.digitableLine,
+            }
+    finally:
+        session.close()
+
+
+def gravar_revalidacoes(atualizacoes: List[Dict]) -> int:
+    """
+    Grava em uma transação o resultado de várias revalidações. Cada item tem
+    `id` e as colunas de Receipt a atualizar (UPDATE em lote por chave).
+    """
+    if not atualizacoes:
+        return 0
+    agora = datetime.utcnow()
+    session = SessionLocal()
+    try:
+        session.execute(update(Receipt), [{**a, "updatedAt": agora} for a in atualizacoes])
+        session.commit()
+        return len(atualizacoes)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def listar_comprovantes_para_arquivar(
+    recebidos_antes: datetime,
+    apos_id: Optional[str] = None,
+    limite: int = 1000
+) -> List[Dict]:
+    """Comprovantes ainda em arquivos soltos recebidos antes da data, em ordem de id."""
+    consulta = (
+        select(Receipt.id, Receipt.filePath, Receipt.receivedAt)
+        .where(
+            Receipt.deletedAt.is_(None),
+            Receipt.receivedAt < recebidos_antes,
+            ~Receipt.filePath.contains('::'),
+        )
+        .order_by(Receipt.id)
+        .limit(limite)
+    )
+    if apos_id:
+        consulta = consulta.where(Receipt.id > apos_id)
+
+    session = SessionLocal()
+    try:
+        return [
+            {"id_comprovante": linha.id, "caminho_arquivo": linha.filePath, "recebido_em": linha.receivedAt}
+            for linha in session.execute(consulta)
+        ]
+    finally:
+        session.close()
+
+
+def atualizar_caminhos_comprovantes(caminhos: Dict[str, str]) -> int:
+    """Aponta os comprovantes (id -> referência) para o novo local, em uma transação."""
+    if not caminhos:
+        return 0
+    agora = datetime.utcnow()
+    session = SessionLocal()
+    try:
+        session.execute(
+            update(Receipt),
+            [{"id": id_comprovante, "filePath": caminho, "updatedAt": agora} for id_comprovante, caminho in caminhos.items()]
+        )
+        session.commit()
+        return len(caminhos)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def buscar_comprovantes_similares(perceptual_hash: str, distancia_maxima: int, limite: int = 5) -> List[Dict]:
+    """
+    Comprovantes cujo hash perceptual está a no máximo `distancia_maxima`
+    bits (Hamming) do informado, do mais parecido ao menos parecido.
+    
+    A subconsulta ordena só pela distância para usar o índice HNSW; o
+    filtro e o join com o boleto são aplicados aos poucos vizinhos retornados.
+    """
+    session = SessionLocal()
+    try:
+        linhas = session.execute(text('''
+            SELECT r.id, r."invoiceId", r."filePath", r."originalName", r."receivedAt",
+                   r.distancia, i.cpf, i."totalAmount"
+            FROM (
+                SELECT id, "invoiceId", "filePath", "originalName", "receivedAt",
+                       "perceptualHash" <~> CAST(:hash AS bit(256)) AS distancia
+                FROM "Receipt"
+                ORDER BY "perceptualHash" <~> CAST(:hash AS bit(256))
+                LIMIT :limite
+            ) r
+            JOIN "Invoice" i ON i.id = r."invoiceId"
+            WHERE r.distancia <= :distancia_maxima
+            ORDER BY r.distancia
+        '''), {"hash": perceptual_hash, "limite": limite, "distancia_maxima": distancia_maxima}).all()
+        
+        return [{
+            "id_comprovante": linha.id,
+            "id_boleto": linha.invoiceId,
+            "cpf": linha.cpf,
+            "valor_total": _decimal_to_float(linha.totalAmount),
+            "caminho_arquivo": linha.filePath,
+            "nome_original": linha.originalName,
+            "recebido_em": linha.receivedAt.isoformat(),
+            "distancia": int(linha.distancia),
+        } for linha in linhas]
+    finally:
+        session.close()
+
+
+def _job_to_dict(job: ReceiptJob) -> Dict:
+    return {
+        "id_job": job.id,
+        "status": job.status,
+        "caminho_arquivo": job.filePath,
+        "nome_original": job.originalName,
+        "session_id": job.sessionId,
+        "user_id": job.userId,
+        "cpf_esperado": job.expectedCpf,
+        "tentativas": job.attempts,
+        "max_tentativas": job.maxAttempts,
+        "resultado": job.result,
+        "ultimo_erro": job.lastError,
+        "criado_em": job.createdAt.isoformat() if job.createdAt else None,
+        "concluido_em": job.finishedAt.isoformat() if job.finishedAt else None,
+    }
+
+
+def criar_job_comprovante(file_path: str, original_name: str, session_id: Optional[str] = None, user_id: Optional[str] = None, cpf_esperado: Optional[str] = None, max_tentativas: int = 3, id_job: Optional[str] = None) -> Dict:
+    """Enfileira um comprovante para validação assíncrona."""
+    import uuid
+    session = SessionLocal()
+    try:
+        agora = datetime.utcnow()
+        job = ReceiptJob(
+            id=id_job or str(uuid.uuid4()),
+            status='PENDING',
+            filePath=file_path,
+            originalName=original_name,
+            sessionId=session_id,
+            userId=user_id,
+            expectedCpf=_normalize_cpf(cpf_esperado) or None,
+            attempts=0,
+            maxAttempts=max_tentativas,
+            availableAt=agora,
+            createdAt=agora
+        )
+        
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+        
+        return _job_to_dict(job)
+    except Exception as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
+
+def obter_job_comprovante(job_id: str) -> Optional[Dict]:
+    """Obtém o status de um job de validação de comprovante."""
+    session = SessionLocal()
+    try:
+        job = session.query(ReceiptJob).filter_by(id=job_id).first()
+        return _job_to_dict(job) if job else None
+    finally:
+        session.close()
+
+
+def reservar_job_comprovante(worker_id: str, visibilidade_segundos: int) -> Optional[Dict]:
+    """
+    Reserva o próximo job disponível (FOR UPDATE SKIP LOCKED).
+    
+    Jobs RUNNING cujo prazo de visibilidade expirou (worker morreu) voltam a ser
+    elegíveis; se já esgotaram as tentativas são marcados como FAILED e
+    devolvidos com esse status, para o worker remover o arquivo pendente.
+    """
+    session = SessionLocal()
+    try:
+        agora = datetime.utcnow()
+        job = (
+            session.query(ReceiptJob)
+            .filter(
+                ReceiptJob.status.in_(['PENDING', 'RUNNING']),
+                ReceiptJob.availableAt <= agora
+            )
+            .order_by(ReceiptJob.availableAt)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if not job:
+            session.commit()
+            return None
+        
+        if job.attempts >= job.maxAttempts:
+            job.status = 'FAILED'
+            job.lastError = job.lastError or 'Tempo de processamento esgotado.'
+            job.lockedBy = None
+            job.updatedAt = agora
+            job.finishedAt = agora
+            session.commit()
+            session.refresh(job)
+            return _job_to_dict(job)
+        
+        job.status = 'RUNNING'
+        job.attempts += 1
+        job.lockedBy = worker_id
+        job.availableAt = agora + timedelta(seconds=visibilidade_segundos)
+        job.updatedAt = agora
+        session.commit()
+        session.refresh(job)
+        
+        return _job_to_dict(job)
+    except Exception as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
+
+def concluir_job_comprovante(job_id: str, worker_id: str, resultado: Dict) -> bool:
+    """Grava o resultado do job. Retorna False se o job não pertence mais ao worker."""
+    session = SessionLocal()
+    try:
+        agora = datetime.utcnow()
+        atualizados = session.query(ReceiptJob).filter_by(
+            id=job_id, lockedBy=worker_id, status='RUNNING'
+        ).update({
+            ReceiptJob.status: 'DONE',
+            ReceiptJob.result: resultado,
+            ReceiptJob.lockedBy: None,
+            ReceiptJob.updatedAt: agora,
+            ReceiptJob.finishedAt: agora,
+        }, synchronize_session=False)
+        session.commit()
+        return atualizados == 1
+    except Exception as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
+
+def falhar_job_comprovante(job_id: str, worker_id: str, erro: str, espera_base_segundos: int = 10) -> Optional[str]:
+    """
+    Registra falha de processamento. Reagenda com backoff exponencial enquanto
+    houver tentativas; caso contrário marca como FAILED. Retorna o novo status.
+    """
+    session = SessionLocal()
+    try:
+        job = session.query(ReceiptJob).filter_by(
+            id=job_id, lockedBy=worker_id, status='RUNNING'
+        ).with_for_update().first()
+        if not job:
+            session.commit()
+            return None
+        
+        agora = datetime.utcnow()
+        job.lastError = erro
+        job.lockedBy = None
+        job.updatedAt = agora
+        if job.attempts >= job.maxAttempts:
+            job.status = 'FAILED'
+            job.finishedAt = agora
+        else:
+            job.status = 'PENDING'
+            job.availableAt = agora + timedelta(seconds=espera_base_segundos * 2 ** (job.attempts - 1))
+        session.commit()
+        return job.status
+    except Exception as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
@@ -1,15 +1,8 @@
 import logging
 from typing import Any, Dict, Optional
 import asyncio
-import io
-import os
 from datetime import datetime, timedelta
 import uuid
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
-from reportlab.graphics.barcode import code128
-from reportlab.lib import colors
 
 from dotenv import load_dotenv
 from google.adk.agents import Agent
@@ -210,73 +203,6 @@ async def proposta_por_valor(cpf: str, valor_parcela_desejado: float) -> Dict[st
     return criar_response_ok(data)
 
 
-def _criar_pdf_boleto_bytes(
-    cpf: str,
-    linha_digitavel: str,
-    valor: float,
-    vencimento: datetime,
-    id_boleto: Optional[str] = None,
-    nome_beneficiario: str = "Empresa Exemplo",
-    observacao: str = "Boleto gerado para fins de teste (fictício)."
-) -> bytes:
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    left_margin = 15 * mm
-    right_margin = 15 * mm
-    top = height - 20 * mm
-
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(left_margin, top, nome_beneficiario)
-    c.setFont("Helvetica", 9)
-    c.drawString(left_margin, top - 14, f"Documento: Boleto Fictício  •  ID: {id_boleto or '-'}")
-    c.setStrokeColor(colors.grey)
-    c.line(left_margin, top - 18, width - right_margin, top - 18)
-
-    y = top - 36
-    c.setFont("Helvetica", 10)
-    c.drawString(left_margin, y, f"CPF do pagador: {cpf}")
-    y -= 14
-    c.drawString(left_margin, y, f"Vencimento: {vencimento.strftime('%d/%m/%Y') if isinstance(vencimento, datetime) else str(vencimento)}")
-    y -= 14
-    valor_formatado = f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    c.drawString(left_margin, y, f"Valor: {valor_formatado}")
-    y -= 20
-
-    c.setFont("Helvetica-Oblique", 8)
-    c.drawString(left_margin, y, observacao)
-    y -= 26
-
-    c.setFont("Helvetica-Bold", 12)
-    txt_width = c.stringWidth(linha_digitavel, "Helvetica-Bold", 12)
-    c.drawString((width - txt_width) / 2, y, linha_digitavel)
-    y -= 26
-
-    try:
-        barcode_value = ''.join(ch for ch in linha_digitavel if ch.isdigit())
-        barcode = code128.Code128(barcode_value, barHeight=20*mm, barWidth=0.4)
-        barcode_x = left_margin
-        barcode_y = y - 20*mm
-        barcode.drawOn(c, barcode_x, barcode_y)
-    except Exception:
-        c.setStrokeColor(colors.red)
-        c.rect(left_margin, y - 20*mm, width - left_margin - right_margin, 20*mm, stroke=1, fill=0)
-
-    c.setFont("Helvetica", 8)
-    rodape_y = 30 * mm
-    c.setFillColor(colors.grey)
-    c.drawString(left_margin, rodape_y + 8, "Instruções: Este é um boleto fictício gerado para testes. Não possui validade bancária.")
-    c.setFillColor(colors.black)
-
-    c.setFont("Helvetica", 7)
-    c.drawRightString(width - right_margin, rodape_y + 25, f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-
-    c.showPage()
-    c.save()
-    buffer.seek(0)
-    return buffer.read()
-
 async def gerar_boleto_pdf_bytes(
     cpf: str,
     id_plano: str,
@@ -300,24 +226,9 @@ async def gerar_boleto_pdf_bytes(
     filename = f"boleto_{id_boleto}.pdf"
 
     try:
-        pdf_bytes = await asyncio.to_thread(
-            _criar_pdf_boleto_bytes,
-            cpf_limpo,
-            linha_digitavel,
-            valor,
-            vencimento,
-            id_boleto
-        )
-
-        boletos_dir = os.path.join(os.getcwd(), "data", "boletos")
-        os.makedirs(boletos_dir, exist_ok=True)
-        
-        save_path = os.path.join(boletos_dir, filename)
-        
-        with open(save_path, "wb") as f:
-            f.write(pdf_bytes)
-
-        boleto_registrado = registrar_boleto(
+        # Só o Invoice é gravado aqui; o PDF é renderizado no primeiro download.
+        boleto_registrado = await asyncio.to_thread(
+            registrar_boleto,
             cpf=cpf_limpo,
             id_plano=id_plano,
             linha_digitavel=linha_digitavel,
@@ -344,7 +255,7 @@ async def gerar_boleto_pdf_bytes(
         
     except Exception as e:
         logger.error(f"Erro ao gerar boleto: {e}")
-        return criar_response_error(f"Erro ao gerar PDF do boleto: {str(e)}", "PDF_GENERATION_ERROR")
+        return criar_response_error(f"Erro ao registrar boleto: {str(e)}", "DB_ERROR")
 
 
 async def listar_boletos(cpf: str) -> Dict[str, Any]:
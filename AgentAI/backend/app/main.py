@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.endpoints.chat_routes import router as chat_router
@@ -9,6 +10,16 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    from app.services.comprovante_executor import get_comprovante_pool
+    get_comprovante_pool().encerrar()
+    from app.services.boleto_lote import encerrar_pool
+    encerrar_pool()
+
+
 app = FastAPI(
     title="NegotiaAI - API de Negociação de Dívidas",
     description="API para interação com agente de negociação inteligente usando LLM (Google Gemini)",
@@ -19,7 +30,8 @@ app = FastAPI(
     },
     docs_url="/api/docs", 
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -0,0 +1,70 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from app.core.config import AppConfig
+from app.infrastructure.database.connection import obter_boleto
+from app.utils.boleto_pdf import get_modelo_boleto
+from app.utils.boleto_storage import BoletoPDF, get_boleto_storage
+
+logger = logging.getLogger(__name__)
+
+
+def _criado_em(boleto: Dict) -> datetime:
+    # createdAt é gravado em UTC, sem fuso.
+    return datetime.fromisoformat(boleto['criado_em']).replace(tzinfo=timezone.utc)
+
+
+def renderizar_pdf_boleto(boleto: Dict) -> bytes:
+    """
+    Renderiza o PDF a partir dos dados do boleto (como retornados por
+    obter_boleto). O "Gerado em" é a criação do Invoice no fuso
+    BOLETO_TIMEZONE (e não no do host), então o mesmo boleto gera os mesmos
+    bytes na API, no CLI e nos processos do lote.
+    """
+    return get_modelo_boleto().renderizar(
+        cpf=boleto['cpf'],
+        linha_digitavel=boleto['linha_digitavel'],
+        valor=boleto['valor_total'],
+        vencimento=datetime.fromisoformat(boleto['data_vencimento']),
+        id_boleto=boleto['id_boleto'],
+        gerado_em=_criado_em(boleto).astimezone(ZoneInfo(AppConfig.BOLETO_TIMEZONE)).replace(tzinfo=None),
+    )
+
+
+def obter_pdf_boleto(id_boleto: str) -> Optional[BoletoPDF]:
+    """
+    PDF do boleto, ou None se o boleto não existe. Quando já está armazenado
+    o banco não é consultado; senão o PDF é renderizado agora e guardado.
+    """
+    storage = get_boleto_storage()
+    pdf = storage.obter(id_boleto)
+    if pdf is not None:
+        return pdf
+
+    boleto = obter_boleto(id_boleto)
+    if not boleto:
+        return None
+
+    pdf = storage.salvar(id_boleto, renderizar_pdf_boleto(boleto), _criado_em(boleto).timestamp())
+    logger.info(f"PDF do boleto {id_boleto} gerado sob demanda")
+    return pdf
+
+
+def renderizar_e_guardar(boletos: List[Dict]) -> Dict[str, Optional[str]]:
+    """
+    Renderiza os PDFs de vários boletos e os grava no armazenamento (usado nos
+    processos da geração em lote). Retorna id -> erro, None quando deu certo.
+    """
+    storage = get_boleto_storage()
+    resultados = {}
+    for boleto in boletos:
+        try:
+            pdf = renderizar_pdf_boleto(boleto)
+            storage.salvar(boleto['id_boleto'], pdf, _criado_em(boleto).timestamp())
+            resultados[boleto['id_boleto']] = None
+        except Exception as e:
+            logger.error(f"Erro ao renderizar o boleto {boleto['id_boleto']}: {e}")
+            resultados[boleto['id_boleto']] = str(e)
+    return resultados
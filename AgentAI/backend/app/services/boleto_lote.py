@@ -0,0 +1,230 @@
+import uuid
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.core.config import AppConfig
+from app.infrastructure.database.connection import obter_planos_por_ids, registrar_boletos_em_lote
+from app.services.boleto_documento import renderizar_e_guardar
+from app.services.comprovante_executor import agrupar, criar_executor
+from app.utils.comprovante_codigos import gerar_linha_digitavel
+from app.utils.cpfValidate import normalizar_cpf, validar_cpf
+
+logger = logging.getLogger(__name__)
+
+
+# (cpf, id_plano) de cada boleto pedido.
+Par = Tuple[str, str]
+
+# Sugestão de espera quando já há um lote em andamento na API.
+RETRY_AFTER_LOTE = 60
+
+# Um único pool de renderização por processo, criado no primeiro lote e
+# reaproveitado pelos seguintes; um lote por vez o utiliza na API.
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_lote_em_andamento = threading.Lock()
+
+
+class ReservaLote:
+    """Vaga exclusiva para um lote; `liberar` pode ser chamado mais de uma vez."""
+
+    def __init__(self):
+        self._liberada = False
+        self._lock = threading.Lock()
+
+    def liberar(self) -> None:
+        with self._lock:
+            if self._liberada:
+                return
+            self._liberada = True
+        _lote_em_andamento.release()
+
+
+def reservar_lote() -> Optional[ReservaLote]:
+    """Reserva a vaga de lote sem esperar; None se outro lote está em andamento."""
+    if not _lote_em_andamento.acquire(blocking=False):
+        return None
+    return ReservaLote()
+
+
+def _obter_executor(workers: int) -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = criar_executor(workers)
+        return _executor
+
+
+def _descartar_executor() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _renderizar_no_pool(workers: int, boletos: List[Dict]):
+    try:
+        return _obter_executor(workers).submit(renderizar_e_guardar, boletos)
+    except BrokenProcessPool:
+        # Um worker morreu em um lote anterior: o pool é recriado uma vez.
+        logger.error("Pool de renderização de boletos quebrado; recriando")
+        _descartar_executor()
+        return _obter_executor(workers).submit(renderizar_e_guardar, boletos)
+
+
+def encerrar_pool() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _linha_erro(cpf: str, id_plano: str, codigo: str) -> Dict:
+    return {'cpf': cpf, 'id_plano': id_plano, 'status': 'ERRO', 'codigo': codigo}
+
+
+def _linha_gerado(boleto: Dict, erro_pdf) -> Dict:
+    return {
+        'cpf': boleto['cpf'],
+        'id_plano': boleto['id_plano'],
+        'status': 'GERADO',
+        'id_boleto': boleto['id_boleto'],
+        'valor': boleto['valor_total'],
+        'vencimento': boleto['data_vencimento'].strftime('%d/%m/%Y'),
+        'linha_digitavel': boleto['linha_digitavel'],
+        'download_url': f"/api/v1/boletos/download/{boleto['id_boleto']}",
+        # Sem PDF pronto o boleto continua válido: ele é gerado no download.
+        'pdf': erro_pdf is None,
+    }
+
+
+def _preparar_bloco(bloco: List[Par], vencimento: datetime, vistos: Set[Par]) -> Tuple[List[Dict], List[Dict]]:
+    """Confere os pares do bloco e monta os boletos; retorna (boletos, erros)."""
+    erros, validos = [], []
+    for cpf, id_plano in bloco:
+        if not validar_cpf(cpf):
+            erros.append(_linha_erro(cpf, id_plano, 'INVALID_CPF'))
+            continue
+        if not id_plano:
+            erros.append(_linha_erro(cpf, id_plano, 'PLAN_ID_REQUIRED'))
+            continue
+        par = (normalizar_cpf(cpf), id_plano)
+        if par in vistos:
+            erros.append(_linha_erro(cpf, id_plano, 'DUPLICADO_NO_LOTE'))
+            continue
+        vistos.add(par)
+        validos.append(par)
+
+    planos = obter_planos_por_ids([id_plano for _, id_plano in validos])
+    criado_em = datetime.utcnow()
+    boletos = []
+    for cpf, id_plano in validos:
+        plano = planos.get(id_plano)
+        if not plano or plano['cpf'] != cpf:
+            erros.append(_linha_erro(cpf, id_plano, 'PLAN_NOT_FOUND'))
+            continue
+        id_boleto = str(uuid.uuid4())
+        campo_livre = f"{uuid.UUID(id_boleto).int % 10 ** 25:025d}"
+        boletos.append({
+            'id_boleto': id_boleto,
+            'cpf': cpf,
+            'id_plano': id_plano,
+            'linha_digitavel': gerar_linha_digitavel(plano['valor_parcela'], vencimento.date(), campo_livre),
+            'data_vencimento': vencimento,
+            'valor_total': plano['valor_parcela'],
+            'criado_em': criado_em,
+        })
+    return boletos, erros
+
+
+def _para_renderizar(boleto: Dict) -> Dict:
+    # Mesmo formato de obter_boleto, que é o que a renderização recebe.
+    return {
+        **boleto,
+        'data_vencimento': boleto['data_vencimento'].isoformat(),
+        'criado_em': boleto['criado_em'].isoformat(),
+    }
+
+
+def gerar_boletos_em_lote(
+    pares: Iterable[Par],
+    dias_vencimento: int = 7,
+    tamanho_bloco: int = AppConfig.BOLETO_BATCH_CHUNK_SIZE,
+    workers: int = AppConfig.BOLETO_BATCH_WORKERS,
+    reserva: Optional[ReservaLote] = None
+) -> Iterator[Dict]:
+    """
+    Gera boletos para vários planos acordados, como a ferramenta do agente
+    faz para um: valor da parcela do plano e vencimento em `dias_vencimento`.
+
+    Os pares são conferidos em blocos de `tamanho_bloco` (uma consulta de
+    planos e um INSERT em lote por bloco, em uma transação). Os PDFs de cada
+    bloco gravado são renderizados em um pool de processos, enquanto o
+    próximo bloco vai para o banco; no máximo 2 blocos por processo ficam em
+    andamento. Produz uma linha por par, na ordem dos blocos, e um resumo no
+    final. Se um bloco falha no banco, todos os seus pares saem com DB_ERROR.
+
+    O pool é compartilhado entre lotes (veja `reservar_lote`). Se o gerador
+    for fechado antes do fim (cliente desconectado), os blocos ainda não
+    iniciados são cancelados e a `reserva`, se houver, é liberada.
+    """
+    vencimento = datetime.now() + timedelta(days=dias_vencimento)
+    vistos: Set[Par] = set()
+    resumo = {'total': 0, 'GERADO': 0, 'ERRO': 0, 'sem_pdf': 0}
+
+    def registrar(linha: Dict) -> Dict:
+        resumo['total'] += 1
+        resumo[linha['status']] += 1
+        if linha['status'] == 'GERADO' and not linha['pdf']:
+            resumo['sem_pdf'] += 1
+        return linha
+
+    def concluir(boletos: List[Dict], futuro) -> Iterator[Dict]:
+        try:
+            erros_pdf = futuro.result()
+        except Exception as e:
+            logger.error(f"Erro ao renderizar bloco de {len(boletos)} boletos: {e}")
+            if isinstance(e, BrokenProcessPool):
+                _descartar_executor()
+            erros_pdf = {b['id_boleto']: str(e) for b in boletos}
+        for boleto in boletos:
+            yield registrar(_linha_gerado(boleto, erros_pdf.get(boleto['id_boleto'])))
+
+    workers = max(1, workers)
+    em_andamento = deque()
+    try:
+        for bloco in agrupar(pares, tamanho_bloco):
+            boletos, erros = _preparar_bloco(bloco, vencimento, vistos)
+            for erro in erros:
+                yield registrar(erro)
+
+            try:
+                registrar_boletos_em_lote(boletos)
+            except Exception as e:
+                logger.error(f"Erro ao gravar bloco de {len(boletos)} boletos: {e}")
+                for boleto in boletos:
+                    yield registrar(_linha_erro(boleto['cpf'], boleto['id_plano'], 'DB_ERROR'))
+                continue
+
+            if boletos:
+                futuro = _renderizar_no_pool(workers, [_para_renderizar(b) for b in boletos])
+                em_andamento.append((boletos, futuro))
+            while len(em_andamento) >= workers * 2:
+                yield from concluir(*em_andamento.popleft())
+
+        while em_andamento:
+            yield from concluir(*em_andamento.popleft())
+
+        yield {'resumo': resumo}
+    finally:
+        for _, futuro in em_andamento:
+            futuro.cancel()
+        if reserva is not None:
+            reserva.liberar()
@@ -0,0 +1,89 @@
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from app.infrastructure.database.connection import (
+    buscar_boletos_candidatos,
+    obter_boleto_mais_recente,
+    obter_boleto_por_codigo,
+)
+from app.utils.comprovante_codigos import formas_do_codigo
+from app.utils.comprovante_validator import ReceiptDocument
+
+logger = logging.getLogger(__name__)
+
+
+# Pontos por evidência de que o comprovante pagou o boleto.
+PONTOS_VALOR = 10
+PONTOS_VENCIMENTO_ROTULADO = 5
+PONTOS_VENCIMENTO_NO_TEXTO = 2
+
+
+@dataclass
+class BoletoEncontrado:
+    """Boleto escolhido para o comprovante e as evidências que o apontaram."""
+    boleto: Dict
+    criterios: List[str] = field(default_factory=list)
+    pontuacao: int = 0
+
+
+def _vencimento(boleto: Dict) -> date:
+    return datetime.fromisoformat(boleto['data_vencimento']).date()
+
+
+def pontuar(boleto: Dict, documento: ReceiptDocument) -> BoletoEncontrado:
+    criterios, pontos = [], 0
+    valor = boleto.get('valor_total')
+    if valor is not None and any(abs(v - valor) < 0.005 for v in documento.valores):
+        criterios.append('valor')
+        pontos += PONTOS_VALOR
+
+    vencimento = _vencimento(boleto)
+    if documento.data_vencimento and documento.data_vencimento.date() == vencimento:
+        criterios.append('vencimento')
+        pontos += PONTOS_VENCIMENTO_ROTULADO
+    elif any(d.date() == vencimento for d in documento.datas):
+        criterios.append('data_no_texto')
+        pontos += PONTOS_VENCIMENTO_NO_TEXTO
+    return BoletoEncontrado(boleto, criterios, pontos)
+
+
+def encontrar_boleto(documento: ReceiptDocument, cpf: Optional[str]) -> Optional[BoletoEncontrado]:
+    """
+    Escolhe o boleto pago pelo comprovante.
+
+    1. Pela linha digitável lida (texto ou código de barras), que identifica
+       o boleto sozinha; sem CPF no comprovante, é o único caminho.
+    2. Entre os boletos pendentes do CPF com o mesmo valor ou vencimento,
+       o de maior pontuação (o mais recente em caso de empate).
+    3. Na falta de candidatos, o boleto mais recente do CPF, para que a
+       validação aponte a divergência como antes.
+    """
+    codigos = [forma for linha in documento.linhas_digitaveis for forma in formas_do_codigo(linha)]
+    if codigos:
+        boleto = obter_boleto_por_codigo(codigos)
+        if boleto and (cpf is None or boleto['cpf'] == cpf):
+            return BoletoEncontrado(boleto, ['linha_digitavel'])
+
+    if not cpf:
+        return None
+
+    candidatos = buscar_boletos_candidatos(
+        cpf,
+        valores=documento.valores,
+        vencimentos=[d.date() for d in documento.datas],
+    )
+    if candidatos:
+        # Candidatos já vêm do mais recente para o mais antigo; max() mantém
+        # o primeiro entre os empatados.
+        melhor = max((pontuar(b, documento) for b in candidatos), key=lambda e: e.pontuacao)
+        if len(candidatos) > 1:
+            logger.info(
+                f"{len(candidatos)} boletos pendentes candidatos para o CPF; escolhido "
+                f"{melhor.boleto['id_boleto']} ({', '.join(melhor.criterios) or 'sem evidências'})"
+            )
+        return melhor
+
+    boleto = obter_boleto_mais_recente(cpf)
+    return BoletoEncontrado(boleto) if boleto else None
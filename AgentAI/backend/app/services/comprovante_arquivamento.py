@@ -0,0 +1,67 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from app.core.config import AppConfig
+from app.infrastructure.database.connection import (
+    atualizar_caminhos_comprovantes,
+    listar_comprovantes_para_arquivar,
+)
+from app.utils.comprovante_storage import get_comprovante_storage
+
+logger = logging.getLogger(__name__)
+
+
+def arquivar_comprovantes(
+    dias: int = AppConfig.RECEIPT_ARCHIVE_AFTER_DAYS,
+    tamanho_lote: int = 1000,
+    simular: bool = False,
+    progresso: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """
+    Empacota em zips mensais os comprovantes recebidos há mais de `dias`.
+
+    Para cada lote: grava os zips (imutáveis, via arquivo temporário), aponta
+    os registros para eles em uma transação e só então remove os arquivos
+    soltos. Uma interrupção no meio deixa no máximo um zip órfão; os
+    registros continuam apontando para os arquivos soltos, que ainda existem.
+    """
+    storage = get_comprovante_storage()
+    corte = datetime.utcnow() - timedelta(days=dias)
+    resumo = {'arquivados': 0, 'ausentes': 0, 'bytes_empacotados': 0}
+
+    apos_id = None
+    while True:
+        linhas = listar_comprovantes_para_arquivar(corte, apos_id, tamanho_lote)
+        if not linhas:
+            break
+        apos_id = linhas[-1]['id_comprovante']
+
+        grupos = defaultdict(dict)
+        for linha in linhas:
+            if not storage.existe(linha['caminho_arquivo']):
+                resumo['ausentes'] += 1
+                continue
+            grupos[linha['recebido_em'].strftime('%Y-%m')][linha['id_comprovante']] = linha['caminho_arquivo']
+
+        for grupo, referencias in grupos.items():
+            tamanhos = {i: storage.tamanho(r) for i, r in referencias.items()}
+            if simular:
+                resumo['arquivados'] += len(referencias)
+                resumo['bytes_empacotados'] += sum(tamanhos.values())
+                continue
+
+            novas = storage.arquivar(grupo, referencias)
+            atualizar_caminhos_comprovantes(novas)
+            for id_comprovante in novas:
+                storage.remover(referencias[id_comprovante])
+            resumo['arquivados'] += len(novas)
+            resumo['bytes_empacotados'] += sum(tamanhos[i] for i in novas)
+
+        if progresso:
+            progresso(resumo)
+
+    if resumo['ausentes']:
+        logger.warning(f"{resumo['ausentes']} comprovante(s) sem arquivo no disco não foram arquivados")
+    return resumo
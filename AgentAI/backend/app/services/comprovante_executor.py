@@ -0,0 +1,186 @@
+import os
+import math
+import time
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+from app.core.config import AppConfig
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class FilaComprovantesCheia(Exception):
+    """Levantada quando não há vaga para processar mais um comprovante."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Fila de processamento de comprovantes cheia.")
+        self.retry_after = retry_after
+
+
+def inicializar_worker() -> None:
+    # Com start method "fork" o worker herda o pool de conexões do processo pai;
+    # descarta as conexões herdadas sem fechá-las para não afetar o pai.
+    try:
+        from app.infrastructure.database.connection import engine
+        engine.dispose(close=False)
+    except Exception:
+        pass
+
+
+def criar_executor(max_workers: int, start_method: str = AppConfig.OCR_POOL_START_METHOD) -> ProcessPoolExecutor:
+    """Pool de processos com o mesmo start method e inicialização dos workers de OCR."""
+    return ProcessPoolExecutor(
+        max_workers=max(1, max_workers),
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=inicializar_worker,
+    )
+
+
+def agrupar(itens: Iterable[T], tamanho: int) -> Iterator[List[T]]:
+    """Divide `itens` em listas de até `tamanho` elementos, sem ler tudo antes."""
+    bloco = []
+    for item in itens:
+        bloco.append(item)
+        if len(bloco) >= tamanho:
+            yield bloco
+            bloco = []
+    if bloco:
+        yield bloco
+
+
+def _executar_no_worker(fn: Callable, args: tuple) -> tuple:
+    from app.utils.ocr_cache import get_ocr_cache
+
+    inicio = time.perf_counter()
+    resultado = fn(*args)
+    duracao = time.perf_counter() - inicio
+    return resultado, duracao, os.getpid(), get_ocr_cache().estatisticas()
+
+
+class ComprovanteProcessPool:
+    """
+    Executa o processamento de comprovantes (PDF/OCR) em um pool de processos.
+
+    A quantidade de tarefas em andamento é limitada a `max_workers + tamanho_fila`;
+    acima disso `executar` falha imediatamente com FilaComprovantesCheia para que
+    a rota devolva 503 sem bloquear o event loop. Processamentos em lote usam
+    `aguardar_vaga=True` para esperar uma vaga em vez de falhar.
+    """
+
+    def __init__(self, max_workers: int, tamanho_fila: int, start_method: str = "spawn"):
+        self.max_workers = max(1, max_workers)
+        self.max_pendentes = self.max_workers + max(0, tamanho_fila)
+        self.start_method = start_method
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pendentes = 0
+        self._tempo_medio = 2.0
+        self._estatisticas_cache: Dict[int, Dict] = {}
+        self._vaga_liberada: Optional[asyncio.Condition] = None
+
+    def _obter_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = criar_executor(self.max_workers, self.start_method)
+            return self._executor
+
+    def _reservar(self) -> bool:
+        with self._lock:
+            if self._pendentes >= self.max_pendentes:
+                return False
+            self._pendentes += 1
+            return True
+
+    def _liberar(self) -> None:
+        with self._lock:
+            self._pendentes -= 1
+
+    def retry_after(self) -> int:
+        with self._lock:
+            rodadas = self._pendentes / self.max_workers
+            return max(1, math.ceil(rodadas * self._tempo_medio))
+
+    async def _aguardar_vaga(self) -> None:
+        if self._vaga_liberada is None:
+            self._vaga_liberada = asyncio.Condition()
+        async with self._vaga_liberada:
+            await self._vaga_liberada.wait_for(self._reservar)
+
+    async def _notificar_vaga(self) -> None:
+        if self._vaga_liberada is not None:
+            async with self._vaga_liberada:
+                self._vaga_liberada.notify()
+
+    async def executar(self, fn: Callable, *args: Any, aguardar_vaga: bool = False) -> Any:
+        if not self._reservar():
+            if not aguardar_vaga:
+                raise FilaComprovantesCheia(self.retry_after())
+            await self._aguardar_vaga()
+
+        try:
+            executor = self._obter_executor()
+            future = executor.submit(_executar_no_worker, fn, args)
+            resultado, duracao, pid, estatisticas = await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            logger.error("Pool de processamento de comprovantes quebrado; recriando")
+            self._descartar_executor()
+            raise
+        finally:
+            self._liberar()
+            await self._notificar_vaga()
+
+        with self._lock:
+            self._tempo_medio = 0.8 * self._tempo_medio + 0.2 * duracao
+            self._estatisticas_cache[pid] = estatisticas
+        return resultado
+
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            por_worker = list(self._estatisticas_cache.values())
+            pool = {
+                'workers': self.max_workers,
+                'max_pendentes': self.max_pendentes,
+                'pendentes': self._pendentes,
+                'tempo_medio_segundos': round(self._tempo_medio, 3),
+            }
+
+        cache = {}
+        for chave in ('hits_memoria', 'hits_disco', 'misses', 'segundos_ocr_economizados', 'itens_memoria'):
+            cache[chave] = round(sum(e.get(chave) or 0 for e in por_worker), 3)
+        hits = cache['hits_memoria'] + cache['hits_disco']
+        total = hits + cache['misses']
+        cache['taxa_acerto'] = round(hits / total, 4) if total else 0.0
+        return {'pool': pool, 'cache_ocr': cache}
+
+    def _descartar_executor(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def encerrar(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool_instance = None
+
+def get_comprovante_pool() -> ComprovanteProcessPool:
+    global _pool_instance
+    if _pool_instance is None:
+        _pool_instance = ComprovanteProcessPool(
+            max_workers=AppConfig.OCR_WORKERS,
+            tamanho_fila=AppConfig.OCR_QUEUE_SIZE,
+            start_method=AppConfig.OCR_POOL_START_METHOD,
+        )
+    return _pool_instance
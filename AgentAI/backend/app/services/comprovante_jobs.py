@@ -0,0 +1,171 @@
+import os
+import json
+import uuid
+import logging
+import threading
+import urllib.request
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.core.config import AppConfig
+from app.infrastructure.database.connection import (
+    criar_job_comprovante,
+    reservar_job_comprovante,
+    concluir_job_comprovante,
+    falhar_job_comprovante,
+)
+from app.services.comprovante_service import (
+    processar_comprovante,
+    cpf_diverge,
+    detalhe_cpf_divergente,
+    descartar_comprovante,
+)
+
+logger = logging.getLogger(__name__)
+
+
+PENDENTES_DIR = AppConfig.COMPROVANTES_PENDENTES_DIR
+PENDENTES_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def enfileirar_comprovante(
+    conteudo: bytes,
+    extensao: str,
+    original_filename: str,
+    session_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    cpf_esperado: Optional[str] = None
+) -> Dict:
+    """Grava o arquivo na área de pendentes e cria o job de validação."""
+    id_job = str(uuid.uuid4())
+    destino = PENDENTES_DIR / f"{id_job}{extensao}"
+    destino.write_bytes(conteudo)
+
+    try:
+        return criar_job_comprovante(
+            file_path=str(destino),
+            original_name=original_filename,
+            session_id=session_id,
+            user_id=user_id,
+            cpf_esperado=cpf_esperado,
+            max_tentativas=AppConfig.RECEIPT_JOBS_MAX_ATTEMPTS,
+            id_job=id_job
+        )
+    except Exception:
+        os.unlink(destino)
+        raise
+
+
+def processar_job(job: Dict) -> Dict:
+    """
+    Executa a validação de um job. O arquivo pendente é preservado até o job
+    ser concluído, para que uma nova tentativa encontre o original.
+    """
+    origem = Path(job['caminho_arquivo'])
+    if not origem.exists():
+        raise FileNotFoundError(f"Arquivo do job não encontrado: {origem}")
+
+    resultado = processar_comprovante(origem.read_bytes(), origem.suffix, job['nome_original'], validar=True)
+    if resultado is None:
+        raise RuntimeError("Erro ao processar comprovante.")
+
+    cpf_comprovante = resultado.get('cpf_identificado')
+    if 'erro' not in resultado and cpf_diverge(job.get('cpf_esperado'), cpf_comprovante):
+        descartar_comprovante(resultado)
+        detalhe = detalhe_cpf_divergente(job['cpf_esperado'], cpf_comprovante)
+        resultado = {
+            'erro': detalhe['code'],
+            'mensagem': detalhe['message'],
+            'detalhes': detalhe
+        }
+
+    return json.loads(json.dumps(resultado, default=str))
+
+
+def _mensagem_para_agente(job: Dict, resultado: Dict) -> str:
+    if 'erro' not in resultado:
+        cpf = resultado.get('cpf_identificado', '')
+        valor = resultado.get('valor_boleto') or 0.0
+        return f"[SISTEMA] Comprovante recebido com sucesso. CPF: {cpf}, Valor: R$ {valor:.2f}"
+    return f"[SISTEMA] O comprovante enviado não foi aceito ({resultado['erro']}): {resultado.get('mensagem', '')}"
+
+
+def notificar_sessao(job: Dict, resultado: Dict) -> None:
+    """Envia o resultado da validação para a sessão do agente, se configurado."""
+    if not AppConfig.RECEIPT_JOBS_NOTIFY_URL or not job.get('session_id'):
+        return
+
+    payload = json.dumps({
+        "message": _mensagem_para_agente(job, resultado),
+        "session_id": job['session_id'],
+        "user_id": job.get('user_id'),
+    }).encode('utf-8')
+    request = urllib.request.Request(
+        f"{AppConfig.RECEIPT_JOBS_NOTIFY_URL.rstrip('/')}/chat",
+        data=payload,
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+    except Exception as e:
+        logger.warning(f"Não foi possível notificar a sessão {job['session_id']}: {e}")
+
+
+def _remover_arquivos_do_job(job: Dict) -> None:
+    try:
+        Path(job['caminho_arquivo']).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _encerrar_job_falho(job: Dict) -> None:
+    """Job em FAILED: o arquivo pendente não terá nova tentativa."""
+    _remover_arquivos_do_job(job)
+    notificar_sessao(job, {
+        'erro': 'PROCESSAMENTO_FALHOU',
+        'mensagem': 'Não foi possível processar o comprovante.'
+    })
+
+
+def executar_worker(worker_id: str, parar: threading.Event) -> None:
+    """Loop do worker: reserva, processa e conclui jobs até `parar` ser sinalizado."""
+    logger.info(f"Worker de comprovantes {worker_id} iniciado")
+
+    while not parar.is_set():
+        try:
+            job = reservar_job_comprovante(worker_id, AppConfig.RECEIPT_JOBS_VISIBILITY_TIMEOUT)
+        except Exception as e:
+            logger.error(f"Erro ao reservar job: {e}")
+            parar.wait(AppConfig.RECEIPT_JOBS_POLL_INTERVAL)
+            continue
+
+        if not job:
+            parar.wait(AppConfig.RECEIPT_JOBS_POLL_INTERVAL)
+            continue
+
+        if job['status'] == 'FAILED':
+            # Prazo de visibilidade expirado sem tentativas restantes.
+            logger.error(f"Job {job['id_job']} esgotou as tentativas: {job['ultimo_erro']}")
+            _encerrar_job_falho(job)
+            continue
+
+        try:
+            resultado = processar_job(job)
+        except Exception as e:
+            logger.error(f"Erro no job {job['id_job']} (tentativa {job['tentativas']}): {e}", exc_info=True)
+            status = falhar_job_comprovante(
+                job['id_job'], worker_id, str(e), AppConfig.RECEIPT_JOBS_RETRY_BACKOFF
+            )
+            if status == 'FAILED':
+                _encerrar_job_falho(job)
+            continue
+
+        if concluir_job_comprovante(job['id_job'], worker_id, resultado):
+            _remover_arquivos_do_job(job)
+            notificar_sessao(job, resultado)
+        else:
+            logger.warning(f"Job {job['id_job']} expirou antes da conclusão; resultado descartado")
+
+    logger.info(f"Worker de comprovantes {worker_id} encerrado")
@@ -0,0 +1,186 @@
+import os
+import json
+import asyncio
+import logging
+import zipfile
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import AppConfig
+from app.services.comprovante_executor import get_comprovante_pool
+from app.services.comprovante_service import processar_comprovante
+from app.utils.upload_spool import EXTENSOES_COMPROVANTE, UploadRejeitado, gravar_spool, ler_upload
+
+logger = logging.getLogger(__name__)
+
+
+Fonte = Tuple[str, Optional[str], Optional[str]]
+
+# (nome, (conteúdo, extensão), erro) de cada comprovante do lote.
+Entrada = Tuple[str, Optional[Tuple[bytes, str]], Optional[str]]
+
+
+def _iterar_entradas(
+    fontes: List[Fonte],
+    limite_bytes: int,
+    limite_atingido: Callable[[], bool] = lambda: False
+) -> Iterator[Entrada]:
+    """
+    Percorre os arquivos recebidos (ZIPs são abertos entrada a entrada) e
+    produz (nome, (conteúdo, extensão), erro). Cada entrada só é lida para a
+    memória quando o consumidor pede a próxima; nada é extraído em disco.
+    Depois que `limite_atingido()` fica verdadeiro, as entradas restantes
+    saem com o erro LIMITE_LOTE, sem serem lidas.
+    """
+    for nome, caminho, erro in fontes:
+        if erro:
+            yield nome, None, 'LIMITE_LOTE' if limite_atingido() else erro
+            continue
+        if Path(caminho).suffix != '.zip':
+            try:
+                if limite_atingido():
+                    yield nome, None, 'LIMITE_LOTE'
+                elif os.path.getsize(caminho) > limite_bytes:
+                    yield nome, None, 'ARQUIVO_MUITO_GRANDE'
+                else:
+                    yield nome, (Path(caminho).read_bytes(), Path(caminho).suffix), None
+            finally:
+                os.unlink(caminho)
+            continue
+
+        try:
+            with zipfile.ZipFile(caminho) as zf:
+                for info in zf.infolist():
+                    if info.is_dir():
+                        continue
+                    if limite_atingido():
+                        yield info.filename, None, 'LIMITE_LOTE'
+                        continue
+                    # O tipo real vem dos magic bytes em ler_upload; o nome só filtra de antemão.
+                    extensao = Path(info.filename).suffix.lower().replace('.jpeg', '.jpg')
+                    if extensao not in EXTENSOES_COMPROVANTE:
+                        yield info.filename, None, 'FORMATO_INVALIDO'
+                        continue
+                    if info.file_size > limite_bytes:
+                        yield info.filename, None, 'ARQUIVO_MUITO_GRANDE'
+                        continue
+                    try:
+                        with zf.open(info) as origem:
+                            lido = ler_upload(origem, limite_bytes)
+                    except UploadRejeitado as e:
+                        yield info.filename, None, e.codigo
+                    else:
+                        yield info.filename, lido, None
+        except zipfile.BadZipFile:
+            yield nome, None, 'ZIP_INVALIDO'
+        finally:
+            os.unlink(caminho)
+
+
+def _linha_resultado(nome: str, resultado: Optional[Dict], erro: Optional[str] = None) -> Dict:
+    if erro:
+        return {'arquivo': nome, 'status': 'ERRO', 'codigo': erro}
+    if not resultado:
+        return {'arquivo': nome, 'status': 'ERRO', 'codigo': 'ERRO_PROCESSAMENTO'}
+    if 'erro' in resultado:
+        return {
+            'arquivo': nome,
+            'status': 'REJEITADO',
+            'codigo': resultado['erro'],
+            'mensagem': resultado.get('mensagem')
+        }
+    return {
+        'arquivo': nome,
+        'status': 'ACEITO',
+        'cpf_identificado': resultado.get('cpf_identificado'),
+        'valor_boleto': resultado.get('valor_boleto'),
+        'registro_id': resultado.get('registro_id'),
+        'duplicado': resultado.get('duplicado', False),
+        'similar_a': resultado.get('similar_a')
+    }
+
+
+async def _processar_entrada(nome: str, conteudo: bytes, extensao: str) -> Dict:
+    try:
+        resultado = await get_comprovante_pool().executar(
+            processar_comprovante, conteudo, extensao, nome, True, aguardar_vaga=True
+        )
+    except Exception as e:
+        logger.error(f"Erro ao processar {nome} do lote: {e}")
+        resultado = None
+    return _linha_resultado(nome, resultado)
+
+
+async def processar_lote(fontes: List[Fonte]) -> AsyncIterator[str]:
+    """
+    Valida os comprovantes em paralelo no pool de processos e produz uma linha
+    NDJSON por arquivo assim que ele termina, seguida de uma linha de resumo.
+    Arquivos além de RECEIPT_BATCH_MAX_FILES não são processados: cada um
+    recebe uma linha ERRO/LIMITE_LOTE e o resumo traz `truncado` e
+    `ignorados`.
+    """
+    pool = get_comprovante_pool()
+    limite_em_andamento = pool.max_workers
+    limite_bytes = AppConfig.RECEIPT_MAX_BYTES
+    admitidas = 0
+    entradas = _iterar_entradas(fontes, limite_bytes, lambda: admitidas >= AppConfig.RECEIPT_BATCH_MAX_FILES)
+    pendentes = set()
+    resumo = {'total': 0, 'ACEITO': 0, 'REJEITADO': 0, 'ERRO': 0, 'truncado': False, 'ignorados': 0}
+
+    def registrar(linha: Dict) -> str:
+        resumo['total'] += 1
+        resumo[linha['status']] += 1
+        return json.dumps(linha, ensure_ascii=False, default=str) + '\n'
+
+    try:
+        while True:
+            entrada = await asyncio.to_thread(next, entradas, None)
+            if entrada is None:
+                break
+            nome, lido, erro = entrada
+            if erro == 'LIMITE_LOTE':
+                resumo['truncado'] = True
+                resumo['ignorados'] += 1
+            else:
+                admitidas += 1
+            if erro:
+                yield registrar(_linha_resultado(nome, None, erro))
+                continue
+
+            pendentes.add(asyncio.create_task(_processar_entrada(nome, *lido)))
+            if len(pendentes) >= limite_em_andamento:
+                concluidas, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+                for tarefa in concluidas:
+                    yield registrar(tarefa.result())
+
+        while pendentes:
+            concluidas, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+            for tarefa in concluidas:
+                yield registrar(tarefa.result())
+
+        yield json.dumps({'resumo': resumo}, ensure_ascii=False) + '\n'
+    finally:
+        for tarefa in pendentes:
+            tarefa.cancel()
+        await asyncio.to_thread(_descartar_restantes, entradas, fontes)
+
+
+def _descartar_restantes(entradas: Iterator, fontes: List[Fonte]) -> None:
+    try:
+        entradas.close()
+    except ValueError:
+        pass
+    for _, caminho, _ in fontes:
+        if caminho and os.path.exists(caminho):
+            os.unlink(caminho)
+
+
+def salvar_fonte_temporaria(arquivo, nome: str) -> Fonte:
+    """
+    Grava um upload do lote no spool. ZIPs não têm limite de tamanho aqui;
+    o limite vale para cada comprovante, conferido ao processá-lo.
+    """
+    try:
+        return nome, gravar_spool(arquivo, extensoes=EXTENSOES_COMPROVANTE | {'.zip'}), None
+    except UploadRejeitado as e:
+        return nome, None, e.codigo
@@ -0,0 +1,197 @@
+import os
+import json
+import logging
+from collections import deque
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.core.config import AppConfig
+from app.infrastructure.database.connection import gravar_revalidacoes, iterar_comprovantes_para_revalidacao
+from app.services.comprovante_executor import agrupar, criar_executor
+
+logger = logging.getLogger(__name__)
+
+
+CHECKPOINT_DIR = AppConfig.REVALIDACAO_DIR
+
+
+@dataclass
+class Checkpoint:
+    """
+    Progresso de uma execução. `ultimo_id` é o maior id já gravado: as linhas
+    são lidas em ordem de id e gravadas na mesma ordem, então retomar a partir
+    dele não pula nem repete comprovantes.
+    """
+    execucao: str
+    ultimo_id: Optional[str] = None
+    processados: int = 0
+    validos: int = 0
+    invalidos: int = 0
+    alterados: int = 0
+    erros: int = 0
+    iniciado_em: str = ''
+    atualizado_em: str = ''
+    concluido: bool = False
+
+    @classmethod
+    def carregar(cls, caminho: Path, execucao: str) -> 'Checkpoint':
+        try:
+            return cls(**json.loads(Path(caminho).read_text(encoding='utf-8')))
+        except FileNotFoundError:
+            return cls(execucao=execucao, iniciado_em=datetime.utcnow().isoformat())
+
+    def salvar(self, caminho: Path) -> None:
+        self.atualizado_em = datetime.utcnow().isoformat()
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_suffix('.tmp')
+        temporario.write_text(json.dumps(asdict(self), ensure_ascii=False, indent=2), encoding='utf-8')
+        os.replace(temporario, caminho)
+
+
+def revalidar_comprovante(validator, storage, linha: Dict, execucao: str) -> Dict:
+    """
+    Revalida um comprovante com as regras atuais. Usa o texto persistido
+    quando existe; senão extrai do arquivo, solto ou arquivado em zip.
+    Retorna o veredito e as colunas a gravar.
+    """
+    extracao_anterior = linha.get('extracao') or {}
+    validacao_anterior = extracao_anterior.get('validacao') or {}
+    atualizacao = {'id': linha['id_comprovante']}
+
+    texto = linha.get('texto_ocr')
+    if texto:
+        documento = validator.interpretar_texto(texto, linha['caminho_arquivo'])
+    elif storage.existe(linha['caminho_arquivo']):
+        caminho = linha['caminho_arquivo']
+        documento = validator.extrair_documento_bytes(storage.ler(caminho), Path(caminho).suffix, caminho)
+        # Comprovantes anteriores à persistência da extração ganham os campos.
+        atualizacao['ocrText'] = documento.texto
+        atualizacao['payerCpf'] = documento.cpf
+        atualizacao['paymentDate'] = documento.data_pagamento
+    else:
+        return {'id_comprovante': linha['id_comprovante'], 'erro': 'ARQUIVO_NAO_ENCONTRADO'}
+
+    criterios = (extracao_anterior.get('boleto') or {}).get('criterios') or []
+    validacao = validator.validar_comprovante(
+        documento,
+        cpf_esperado=documento.cpf or linha['cpf'],
+        valor_esperado=linha['valor_total'],
+        linha_digitavel_esperada=linha['linha_digitavel'] if 'linha_digitavel' in criterios else None,
+        data_vencimento_esperada=linha['data_vencimento'],
+        referencia=linha['recebido_em']
+    )
+    detalhes = validacao.get('detalhes') or {}
+
+    extracao = dict(extracao_anterior) if extracao_anterior else documento.campos()
+    extracao['validacao'] = {
+        'valido': validacao['valido'],
+        'score': detalhes.get('score'),
+        'validacoes': detalhes.get('validacoes'),
+        'valido_anterior': validacao_anterior.get('valido'),
+        'execucao': execucao,
+        'revalidado_em': datetime.utcnow().isoformat(),
+    }
+    atualizacao['extraction'] = extracao
+
+    return {
+        'id_comprovante': linha['id_comprovante'],
+        'valido': validacao['valido'],
+        'valido_anterior': validacao_anterior.get('valido'),
+        'atualizacao': atualizacao,
+    }
+
+
+def revalidar_lote(linhas: List[Dict], execucao: str) -> List[Dict]:
+    """Executado nos processos do pool: revalida um lote, na ordem recebida."""
+    from app.utils.comprovante_validator import get_validator
+    from app.utils.comprovante_storage import get_comprovante_storage
+
+    validator = get_validator()
+    storage = get_comprovante_storage()
+    resultados = []
+    for linha in linhas:
+        try:
+            resultados.append(revalidar_comprovante(validator, storage, linha, execucao))
+        except Exception as e:
+            logger.error(f"Erro ao revalidar comprovante {linha['id_comprovante']}: {e}")
+            resultados.append({'id_comprovante': linha['id_comprovante'], 'erro': str(e)})
+    return resultados
+
+
+def executar_revalidacao(
+    execucao: str,
+    workers: int = AppConfig.OCR_WORKERS,
+    tamanho_lote: int = 50,
+    tamanho_escrita: int = 1000,
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None,
+    simular: bool = False,
+    reiniciar: bool = False,
+    progresso: Optional[Callable[[Checkpoint], None]] = None
+) -> Checkpoint:
+    """
+    Revalida os comprovantes armazenados, retomando do checkpoint da execução.
+
+    As linhas chegam por um cursor do servidor, vão em lotes para um pool de
+    processos (no máximo 2 lotes por processo em andamento) e os vereditos
+    são gravados a cada `tamanho_escrita` comprovantes em uma única transação;
+    o checkpoint só avança depois da gravação. Com `simular`, nada é gravado
+    no banco nem no checkpoint.
+    """
+    caminho_checkpoint = CHECKPOINT_DIR / f"{execucao}.json"
+    if reiniciar and caminho_checkpoint.exists():
+        caminho_checkpoint.unlink()
+    checkpoint = Checkpoint.carregar(caminho_checkpoint, execucao)
+    if checkpoint.concluido:
+        logger.info(f"Execução {execucao} já concluída; use reiniciar para repetir")
+        return checkpoint
+
+    pendentes_gravacao: List[Dict] = []
+
+    def gravar() -> None:
+        if not pendentes_gravacao:
+            return
+        if not simular:
+            gravar_revalidacoes([r['atualizacao'] for r in pendentes_gravacao if 'atualizacao' in r])
+        for resultado in pendentes_gravacao:
+            checkpoint.processados += 1
+            if 'erro' in resultado:
+                checkpoint.erros += 1
+                continue
+            if resultado['valido']:
+                checkpoint.validos += 1
+            else:
+                checkpoint.invalidos += 1
+            if resultado['valido_anterior'] is not None and resultado['valido_anterior'] != resultado['valido']:
+                checkpoint.alterados += 1
+        checkpoint.ultimo_id = pendentes_gravacao[-1]['id_comprovante']
+        pendentes_gravacao.clear()
+        if not simular:
+            checkpoint.salvar(caminho_checkpoint)
+        if progresso:
+            progresso(checkpoint)
+
+    linhas = iterar_comprovantes_para_revalidacao(checkpoint.ultimo_id, desde, ate, tamanho_escrita)
+    workers = max(1, workers)
+    with criar_executor(workers) as executor:
+        # Resultados consumidos na ordem de envio: o checkpoint segue a ordem de id.
+        em_andamento = deque()
+        for lote in agrupar(linhas, tamanho_lote):
+            em_andamento.append(executor.submit(revalidar_lote, lote, execucao))
+            while len(em_andamento) >= workers * 2:
+                pendentes_gravacao.extend(em_andamento.popleft().result())
+                if len(pendentes_gravacao) >= tamanho_escrita:
+                    gravar()
+        while em_andamento:
+            pendentes_gravacao.extend(em_andamento.popleft().result())
+            if len(pendentes_gravacao) >= tamanho_escrita:
+                gravar()
+        gravar()
+
+    checkpoint.concluido = True
+    if not simular:
+        checkpoint.salvar(caminho_checkpoint)
+    return checkpoint
@@ -1,19 +1,22 @@
-import uuid
 import re
+import hashlib
 import logging
-from app.infrastructure.database.connection import registrar_comprovante, listar_boletos
+from app.infrastructure.database.connection import (
+    registrar_comprovante,
+    obter_comprovante_por_hash,
+    buscar_comprovantes_similares,
+)
+from app.services.boleto_matcher import encontrar_boleto
 from app.utils.comprovante_validator import get_validator
 from app.utils.cpfValidate import validar_cpf
+from app.utils.perceptual_hash import hash_perceptual_bytes
+from app.utils.comprovante_storage import get_comprovante_storage
 from app.core.config import AppConfig
 from backend.app.utils.verifyDueDate import verificar_data_vencimento
 
 logger = logging.getLogger(__name__)
 
 
-UPLOAD_DIR = AppConfig.COMPROVANTES_DIR
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
-
 def secure_filename(filename: str) -> str:
     filename = filename.replace('\\', '_').replace('/', '_')
     filename = re.sub(r'[^\w\s.-]', '', filename)
@@ -21,27 +24,131 @@ def secure_filename(filename: str) -> str:
     return filename.strip('._')
 
 
+def cpf_diverge(cpf_sessao: str | None, cpf_comprovante: str | None) -> bool:
+    if not cpf_sessao or not cpf_comprovante:
+        return False
+    return ''.join(filter(str.isdigit, cpf_sessao)) != ''.join(filter(str.isdigit, cpf_comprovante))
+
+
+def detalhe_cpf_divergente(cpf_sessao: str, cpf_comprovante: str) -> dict:
+    cpf_sessao_limpo = ''.join(filter(str.isdigit, cpf_sessao))
+    cpf_comprovante_limpo = ''.join(filter(str.isdigit, cpf_comprovante))
+    return {
+        "message": f"ATENÇÃO: Este comprovante pertence ao CPF ***{cpf_comprovante_limpo[-3:]} (terminação {cpf_comprovante_limpo[-3:]}), mas você está negociando a dívida do CPF ***{cpf_sessao_limpo[-3:]} (terminação {cpf_sessao_limpo[-3:]}). Por favor, envie o comprovante CORRETO da SUA negociação.",
+        "code": "CPF_MISMATCH",
+        "cpf_esperado": f"***{cpf_sessao_limpo[-3:]}",
+        "cpf_recebido": f"***{cpf_comprovante_limpo[-3:]}"
+    }
+
+
+def calcular_hash_arquivo(caminho: str) -> str:
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(64 * 1024), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def calcular_hash_conteudo(conteudo: bytes) -> str:
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+def _resultado_duplicado(anterior: dict) -> dict:
+    return {
+        'cpf_identificado': anterior['cpf'],
+        'valor_boleto': anterior['valor_total'],
+        'arquivo_salvo': anterior['caminho_arquivo'],
+        'registro_id': anterior['id_comprovante'],
+        'duplicado': True
+    }
+
+
+def _montar_extracao(documento, encontrado, validacao: dict | None) -> dict:
+    """Resultado estruturado persistido com o comprovante (coluna JSONB)."""
+    extracao = {
+        **documento.campos(),
+        'boleto': {'criterios': encontrado.criterios, 'pontuacao': encontrado.pontuacao},
+    }
+    if validacao:
+        detalhes = validacao.get('detalhes') or {}
+        extracao['validacao'] = {
+            'valido': validacao['valido'],
+            'score': detalhes.get('score'),
+            'validacoes': detalhes.get('validacoes'),
+        }
+    return extracao
+
+
+def descartar_comprovante(resultado: dict) -> None:
+    """Remove o arquivo salvo e o registro de um comprovante já aceito."""
+    if resultado.get('duplicado'):
+        # O registro pertence ao envio original; nada a remover.
+        return
+    try:
+        arquivo_salvo = resultado.get('arquivo_salvo')
+        if arquivo_salvo:
+            get_comprovante_storage().remover(arquivo_salvo)
+        
+        registro_id = resultado.get('registro_id')
+        if registro_id:
+            from app.infrastructure.database.connection import SessionLocal
+            from app.domain.models.database_models import Receipt
+            session = SessionLocal()
+            try:
+                receipt = session.query(Receipt).filter_by(id=registro_id).first()
+                if receipt:
+                    session.delete(receipt)
+                    session.commit()
+            finally:
+                session.close()
+    except Exception as cleanup_error:
+        logger.error(f"Erro ao limpar arquivo/registro: {cleanup_error}")
+
+
 def processar_comprovante_from_path(temp_path: str, original_filename: str, validar: bool = True) -> dict | None:
+    """Lê o arquivo para a memória, remove-o e processa o conteúdo."""
     from pathlib import Path
     import os
     
-    temp_path_obj = Path(temp_path)
-    
     try:
+        conteudo = Path(temp_path).read_bytes()
+    except OSError as e:
+        logger.error(f"Erro ao ler comprovante: {e}")
+        return None
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+    return processar_comprovante(conteudo, Path(temp_path).suffix, original_filename, validar)
+
+
+def processar_comprovante(conteudo: bytes, extensao: str, original_filename: str, validar: bool = True) -> dict | None:
+    """
+    Processa um comprovante a partir dos bytes. Nada é gravado em disco até
+    o comprovante ser aceito; `extensao` vem dos magic bytes do upload.
+    """
+    try:
+        content_hash = calcular_hash_conteudo(conteudo)
+        anterior = obter_comprovante_por_hash(content_hash)
+        if anterior:
+            # Mesmo arquivo já aceito: reaproveita a decisão sem OCR nem novo registro.
+            return _resultado_duplicado(anterior)
+        
         validator = get_validator()
 
-        try:
-            texto_extraido = validator.extrair_texto(str(temp_path_obj)) or ''
-        except Exception:
-            texto_extraido = ''
+        documento = validator.extrair_documento_bytes(conteudo, extensao, original_filename)
 
-        cpf_extraido = validator.extrair_cpf_do_comprovante(str(temp_path_obj))
-        data_pagamento = validator.extrair_data_do_pagamento(str(temp_path_obj))
-        data_vencimento_doc = validator.extrair_data_de_vencimento(str(temp_path_obj))
+        cpf_extraido = documento.cpf
+        data_pagamento = documento.data_pagamento
+        data_vencimento_doc = documento.data_vencimento
+
+        # A linha digitável (lida do código de barras ou do texto) identifica o
+        # boleto diretamente, mesmo quando o OCR não encontrou o CPF.
+        encontrado = encontrar_boleto(documento, cpf_extraido)
+        if encontrado and not cpf_extraido:
+            cpf_extraido = encontrado.boleto['cpf']
 
         if not cpf_extraido:
-            texto_debug = texto_extraido[:500] if texto_extraido else ''
-            os.unlink(temp_path)
+            texto_debug = documento.texto[:500]
 
             if not validator.tesseract_available:
                 return {
@@ -61,29 +168,24 @@ def processar_comprovante_from_path(temp_path: str, original_filename: str, vali
             }
 
         if not validar_cpf(cpf_extraido):
-            os.unlink(temp_path)
             return {
                 'erro': 'CPF_INVALIDO',
                 'mensagem': f'O CPF extraído ({cpf_extraido}) é inválido.'
             }
 
-        boletos = listar_boletos(cpf=cpf_extraido)
-
-        if not boletos:
-            os.unlink(temp_path)
+        if not encontrado:
             return {
                 'erro': 'SEM_BOLETO',
                 'mensagem': f'Não encontramos boletos cadastrados para o CPF {cpf_extraido}.'
             }
 
-        boleto = boletos[0]
+        boleto = encontrado.boleto
         valor_boleto = boleto.get('valor_total') or boleto.get('valor', 0.0)
         data_vencimento_boleto = boleto.get('data_vencimento')
 
         try:
             if data_vencimento_doc:
                 if data_pagamento and data_pagamento.date() > data_vencimento_doc.date():
-                    os.unlink(temp_path)
                     dias_atraso = (data_pagamento.date() - data_vencimento_doc.date()).days
                     return {
                         'erro': 'BOLETO_VENCIDO',
@@ -112,7 +214,6 @@ def processar_comprovante_from_path(temp_path: str, original_filename: str, vali
 
                 if banco_dt:
                     if data_vencimento_doc.date() != banco_dt.date():
-                        os.unlink(temp_path)
                         return {
                             'erro': 'VENCIMENTO_DIVERGENTE',
                             'mensagem': f'Data de vencimento no documento ({data_vencimento_doc.strftime("%d/%m/%Y")}) diverge da data cadastrada ({banco_dt.strftime("%d/%m/%Y")}).'
@@ -120,7 +221,6 @@ def processar_comprovante_from_path(temp_path: str, original_filename: str, vali
 
             venc_ok = verificar_data_vencimento(boleto.get('data_vencimento'), data_pagamento)
             if not venc_ok:
-                os.unlink(temp_path)
                 return {
                     'erro': 'BOLETO_VENCIDO',
                     'mensagem': f'O boleto associado ao CPF {cpf_extraido} está vencido. Pagamento com atraso não é permitido.'
@@ -128,49 +228,84 @@ def processar_comprovante_from_path(temp_path: str, original_filename: str, vali
         except Exception:
             logger.exception("Erro ao verificar data de vencimento do comprovante")
         
+        validacao = None
         if validar:
             validacao = validator.validar_comprovante(
-                caminho_arquivo=str(temp_path_obj),
+                documento,
                 cpf_esperado=cpf_extraido,
                 valor_esperado=valor_boleto,
+                linha_digitavel_esperada=boleto['linha_digitavel'] if 'linha_digitavel' in encontrado.criterios else None,
                 data_vencimento_esperada=data_vencimento_boleto
             )
 
             if not validacao['valido']:
-                os.unlink(temp_path)
                 return {
                     'erro': 'VALIDACAO_FALHOU',
                     'mensagem': f"Comprovante inválido. {validacao.get('mensagem', '')}",
                     'detalhes': validacao.get('detalhes')
                 }
         
-        filename = secure_filename(original_filename)
-        final_name = f"{cpf_extraido}_{uuid.uuid4()}_{filename}"
-        final_path = UPLOAD_DIR / final_name
+        boleto_id = boleto.get('id_boleto')
+        perceptual_hash, similar = None, None
+        if AppConfig.RECEIPT_NEAR_DUPLICATES in ('flag', 'reject'):
+            perceptual_hash = hash_perceptual_bytes(conteudo, extensao)
+            if perceptual_hash:
+                similares = buscar_comprovantes_similares(perceptual_hash, AppConfig.RECEIPT_PHASH_MAX_DISTANCE)
+                similar = similares[0] if similares else None
+        
+        if similar:
+            if similar['id_boleto'] == boleto_id:
+                # Recorte/recompressão de um comprovante já aceito para o mesmo boleto.
+                return _resultado_duplicado(similar)
+            
+            logger.warning(
+                f"Comprovante parecido com {similar['id_comprovante']} (distância {similar['distancia']}) "
+                f"de outro boleto"
+            )
+            if AppConfig.RECEIPT_NEAR_DUPLICATES == 'reject':
+                return {
+                    'erro': 'COMPROVANTE_SIMILAR',
+                    'mensagem': 'Este comprovante é muito parecido com um comprovante já enviado para outro boleto.',
+                    'detalhes': {'distancia': similar['distancia']}
+                }
         
-        import shutil
-        shutil.move(temp_path, str(final_path))
+        # Única escrita em disco do processamento: só comprovantes aceitos.
+        final_path = get_comprovante_storage().salvar(conteudo, content_hash, extensao)
         
-        boleto_id = boleto.get('id_boleto')
         registro = registrar_comprovante(
             boleto_id=boleto_id,
-            file_path=str(final_path),
-            original_name=original_filename
+            file_path=final_path,
+            original_name=original_filename,
+            content_hash=content_hash,
+            perceptual_hash=perceptual_hash,
+            similar_a=similar,
+            cpf_pagador=cpf_extraido,
+            valor_pago=next((v for v in documento.valores if valor_boleto and abs(v - valor_boleto) < 0.005), None),
+            data_pagamento=data_pagamento,
+            texto_ocr=documento.texto,
+            extracao=_montar_extracao(documento, encontrado, validacao)
         )
         
+        if registro and registro.get('duplicado'):
+            # Envio concorrente do mesmo arquivo: com o mesmo hash, o caminho
+            # costuma ser o do registro original e o arquivo fica onde está.
+            if registro['caminho_arquivo'] != final_path:
+                get_comprovante_storage().remover(final_path)
+            return _resultado_duplicado(registro)
+        
         return {
             'cpf_identificado': cpf_extraido,
             'valor_boleto': valor_boleto,
-            'arquivo_salvo': str(final_path),
-            'registro_id': registro.get('id_comprovante') if registro else None
+            'arquivo_salvo': final_path,
+            'registro_id': registro.get('id_comprovante') if registro else None,
+            'similar_a': {
+                'registro_id': similar['id_comprovante'],
+                'distancia': similar['distancia']
+            } if similar else None
         }
         
     except Exception as e:
         logger.error(f"Erro ao processar comprovante: {e}", exc_info=True)
-        
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
-        
         return None
 
 
@@ -0,0 +1,202 @@
+import zlib
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.graphics.barcode import code128
+
+
+NOME_BENEFICIARIO_PADRAO = "Empresa Exemplo"
+OBSERVACAO_PADRAO = "Boleto gerado para fins de teste (fictício)."
+INSTRUCOES = "Instruções: Este é um boleto fictício gerado para testes. Não possui validade bancária."
+PREFIXO_DOCUMENTO = "Documento: Boleto Fictício  •  ID: "
+
+LARGURA, ALTURA = A4
+MARGEM_ESQUERDA = 15 * mm
+MARGEM_DIREITA = 15 * mm
+TOPO = ALTURA - 20 * mm
+RODAPE = 30 * mm
+Y_CPF = TOPO - 36
+Y_VENCIMENTO = Y_CPF - 14
+Y_VALOR = Y_VENCIMENTO - 14
+Y_OBSERVACAO = Y_VALOR - 20
+Y_LINHA_DIGITAVEL = Y_OBSERVACAO - 26
+ALTURA_BARRAS = 20 * mm
+Y_BARRAS = Y_LINHA_DIGITAVEL - 26 - ALTURA_BARRAS
+
+# Recurso de fonte no PDF -> fonte padrão (Type1, sem embutir).
+FONTES = {'F1': 'Helvetica', 'F2': 'Helvetica-Bold', 'F3': 'Helvetica-Oblique'}
+_RECURSO = {fonte: recurso for recurso, fonte in FONTES.items()}
+
+CINZA = b"0.501961 0.501961 0.501961"
+
+
+def _num(valor: float) -> bytes:
+    return (f"{valor:.3f}".rstrip('0').rstrip('.') or '0').encode('ascii')
+
+
+def _string_pdf(texto: str) -> bytes:
+    dados = texto.encode('cp1252', errors='replace')
+    return b'(' + dados.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _texto(fonte: str, tamanho: float, x: float, y: float, texto: str) -> bytes:
+    return b"BT /%s %s Tf %s %s Td %s Tj ET\n" % (
+        _RECURSO[fonte].encode('ascii'), _num(tamanho), _num(x), _num(y), _string_pdf(texto)
+    )
+
+
+def _largura(texto: str, fonte: str, tamanho: float) -> float:
+    return stringWidth(texto, fonte, tamanho)
+
+
+class _Retangulos:
+    """Canvas mínimo que só anota os retângulos desenhados pelo código de barras."""
+
+    def __init__(self):
+        self.retangulos: List[Tuple[float, float, float, float]] = []
+
+    def rect(self, x, y, largura, altura, stroke=0, fill=1):
+        self.retangulos.append((x, y, largura, altura))
+
+
+def formatar_valor(valor: float) -> str:
+    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+class ModeloBoleto:
+    """
+    Página de boleto com o layout fixo renderizado uma única vez.
+
+    Cabeçalho, rótulos, linha divisória, observação e rodapé formam um Form
+    XObject; ele e os demais objetos que não mudam (catálogo, página, fontes)
+    ficam prontos em bytes, com seus offsets da tabela xref. Cada boleto
+    gera só o fluxo de conteúdo com os campos variáveis (ID, CPF, vencimento,
+    valor, linha digitável, código de barras e data de geração), que pinta o
+    fundo com `Do`, e fecha o arquivo com xref e trailer.
+    """
+
+    def __init__(self, nome_beneficiario: str = NOME_BENEFICIARIO_PADRAO, observacao: str = OBSERVACAO_PADRAO):
+        self.nome_beneficiario = nome_beneficiario
+        self.observacao = observacao
+        self._prefixo, self._xref_fixa = self._montar_prefixo()
+
+    def _fundo(self) -> bytes:
+        return b''.join([
+            _texto('Helvetica-Bold', 16, MARGEM_ESQUERDA, TOPO, self.nome_beneficiario),
+            _texto('Helvetica', 9, MARGEM_ESQUERDA, TOPO - 14, PREFIXO_DOCUMENTO),
+            b"%s RG 1 w %s %s m %s %s l S\n" % (
+                CINZA, _num(MARGEM_ESQUERDA), _num(TOPO - 18), _num(LARGURA - MARGEM_DIREITA), _num(TOPO - 18)
+            ),
+            _texto('Helvetica', 10, MARGEM_ESQUERDA, Y_CPF, "CPF do pagador: "),
+            _texto('Helvetica', 10, MARGEM_ESQUERDA, Y_VENCIMENTO, "Vencimento: "),
+            _texto('Helvetica', 10, MARGEM_ESQUERDA, Y_VALOR, "Valor: "),
+            _texto('Helvetica-Oblique', 8, MARGEM_ESQUERDA, Y_OBSERVACAO, self.observacao),
+            b"%s rg\n" % CINZA,
+            _texto('Helvetica', 8, MARGEM_ESQUERDA, RODAPE + 8, INSTRUCOES),
+        ])
+
+    def _montar_prefixo(self) -> Tuple[bytes, bytes]:
+        fontes = b' '.join(b"/%s %d 0 R" % (recurso.encode('ascii'), 4 + i) for i, recurso in enumerate(FONTES))
+        recursos_fonte = b"<< /Font << %s >> >>" % fontes
+        fundo = zlib.compress(self._fundo())
+        caixa = b"[0 0 %s %s]" % (_num(LARGURA), _num(ALTURA))
+
+        objetos = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+            b"<< /Type /Page /Parent 2 0 R /MediaBox %s /Resources << /Font << %s >> /XObject << /Fundo 7 0 R >> >> /Contents 8 0 R >>"
+            % (caixa, fontes),
+            *[
+                b"<< /Type /Font /Subtype /Type1 /Name /%s /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+                % (recurso.encode('ascii'), fonte.encode('ascii'))
+                for recurso, fonte in FONTES.items()
+            ],
+            b"<< /Type /XObject /Subtype /Form /BBox %s /Resources %s /Filter /FlateDecode /Length %d >>\nstream\n%s\nendstream"
+            % (caixa, recursos_fonte, len(fundo), fundo),
+        ]
+
+        prefixo = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        xref = b"0000000000 65535 f \n"
+        for numero, corpo in enumerate(objetos, start=1):
+            xref += b"%010d 00000 n \n" % len(prefixo)
+            prefixo += b"%d 0 obj\n%s\nendobj\n" % (numero, corpo)
+        return prefixo, xref
+
+    def _barras(self, linha_digitavel: str) -> bytes:
+        try:
+            valor = ''.join(ch for ch in linha_digitavel if ch.isdigit())
+            barras = code128.Code128(valor, barHeight=ALTURA_BARRAS, barWidth=0.4)
+            canvas = _Retangulos()
+            barras.canv = canvas
+            barras.draw()
+        except Exception:
+            return b"1 0 0 RG %s %s %s %s re S\n" % (
+                _num(MARGEM_ESQUERDA), _num(Y_BARRAS),
+                _num(LARGURA - MARGEM_ESQUERDA - MARGEM_DIREITA), _num(ALTURA_BARRAS)
+            )
+        return b''.join(
+            b"%s %s %s %s re f\n" % (_num(MARGEM_ESQUERDA + x), _num(Y_BARRAS + y), _num(largura), _num(altura))
+            for x, y, largura, altura in canvas.retangulos
+        )
+
+    def renderizar(
+        self,
+        cpf: str,
+        linha_digitavel: str,
+        valor: float,
+        vencimento: datetime,
+        id_boleto: Optional[str] = None,
+        gerado_em: Optional[datetime] = None
+    ) -> bytes:
+        vencimento_texto = vencimento.strftime('%d/%m/%Y') if isinstance(vencimento, datetime) else str(vencimento)
+        gerado_texto = f"Gerado em: {(gerado_em or datetime.now()).strftime('%d/%m/%Y %H:%M:%S')}"
+
+        conteudo = b''.join([
+            b"/Fundo Do\n",
+            _texto('Helvetica', 9, MARGEM_ESQUERDA + _largura(PREFIXO_DOCUMENTO, 'Helvetica', 9), TOPO - 14, id_boleto or '-'),
+            _texto('Helvetica', 10, MARGEM_ESQUERDA + _largura("CPF do pagador: ", 'Helvetica', 10), Y_CPF, cpf),
+            _texto('Helvetica', 10, MARGEM_ESQUERDA + _largura("Vencimento: ", 'Helvetica', 10), Y_VENCIMENTO, vencimento_texto),
+            _texto('Helvetica', 10, MARGEM_ESQUERDA + _largura("Valor: ", 'Helvetica', 10), Y_VALOR, formatar_valor(valor)),
+            _texto(
+                'Helvetica-Bold', 12,
+                (LARGURA - _largura(linha_digitavel, 'Helvetica-Bold', 12)) / 2, Y_LINHA_DIGITAVEL, linha_digitavel
+            ),
+            self._barras(linha_digitavel),
+            _texto(
+                'Helvetica', 7,
+                LARGURA - MARGEM_DIREITA - _largura(gerado_texto, 'Helvetica', 7), RODAPE + 25, gerado_texto
+            ),
+        ])
+        comprimido = zlib.compress(conteudo)
+
+        corpo = b"8 0 obj\n<< /Filter /FlateDecode /Length %d >>\nstream\n%s\nendstream\nendobj\n" % (
+            len(comprimido), comprimido
+        )
+        inicio_xref = len(self._prefixo) + len(corpo)
+        return b''.join([
+            self._prefixo,
+            corpo,
+            b"xref\n0 9\n",
+            self._xref_fixa,
+            b"%010d 00000 n \n" % len(self._prefixo),
+            b"trailer\n<< /Size 9 /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % inicio_xref,
+        ])
+
+
+_modelos: Dict[Tuple[str, str], ModeloBoleto] = {}
+_modelos_lock = threading.Lock()
+
+def get_modelo_boleto(
+    nome_beneficiario: str = NOME_BENEFICIARIO_PADRAO,
+    observacao: str = OBSERVACAO_PADRAO
+) -> ModeloBoleto:
+    chave = (nome_beneficiario, observacao)
+    with _modelos_lock:
+        modelo = _modelos.get(chave)
+        if modelo is None:
+            modelo = _modelos[chave] = ModeloBoleto(nome_beneficiario, observacao)
+        return modelo
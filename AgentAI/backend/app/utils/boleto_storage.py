@@ -0,0 +1,152 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.core.config import AppConfig
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BoletoPDF:
+    conteudo: bytes
+    etag: str
+    modificado_em: float
+    caminho: Path
+
+    @classmethod
+    def criar(cls, conteudo: bytes, modificado_em: float, caminho: Path) -> "BoletoPDF":
+        etag = f'"{hashlib.sha256(conteudo).hexdigest()[:32]}"'
+        return cls(conteudo, etag, int(modificado_em), caminho)
+
+
+class BoletoStorage:
+    """
+    Armazenamento dos PDFs de boleto, pelo ID do boleto.
+
+    Os arquivos ficam em diretórios pelo prefixo do hash do ID
+    (`ab/cd/boleto_<id>.pdf`), para nenhum diretório crescer com o volume
+    de boletos, e são gravados via arquivo temporário e rename. Os PDFs
+    gravados ou lidos há pouco ficam em uma LRU em memória: a maioria dos
+    downloads acontece segundos depois da geração.
+
+    O PDF é função só dos dados imutáveis do Invoice, então uma entrada nunca
+    fica desatualizada. O mtime do arquivo é a data de criação do boleto e
+    serve de Last-Modified; o ETag é o hash do conteúdo. Arquivos do layout
+    antigo (`boleto_<id>.pdf` na raiz) são movidos para o shard ao serem lidos.
+    """
+
+    def __init__(self, diretorio: Path, max_itens_memoria: int = 512):
+        self.diretorio = Path(diretorio)
+        self.max_itens_memoria = max_itens_memoria
+
+        self._memoria: "OrderedDict[str, BoletoPDF]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._hits_memoria = 0
+        self._hits_disco = 0
+        self._misses = 0
+
+    def caminho_para(self, id_boleto: str) -> Path:
+        prefixo = hashlib.sha256(id_boleto.encode('utf-8')).hexdigest()
+        return self.diretorio / prefixo[:2] / prefixo[2:4] / f"boleto_{id_boleto}.pdf"
+
+    def obter(self, id_boleto: str) -> Optional[BoletoPDF]:
+        with self._lock:
+            entrada = self._memoria.get(id_boleto)
+            if entrada is not None:
+                self._memoria.move_to_end(id_boleto)
+                self._hits_memoria += 1
+                return entrada
+
+        entrada = self._ler_disco(id_boleto)
+        with self._lock:
+            if entrada is None:
+                self._misses += 1
+                return None
+            self._hits_disco += 1
+            self._guardar_memoria(id_boleto, entrada)
+        return entrada
+
+    def salvar(self, id_boleto: str, pdf: bytes, modificado_em: Optional[float] = None) -> BoletoPDF:
+        caminho = self.caminho_para(id_boleto)
+        entrada = BoletoPDF.criar(pdf, modificado_em if modificado_em is not None else time.time(), caminho)
+        with self._lock:
+            self._guardar_memoria(id_boleto, entrada)
+
+        try:
+            caminho.parent.mkdir(parents=True, exist_ok=True)
+            temporario = caminho.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(temporario, 'wb') as f:
+                f.write(pdf)
+            os.utime(temporario, (entrada.modificado_em, entrada.modificado_em))
+            os.replace(temporario, caminho)
+        except Exception as e:
+            logger.warning(f"Não foi possível gravar em disco o PDF do boleto {id_boleto}: {e}")
+        return entrada
+
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            hits = self._hits_memoria + self._hits_disco
+            total = hits + self._misses
+            return {
+                'hits_memoria': self._hits_memoria,
+                'hits_disco': self._hits_disco,
+                'misses': self._misses,
+                'taxa_acerto': round(hits / total, 4) if total else 0.0,
+                'itens_memoria': len(self._memoria),
+            }
+
+    def _ler_disco(self, id_boleto: str) -> Optional[BoletoPDF]:
+        caminho = self.caminho_para(id_boleto)
+        try:
+            with open(caminho, 'rb') as f:
+                return BoletoPDF.criar(f.read(), os.fstat(f.fileno()).st_mtime, caminho)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Não foi possível ler o PDF do boleto {id_boleto}: {e}")
+            return None
+
+        antigo = self.diretorio / f"boleto_{id_boleto}.pdf"
+        if not antigo.exists():
+            return None
+        try:
+            caminho.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(antigo, caminho)
+        except FileNotFoundError:
+            # Outra requisição moveu o arquivo ao mesmo tempo.
+            pass
+        except OSError as e:
+            logger.warning(f"Não foi possível mover o PDF do boleto {id_boleto} para o shard: {e}")
+            caminho = antigo
+        try:
+            with open(caminho, 'rb') as f:
+                return BoletoPDF.criar(f.read(), os.fstat(f.fileno()).st_mtime, caminho)
+        except OSError as e:
+            logger.warning(f"Não foi possível ler o PDF do boleto {id_boleto}: {e}")
+            return None
+
+    def _guardar_memoria(self, id_boleto: str, entrada: BoletoPDF) -> None:
+        self._memoria[id_boleto] = entrada
+        self._memoria.move_to_end(id_boleto)
+        while len(self._memoria) > self.max_itens_memoria:
+            self._memoria.popitem(last=False)
+
+
+_storage_instance = None
+
+def get_boleto_storage() -> BoletoStorage:
+    global _storage_instance
+    if _storage_instance is None:
+        _storage_instance = BoletoStorage(
+            diretorio=AppConfig.BOLETOS_DIR,
+            max_itens_memoria=AppConfig.BOLETO_STORAGE_MEMORY_ITEMS,
+        )
+    return _storage_instance
@@ -0,0 +1,270 @@
+import re
+import logging
+from datetime import date, timedelta
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+from app.utils.comprovante_scanner import MIN_DIGITOS_LINHA_DIGITAVEL
+
+try:
+    from pyzbar import pyzbar
+except ImportError:
+    pyzbar = None
+
+logger = logging.getLogger(__name__)
+
+
+# Fator de vencimento: dias desde 07/10/1997; ao chegar a 9999 o fator
+# recomeçou em 1000 no dia 22/02/2025.
+BASE_FATOR_VENCIMENTO = date(1997, 10, 7)
+BASE_FATOR_VENCIMENTO_2025 = date(2025, 2, 22)
+
+
+@dataclass
+class CodigoLido:
+    """
+    Conteúdo interpretado de um QR code ou código de barras do comprovante.
+
+    `tipo` é 'boleto', 'arrecadacao' ou 'pix'.
+    """
+    tipo: str
+    dados: str
+    linha_digitavel: Optional[str] = None
+    codigo_barras: Optional[str] = None
+    valor: Optional[float] = None
+    vencimento: Optional[date] = None
+    txid: Optional[str] = None
+    chave_pix: Optional[str] = None
+
+    def como_texto(self) -> str:
+        """
+        Linhas com os rótulos que a varredura de tokens já reconhece, para o
+        código entrar no mesmo caminho do texto extraído por OCR.
+        """
+        linhas = ['QR code pix' if self.tipo == 'pix' else 'Código de barras do boleto']
+        if self.linha_digitavel:
+            linhas.append(f"Linha digitável: {self.linha_digitavel}")
+        if self.valor is not None:
+            valor = f'{self.valor:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
+            linhas.append(f"Valor: R$ {valor}")
+        if self.vencimento:
+            linhas.append(f"Vencimento: {self.vencimento.strftime('%d/%m/%Y')}")
+        if self.txid:
+            linhas.append(f"ID da transação: {self.txid}")
+        if self.chave_pix:
+            linhas.append(f"Chave Pix: {self.chave_pix}")
+        return '\n'.join(linhas)
+
+
+def codigos_disponiveis() -> bool:
+    """Indica se a leitura de códigos pode rodar (pyzbar e libzbar instalados)."""
+    return pyzbar is not None
+
+
+def _modulo10(numero: str) -> int:
+    soma = 0
+    for i, digito in enumerate(reversed(numero)):
+        produto = int(digito) * (2 if i % 2 == 0 else 1)
+        soma += produto // 10 + produto % 10
+    return (10 - soma % 10) % 10
+
+
+def _modulo11_arrecadacao(numero: str) -> int:
+    soma = sum(int(d) * (2 + i % 8) for i, d in enumerate(reversed(numero)))
+    resto = soma % 11
+    return 0 if resto in (0, 1) else 11 - resto
+
+
+def _vencimento_por_fator(fator: int, hoje: Optional[date] = None) -> Optional[date]:
+    if fator == 0:
+        return None
+    hoje = hoje or date.today()
+    candidatos = [BASE_FATOR_VENCIMENTO + timedelta(days=fator)]
+    if fator >= 1000:
+        candidatos.append(BASE_FATOR_VENCIMENTO_2025 + timedelta(days=fator - 1000))
+    return min(candidatos, key=lambda d: abs((d - hoje).days))
+
+
+def codigo_barras_para_linha(codigo: str) -> Optional[str]:
+    """Converte os 44 dígitos do código de barras na linha digitável (47 ou 48)."""
+    if len(codigo) != 44 or not codigo.isdigit():
+        return None
+
+    if codigo[0] == '8':
+        dv = _modulo10 if codigo[2] in '67' else _modulo11_arrecadacao
+        blocos = [codigo[i:i + 11] for i in range(0, 44, 11)]
+        return ''.join(bloco + str(dv(bloco)) for bloco in blocos)
+
+    livre = codigo[19:]
+    campo1 = codigo[0:4] + livre[0:5]
+    campo2 = livre[5:15]
+    campo3 = livre[15:25]
+    return (
+        campo1 + str(_modulo10(campo1)) +
+        campo2 + str(_modulo10(campo2)) +
+        campo3 + str(_modulo10(campo3)) +
+        codigo[4] + codigo[5:19]
+    )
+
+
+def linha_para_codigo_barras(linha: str) -> Optional[str]:
+    """Operação inversa: remove os dígitos verificadores da linha digitável."""
+    linha = re.sub(r'\D', '', linha or '')
+    if len(linha) == 48 and linha[0] == '8':
+        return ''.join(linha[i:i + 11] for i in range(0, 48, 12))
+    if len(linha) == 47:
+        return linha[0:4] + linha[32] + linha[33:47] + linha[4:9] + linha[10:20] + linha[21:31]
+    return None
+
+
+def _modulo11_boleto(numero: str) -> int:
+    soma = sum(int(d) * (2 + i % 8) for i, d in enumerate(reversed(numero)))
+    dv = 11 - soma % 11
+    return 1 if dv in (0, 10, 11) else dv
+
+
+def fator_vencimento(vencimento: date) -> int:
+    dias = (vencimento - BASE_FATOR_VENCIMENTO).days
+    if dias > 9999:
+        dias = 1000 + (vencimento - BASE_FATOR_VENCIMENTO_2025).days
+    return dias
+
+
+def gerar_linha_digitavel(valor: float, vencimento: date, campo_livre: str, banco: str = '999') -> str:
+    """
+    Linha digitável formatada de um boleto de cobrança, com os dígitos
+    verificadores calculados; `campo_livre` tem 25 dígitos.
+    """
+    centavos = round(valor * 100)
+    sem_dv = f"{banco}9{fator_vencimento(vencimento):04d}{centavos:010d}{campo_livre}"
+    codigo = sem_dv[:4] + str(_modulo11_boleto(sem_dv)) + sem_dv[4:]
+    linha = codigo_barras_para_linha(codigo)
+    return f"{linha[0:5]}.{linha[5:10]} {linha[10:15]}.{linha[15:21]} {linha[21:26]}.{linha[26:32]} {linha[32]} {linha[33:]}"
+
+
+def formas_do_codigo(digitos: str) -> List[str]:
+    """
+    Linha digitável e código de barras equivalentes a uma sequência de
+    dígitos, para comparar com a linha cadastrada em qualquer das formas.
+    """
+    formas = [digitos]
+    convertido = codigo_barras_para_linha(digitos) if len(digitos) == 44 else linha_para_codigo_barras(digitos)
+    if convertido:
+        formas.append(convertido)
+    return formas
+
+
+def interpretar_codigo_barras(codigo: str) -> Optional[CodigoLido]:
+    linha = codigo_barras_para_linha(codigo)
+    if not linha:
+        return None
+
+    if codigo[0] == '8':
+        valor = int(codigo[4:15]) / 100 if codigo[2] in '68' else None
+        return CodigoLido('arrecadacao', codigo, linha_digitavel=linha, codigo_barras=codigo, valor=valor or None)
+
+    valor = int(codigo[9:19]) / 100
+    return CodigoLido(
+        'boleto', codigo,
+        linha_digitavel=linha,
+        codigo_barras=codigo,
+        valor=valor or None,
+        vencimento=_vencimento_por_fator(int(codigo[5:9]))
+    )
+
+
+def _crc16(dados: str) -> str:
+    crc = 0xFFFF
+    for byte in dados.encode('utf-8'):
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+            crc &= 0xFFFF
+    return f'{crc:04X}'
+
+
+def _campos_emv(payload: str) -> Dict[str, str]:
+    campos, i = {}, 0
+    while i + 4 <= len(payload):
+        tag, tamanho = payload[i:i + 2], payload[i + 2:i + 4]
+        if not tamanho.isdigit():
+            break
+        fim = i + 4 + int(tamanho)
+        campos[tag] = payload[i + 4:fim]
+        i = fim
+    return campos
+
+
+def interpretar_pix(payload: str) -> Optional[CodigoLido]:
+    """Interpreta o BR Code (EMV) de um Pix; None se o CRC não conferir."""
+    if not payload.startswith('000201') or len(payload) < 12:
+        return None
+    if payload[-8:-4] != '6304' or _crc16(payload[:-4]) != payload[-4:].upper():
+        return None
+
+    campos = _campos_emv(payload)
+    conta = _campos_emv(campos.get('26', ''))
+    adicionais = _campos_emv(campos.get('62', ''))
+
+    try:
+        valor = float(campos['54']) if '54' in campos else None
+    except ValueError:
+        valor = None
+    txid = adicionais.get('05')
+    return CodigoLido(
+        'pix', payload,
+        valor=valor,
+        txid=txid if txid and txid != '***' else None,
+        chave_pix=conta.get('01')
+    )
+
+
+def interpretar(dados: str) -> Optional[CodigoLido]:
+    dados = dados.strip()
+    if dados.startswith('000201'):
+        return interpretar_pix(dados)
+
+    digitos = re.sub(r'\D', '', dados)
+    if len(digitos) == 44:
+        return interpretar_codigo_barras(digitos)
+    if len(digitos) in (47, 48):
+        codigo = linha_para_codigo_barras(digitos)
+        lido = interpretar_codigo_barras(codigo) if codigo else None
+        if lido and lido.linha_digitavel == digitos:
+            return lido
+    # Os boletos de teste gerados pelo sistema codificam em Code 128 os
+    # dígitos da linha digitável cadastrada, sem dígitos verificadores
+    # válidos: a linha vale para localizar o boleto, mas sem valor/vencimento.
+    if dados.isdigit() and MIN_DIGITOS_LINHA_DIGITAVEL <= len(dados) <= 48:
+        return CodigoLido('boleto', dados, linha_digitavel=dados)
+    return None
+
+
+def decodificar_codigos(imagem: Image.Image) -> List[CodigoLido]:
+    """
+    Lê QR codes e códigos de barras (ITF do boleto, Code 128) da imagem e
+    devolve os que puderam ser interpretados. Vazio se o zbar não estiver
+    instalado.
+    """
+    if pyzbar is None:
+        return []
+
+    try:
+        simbolos = pyzbar.decode(imagem, symbols=[
+            pyzbar.ZBarSymbol.QRCODE, pyzbar.ZBarSymbol.I25, pyzbar.ZBarSymbol.CODE128
+        ])
+    except Exception as e:
+        logger.warning(f"Erro ao decodificar códigos do comprovante: {e}")
+        return []
+
+    codigos = []
+    for simbolo in simbolos:
+        try:
+            lido = interpretar(simbolo.data.decode('utf-8', errors='ignore'))
+        except Exception:
+            lido = None
+        if lido:
+            codigos.append(lido)
+    return codigos
@@ -0,0 +1,80 @@
+from datetime import date
+
+from app.utils.comprovante_codigos import (
+    codigo_barras_para_linha,
+    gerar_linha_digitavel,
+    interpretar,
+    interpretar_pix,
+    linha_para_codigo_barras,
+)
+
+
+CODIGO_BOLETO = "23799138100000150001234567890123456789012345"
+LINHA_BOLETO = "23791234546789012345767890123457913810000015000"
+
+CODIGO_ARRECADACAO = "83620000000667800481001809756573100158963608"
+LINHA_ARRECADACAO = "836200000005667800481000180975657313001589636081"
+
+# Exemplo do manual do BR Code (Banco Central), CRC 1D3D.
+PIX = (
+    "00020126580014br.gov.bcb.pix0136123e4567-e12b-12d1-a456-426655440000"
+    "5204000053039865802BR5913Fulano de Tal6008BRASILIA62070503***63041D3D"
+)
+
+
+def test_codigo_barras_para_linha_boleto():
+    assert codigo_barras_para_linha(CODIGO_BOLETO) == LINHA_BOLETO
+
+
+def test_codigo_barras_para_linha_arrecadacao():
+    assert codigo_barras_para_linha(CODIGO_ARRECADACAO) == LINHA_ARRECADACAO
+
+
+def test_codigo_barras_invalido():
+    assert codigo_barras_para_linha("1234") is None
+    assert codigo_barras_para_linha("x" * 44) is None
+
+
+def test_linha_para_codigo_barras_e_inversa():
+    assert linha_para_codigo_barras(LINHA_BOLETO) == CODIGO_BOLETO
+    assert linha_para_codigo_barras(LINHA_ARRECADACAO) == CODIGO_ARRECADACAO
+    assert linha_para_codigo_barras("2379.1234 5") is None
+
+
+def test_gerar_linha_digitavel():
+    linha = gerar_linha_digitavel(150.0, date(2026, 3, 10), "1234567890123456789012345", "237")
+    assert linha == "23791.23454 67890.123457 67890.123457 9 13810000015000"
+
+
+def test_interpretar_boleto():
+    lido = interpretar(LINHA_BOLETO)
+    assert lido.tipo == 'boleto'
+    assert lido.codigo_barras == CODIGO_BOLETO
+    assert lido.valor == 150.0
+    assert lido.vencimento == date(2026, 3, 10)
+
+
+def test_interpretar_arrecadacao():
+    lido = interpretar(CODIGO_ARRECADACAO)
+    assert lido.tipo == 'arrecadacao'
+    assert lido.linha_digitavel == LINHA_ARRECADACAO
+    assert lido.valor == 66.78
+
+
+def test_interpretar_linha_sem_dv_valido_so_localiza_o_boleto():
+    lido = interpretar("1" * 47)
+    assert lido.linha_digitavel == "1" * 47
+    assert lido.valor is None and lido.vencimento is None
+
+
+def test_interpretar_pix():
+    lido = interpretar_pix(PIX)
+    assert lido.tipo == 'pix'
+    assert lido.chave_pix == "123e4567-e12b-12d1-a456-426655440000"
+    assert lido.txid is None
+    assert lido.valor is None
+
+
+def test_pix_com_crc_errado():
+    assert interpretar_pix(PIX[:-4] + "0000") is None
+    assert interpretar_pix(PIX.replace("Fulano", "Ciclano")) is None
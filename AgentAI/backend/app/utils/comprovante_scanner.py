@@ -0,0 +1,232 @@
+import re
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+PALAVRAS_CHAVE = [
+    'comprovante', 'pagamento', 'transferência', 'pix', 'boleto',
+    'quitação', 'valor', 'data', 'autenticação', 'banco', 'agência', 'conta'
+]
+
+# Rótulos que dão contexto ao número seguinte na mesma linha.
+ROTULOS = {
+    'data do pagamento': 'pagamento',
+    'data pagamento': 'pagamento',
+    'data de pagamento': 'pagamento',
+    'data do recibo': 'pagamento',
+    'pago em': 'pagamento',
+    'pagamento realizado': 'pagamento',
+    'realizado em': 'pagamento',
+    'vencimento': 'vencimento',
+    'venc.': 'vencimento',
+    'venc': 'vencimento',
+    'data': 'data',
+    'cpf': 'cpf',
+}
+
+# Distância máxima (em caracteres) entre o rótulo "CPF" e o número.
+DISTANCIA_ROTULO_CPF = 20
+
+# Quantidade mínima de dígitos para uma sequência ser tratada como linha
+# digitável (boletos têm 47 e contas de arrecadação 48).
+MIN_DIGITOS_LINHA_DIGITAVEL = 36
+
+
+def _montar_termos() -> Dict[str, Tuple[Optional[str], Tuple[str, ...]]]:
+    # Cada termo leva o rótulo que representa e todas as palavras-chave que
+    # contém: como a varredura pega o termo mais longo em cada posição,
+    # "data do pagamento" precisa contar também "data" e "pagamento".
+    termos = {}
+    for termo in set(ROTULOS) | set(PALAVRAS_CHAVE):
+        contidas = tuple(p for p in PALAVRAS_CHAVE if p in termo)
+        termos[termo] = (ROTULOS.get(termo), contidas)
+    return termos
+
+
+_TERMOS = _montar_termos()
+
+# Um grupo nomeado por termo: o termo encontrado sai de `m.lastgroup`, sem
+# procurar de novo o trecho (a caixa do OCR nem sempre volta com lower()).
+_GRUPOS_TERMOS = {f"termo_{i}": termo for i, termo in enumerate(sorted(_TERMOS, key=len, reverse=True))}
+
+# A linha digitável pode ser quebrada em duas linhas pelo OCR. Só se junta
+# através da quebra quando o trecho antes dela já começa com um campo
+# completo (5 + 5 dígitos); sem isso, números da linha de cima (conta,
+# CPF) seriam engolidos pela linha digitável de baixo.
+_PADRAO = re.compile(
+    r'(?P<linha_digitavel>(?<![\d.])(?:'
+    r'(?:\d[-. ]?){%d,47}\d'
+    r'|(?=\d{5}\.?\d{5})(?:\d(?:[-. ]|[ \t]*\n[ \t]*)?){%d,47}\d'
+    r')(?!\d))' % (MIN_DIGITOS_LINHA_DIGITAVEL - 1, MIN_DIGITOS_LINHA_DIGITAVEL - 1) +
+    r'|(?P<data>(?<!\d)\d{2}[/-]\d{2}[/-](?:\d{4}|\d{2})(?!\d))'
+    r'|(?P<cpf>(?<![\d.])\d{3}[. ]?\d{3}[. ]?\d{3}[- ]?\d{2}(?![\d,]))'
+    r'|(?P<valor>(?<![\d.,])(?:\d{1,3}(?:\.\d{3})+,\d{2}|\d+,\d{2})(?![\d,]))'
+    r'|(?P<nl>\n)'
+    r'|' + '|'.join(f"(?P<{grupo}>{re.escape(termo)})" for grupo, termo in _GRUPOS_TERMOS.items()),
+    re.IGNORECASE
+)
+
+
+@dataclass
+class Token:
+    """
+    Trecho tipado encontrado na varredura do texto do comprovante.
+
+    `tipo` é 'cpf', 'valor', 'data', 'linha_digitavel', 'rotulo' ou
+    'palavra_chave'; `rotulo` guarda o rótulo mais próximo na mesma linha.
+    """
+    tipo: str
+    valor: Any
+    inicio: int
+    fim: int
+    linha: int
+    rotulo: Optional[str] = None
+
+
+@dataclass
+class Varredura:
+    """Tokens de um texto e os campos derivados deles."""
+    tokens: List[Token] = field(default_factory=list)
+
+    def do_tipo(self, tipo: str) -> List[Token]:
+        return [t for t in self.tokens if t.tipo == tipo]
+
+    @property
+    def cpf(self) -> Optional[str]:
+        candidatos = self.do_tipo('cpf')
+        for token in candidatos:
+            if token.rotulo == 'cpf':
+                return token.valor
+        return candidatos[0].valor if candidatos else None
+
+    @property
+    def cpfs(self) -> List[str]:
+        return [t.valor for t in self.do_tipo('cpf')]
+
+    @property
+    def valores(self) -> List[float]:
+        return [t.valor for t in self.do_tipo('valor')]
+
+    @property
+    def datas(self) -> List[datetime]:
+        return [t.valor for t in self.do_tipo('data')]
+
+    @property
+    def linhas_digitaveis(self) -> List[str]:
+        return [t.valor for t in self.do_tipo('linha_digitavel')]
+
+    @property
+    def palavras_chave(self) -> List[str]:
+        encontradas = {t.valor for t in self.do_tipo('palavra_chave')}
+        return [p for p in PALAVRAS_CHAVE if p in encontradas]
+
+    def data_rotulada(self, rotulo: str) -> Optional[datetime]:
+        """
+        Primeira data com o rótulo dado; na falta, a primeira rotulada só como
+        "data" e, depois, a primeira sem rótulo. Datas com outro rótulo (uma
+        data de vencimento, ao procurar a de pagamento) nunca são usadas.
+        """
+        datas = self.do_tipo('data')
+        for aceito in (rotulo, 'data', None):
+            for token in datas:
+                if token.rotulo == aceito:
+                    return token.valor
+        return None
+
+    @property
+    def comprova_pagamento(self) -> bool:
+        """
+        Se o texto traz uma data rotulada como pagamento (ou só "data") ou uma
+        autenticação. Os campos lidos de códigos de barras e QR codes só têm
+        valor, linha e vencimento, então não bastam para isso.
+        """
+        if 'autenticação' in self.palavras_chave:
+            return True
+        return any(t.rotulo in ('pagamento', 'data') for t in self.do_tipo('data'))
+
+    @property
+    def campos_obrigatorios(self) -> set:
+        campos = set()
+        if self.cpf is not None:
+            campos.add('cpf')
+        if self.valores:
+            campos.add('valor')
+        if self.datas:
+            campos.add('data')
+        return campos
+
+
+def _interpretar_data(trecho: str) -> Optional[datetime]:
+    dia, mes, ano = re.split(r'[/-]', trecho)
+    try:
+        return datetime(int(ano) + 2000 if len(ano) == 2 else int(ano), int(mes), int(dia))
+    except ValueError:
+        return None
+
+
+def escanear(texto: str) -> Varredura:
+    """
+    Percorre o texto uma única vez com um padrão pré-compilado e devolve os
+    tokens na ordem em que aparecem.
+
+    Datas recebem o rótulo ('pagamento' ou 'vencimento') mais próximo antes
+    delas na mesma linha ou, se não houver, o primeiro depois. Um CPF é
+    rotulado quando vem logo após "CPF".
+    """
+    tokens: List[Token] = []
+    linha = 0
+    rotulo_linha: Optional[str] = None
+    datas_sem_rotulo: List[Token] = []
+    fim_rotulo_cpf = None
+
+    for m in _PADRAO.finditer(texto or ''):
+        tipo = m.lastgroup
+        trecho = m.group()
+
+        if tipo == 'nl':
+            linha += 1
+            rotulo_linha = None
+            datas_sem_rotulo = []
+            continue
+
+        if tipo in _GRUPOS_TERMOS:
+            rotulo, palavras = _TERMOS[_GRUPOS_TERMOS[tipo]]
+            for palavra in palavras:
+                tokens.append(Token('palavra_chave', palavra, m.start(), m.end(), linha))
+            if rotulo:
+                tokens.append(Token('rotulo', rotulo, m.start(), m.end(), linha))
+            if rotulo == 'cpf':
+                fim_rotulo_cpf = m.end()
+            elif rotulo:
+                rotulo_linha = rotulo
+                for pendente in datas_sem_rotulo:
+                    pendente.rotulo = rotulo
+                datas_sem_rotulo = []
+            continue
+
+        if tipo == 'data':
+            data = _interpretar_data(trecho)
+            if data is None:
+                continue
+            token = Token('data', data, m.start(), m.end(), linha, rotulo_linha)
+            if rotulo_linha is None:
+                datas_sem_rotulo.append(token)
+            tokens.append(token)
+        elif tipo == 'cpf':
+            rotulado = fim_rotulo_cpf is not None and m.start() - fim_rotulo_cpf <= DISTANCIA_ROTULO_CPF
+            # Sem o rótulo, grupos separados por espaço costumam ser outros números.
+            if not rotulado and ' ' in trecho:
+                continue
+            tokens.append(Token('cpf', re.sub(r'\D', '', trecho), m.start(), m.end(), linha,
+                                'cpf' if rotulado else None))
+        elif tipo == 'valor':
+            tokens.append(Token('valor', float(trecho.replace('.', '').replace(',', '.')), m.start(), m.end(), linha))
+        elif tipo == 'linha_digitavel':
+            tokens.append(Token('linha_digitavel', re.sub(r'\D', '', trecho), m.start(), m.end(), linha))
+            if '\n' in trecho:
+                linha += trecho.count('\n')
+                rotulo_linha = None
+                datas_sem_rotulo = []
+
+    return Varredura(tokens)
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+from app.utils.comprovante_scanner import escanear
+
+
+LINHA = "23793.38128 60000.000003 00000.000400 1 84340000012345"
+LINHA_DIGITOS = "23793381286000000000300000000400184340000012345"
+
+
+def test_linha_digitavel_em_uma_linha():
+    assert escanear(f"Linha digitável: {LINHA}").linhas_digitaveis == [LINHA_DIGITOS]
+
+
+def test_linha_digitavel_quebrada_pelo_ocr():
+    texto = "23793.38128 60000.000003\n00000.000400 1 84340000012345\nData: 12/03/2026"
+    varredura = escanear(texto)
+    assert varredura.linhas_digitaveis == [LINHA_DIGITOS]
+    assert varredura.tokens[-1].linha == 2
+
+
+def test_linha_digitavel_nao_engole_conta_da_linha_de_cima():
+    varredura = escanear(f"Agencia 1234 Conta 56789-0\n{LINHA}")
+    assert varredura.linhas_digitaveis == [LINHA_DIGITOS]
+
+
+def test_linha_digitavel_nao_engole_cpf_da_linha_de_cima():
+    varredura = escanear(f"Pagador CPF 123.456.789-09\n{LINHA}")
+    assert varredura.cpf == "12345678909"
+    assert varredura.linhas_digitaveis == [LINHA_DIGITOS]
+
+
+def test_cpf_rotulado_tem_prioridade():
+    varredura = escanear("Conta 111.222.333-44\nCPF: 123.456.789-09")
+    assert varredura.cpf == "12345678909"
+    assert varredura.cpfs == ["11122233344", "12345678909"]
+
+
+def test_valores():
+    assert escanear("Valor: R$ 1.234,56\nTarifa 2,50").valores == [1234.56, 2.5]
+
+
+def test_data_rotulada_pelo_rotulo_da_mesma_linha():
+    varredura = escanear("Data do pagamento: 11/03/2026 Vencimento 10/03/2026")
+    assert varredura.data_rotulada('pagamento') == datetime(2026, 3, 11)
+    assert varredura.data_rotulada('vencimento') == datetime(2026, 3, 10)
+
+
+def test_data_de_pagamento_nao_usa_data_de_vencimento():
+    varredura = escanear("Vencimento: 10/03/2026\nData: 12/03/2026")
+    assert varredura.data_rotulada('pagamento') == datetime(2026, 3, 12)
+    assert varredura.data_rotulada('vencimento') == datetime(2026, 3, 10)
+
+
+def test_data_generica_antes_da_sem_rotulo():
+    varredura = escanear("Emitido 01/03/2026\nData: 12/03/2026")
+    assert varredura.data_rotulada('pagamento') == datetime(2026, 3, 12)
+
+
+def test_data_sem_rotulo_como_ultimo_recurso():
+    assert escanear("Comprovante 12/03/26").data_rotulada('pagamento') == datetime(2026, 3, 12)
+
+
+def test_sem_data_do_rotulo_pedido():
+    assert escanear("Vencimento: 10/03/2026").data_rotulada('pagamento') is None
+
+
+def test_data_invalida_ignorada():
+    assert escanear("Data: 31/02/2026").datas == []
+
+
+def test_palavras_chave_de_termo_composto():
+    palavras = escanear("DATA DO PAGAMENTO 12/03/2026").palavras_chave
+    assert palavras == ['pagamento', 'data']
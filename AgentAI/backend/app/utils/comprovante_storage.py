@@ -0,0 +1,205 @@
+import io
+import os
+import uuid
+import logging
+import threading
+import zipfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional
+
+from PIL import Image, ImageOps
+
+from app.core.config import AppConfig
+
+logger = logging.getLogger(__name__)
+
+
+# Referência de um comprovante arquivado: "<arquivo.zip>::<membro>".
+SEPARADOR_ARQUIVO = '::'
+
+EXTENSOES_RECODIFICAVEIS = frozenset({'.jpg', '.jpeg', '.png'})
+
+# Formatos já comprimidos vão sem deflate para o zip.
+EXTENSOES_SEM_COMPRESSAO = frozenset({'.jpg', '.jpeg', '.png', '.webp'})
+
+
+def e_arquivado(referencia: str) -> bool:
+    return SEPARADOR_ARQUIVO in referencia
+
+
+class ComprovanteStorage:
+    """
+    Armazenamento dos comprovantes aceitos.
+
+    Arquivos novos ficam em diretórios pelo prefixo do hash do conteúdo
+    (`ab/cd/abcd....webp`), o que mantém cada diretório pequeno mesmo com
+    milhões de comprovantes; imagens são recodificadas em WEBP quando isso
+    reduz o arquivo. Comprovantes antigos são empacotados em zips imutáveis,
+    agrupados por mês: o diretório central do zip é o índice de offsets, então ler um
+    comprovante arquivado não exige descompactar o pacote.
+
+    A referência gravada em Receipt.filePath é o caminho do arquivo solto ou
+    "<zip>::<membro>" para os arquivados.
+    """
+
+    def __init__(
+        self,
+        diretorio: Path,
+        formato: str = 'webp',
+        qualidade: int = 85,
+        max_zips_abertos: int = 32
+    ):
+        self.diretorio = Path(diretorio)
+        self.diretorio_arquivo = self.diretorio / 'arquivo'
+        self.formato = formato
+        self.qualidade = qualidade
+        self.max_zips_abertos = max_zips_abertos
+
+        self._zips: "OrderedDict[str, zipfile.ZipFile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def caminho_para(self, content_hash: str, extensao: str) -> Path:
+        return self.diretorio / content_hash[:2] / content_hash[2:4] / f"{content_hash}{extensao}"
+
+    def salvar(self, conteudo: bytes, content_hash: str, extensao: str) -> str:
+        """
+        Grava o comprovante aceito (uma única escrita, via arquivo temporário
+        e rename) e retorna sua referência.
+        """
+        extensao = extensao.lower()
+        if extensao in EXTENSOES_RECODIFICAVEIS:
+            recodificado = self._recodificar(conteudo)
+            if recodificado is not None:
+                conteudo, extensao = recodificado, f".{self.formato}"
+
+        destino = self.caminho_para(content_hash, extensao)
+        if destino.exists():
+            # Mesmo conteúdo já armazenado (envio concorrente do mesmo arquivo).
+            return str(destino)
+
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        temporario = destino.with_suffix(f".{os.getpid()}.tmp")
+        with open(temporario, 'wb') as f:
+            f.write(conteudo)
+        os.replace(temporario, destino)
+        return str(destino)
+
+    def _recodificar(self, conteudo: bytes) -> Optional[bytes]:
+        """Bytes da imagem no formato compacto, ou None se não compensar."""
+        if self.formato not in ('webp',):
+            return None
+        try:
+            with Image.open(io.BytesIO(conteudo)) as imagem:
+                imagem = ImageOps.exif_transpose(imagem)
+                if imagem.mode not in ('RGB', 'RGBA', 'L'):
+                    imagem = imagem.convert('RGB')
+                buffer = io.BytesIO()
+                imagem.save(buffer, format='WEBP', quality=self.qualidade, method=4)
+        except Exception as e:
+            logger.warning(f"Não foi possível recodificar o comprovante: {e}")
+            return None
+
+        dados = buffer.getvalue()
+        if len(dados) >= len(conteudo):
+            return None
+        return dados
+
+    def _zip(self, caminho: str) -> zipfile.ZipFile:
+        # Os zips nunca são alterados depois de criados: os abertos ficam em
+        # uma LRU e o diretório central é lido uma vez por processo.
+        with self._lock:
+            arquivo = self._zips.get(caminho)
+            if arquivo is not None:
+                self._zips.move_to_end(caminho)
+                return arquivo
+            arquivo = zipfile.ZipFile(caminho)
+            self._zips[caminho] = arquivo
+            while len(self._zips) > self.max_zips_abertos:
+                _, antigo = self._zips.popitem(last=False)
+                antigo.close()
+            return arquivo
+
+    def abrir(self, referencia: str) -> BinaryIO:
+        if e_arquivado(referencia):
+            caminho, membro = referencia.split(SEPARADOR_ARQUIVO, 1)
+            return self._zip(caminho).open(membro)
+        return open(referencia, 'rb')
+
+    def ler(self, referencia: str) -> bytes:
+        with self.abrir(referencia) as f:
+            return f.read()
+
+    def existe(self, referencia: str) -> bool:
+        if not e_arquivado(referencia):
+            return os.path.exists(referencia)
+        caminho, membro = referencia.split(SEPARADOR_ARQUIVO, 1)
+        if not os.path.exists(caminho):
+            return False
+        try:
+            self._zip(caminho).getinfo(membro)
+            return True
+        except KeyError:
+            return False
+
+    def tamanho(self, referencia: str) -> int:
+        if e_arquivado(referencia):
+            caminho, membro = referencia.split(SEPARADOR_ARQUIVO, 1)
+            return self._zip(caminho).getinfo(membro).file_size
+        return os.path.getsize(referencia)
+
+    def remover(self, referencia: str) -> None:
+        if e_arquivado(referencia):
+            logger.warning(f"Comprovante arquivado não é removido individualmente: {referencia}")
+            return
+        try:
+            os.unlink(referencia)
+        except FileNotFoundError:
+            pass
+
+    def arquivar(self, grupo: str, referencias: Dict[str, str]) -> Dict[str, str]:
+        """
+        Empacota arquivos soltos em um novo zip de `grupo` (ex.: "2025-03").
+        `referencias` mapeia id -> referência atual; retorna id -> nova
+        referência apenas dos que foram empacotados. Os arquivos soltos não
+        são removidos aqui: isso só deve acontecer depois que o banco apontar
+        para o zip.
+        """
+        destino = self.diretorio_arquivo / grupo / f"{uuid.uuid4().hex}.zip"
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        temporario = destino.with_suffix('.zip.tmp')
+
+        novas = {}
+        try:
+            with zipfile.ZipFile(temporario, 'w') as pacote:
+                for id_comprovante, referencia in referencias.items():
+                    if e_arquivado(referencia) or not os.path.exists(referencia):
+                        continue
+                    membro = Path(referencia).name
+                    if membro in pacote.NameToInfo:
+                        membro = f"{id_comprovante}_{membro}"
+                    compressao = (
+                        zipfile.ZIP_STORED if Path(membro).suffix.lower() in EXTENSOES_SEM_COMPRESSAO
+                        else zipfile.ZIP_DEFLATED
+                    )
+                    pacote.write(referencia, membro, compress_type=compressao)
+                    novas[id_comprovante] = f"{destino}{SEPARADOR_ARQUIVO}{membro}"
+            if novas:
+                os.replace(temporario, destino)
+        finally:
+            if os.path.exists(temporario):
+                os.unlink(temporario)
+        return novas
+
+
+_storage_instance = None
+
+def get_comprovante_storage() -> ComprovanteStorage:
+    global _storage_instance
+    if _storage_instance is None:
+        _storage_instance = ComprovanteStorage(
+            diretorio=AppConfig.COMPROVANTES_DIR,
+            formato=AppConfig.RECEIPT_STORAGE_FORMAT,
+            qualidade=AppConfig.RECEIPT_STORAGE_QUALITY,
+        )
+    return _storage_instance
@@ -0,0 +1,126 @@
+import json
+import hashlib
+import logging
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from app.core.config import AppConfig
+from app.utils.comprovante_scanner import Varredura
+
+logger = logging.getLogger(__name__)
+
+
+Caixa = Tuple[float, float, float, float]
+
+# Campos recortados e o que a varredura do recorte precisa encontrar. A
+# caixa de cada campo cobre o rótulo impresso e o valor, e o texto lido
+# entra como está: nada que não veio do documento é acrescentado.
+CAMPOS_TEMPLATE: Dict[str, Callable[[Varredura], bool]] = {
+    'cpf': lambda v: v.cpf is not None,
+    'valor': lambda v: bool(v.valores),
+    'data_pagamento': lambda v: v.data_rotulada('pagamento') is not None,
+    'autenticacao': lambda v: 'autenticação' in v.palavras_chave,
+}
+
+
+@dataclass(frozen=True)
+class ReceiptTemplate:
+    """
+    Layout fixo de comprovante de um banco ou app.
+
+    As caixas são normalizadas (esquerda, topo, direita, base) em frações de
+    largura e altura, então valem para qualquer resolução da mesma tela; a de
+    cada campo inclui o rótulo dele.
+    O template é reconhecido pelas palavras do cabeçalho e pela proporção
+    altura/largura da imagem.
+    """
+    nome: str
+    palavras_cabecalho: Tuple[str, ...]
+    proporcao: float
+    campos: Dict[str, Caixa]
+    cabecalho: Caixa = (0.0, 0.0, 1.0, 0.15)
+    tolerancia_proporcao: float = 0.08
+
+    @classmethod
+    def from_dict(cls, dados: Dict) -> 'ReceiptTemplate':
+        return cls(
+            nome=dados['nome'],
+            palavras_cabecalho=tuple(p.lower() for p in dados['palavras_cabecalho']),
+            proporcao=float(dados['proporcao']),
+            campos={c: tuple(caixa) for c, caixa in dados['campos'].items() if c in CAMPOS_TEMPLATE},
+            cabecalho=tuple(dados.get('cabecalho', (0.0, 0.0, 1.0, 0.15))),
+            tolerancia_proporcao=float(dados.get('tolerancia_proporcao', 0.08)),
+        )
+
+    def aceita_proporcao(self, proporcao: float) -> bool:
+        return abs(proporcao - self.proporcao) <= self.proporcao * self.tolerancia_proporcao
+
+    def reconhece(self, texto_cabecalho: str) -> bool:
+        texto = texto_cabecalho.lower()
+        return all(p in texto for p in self.palavras_cabecalho)
+
+
+def recortar(imagem: Image.Image, caixa: Caixa) -> Image.Image:
+    esquerda, topo, direita, base = caixa
+    largura, altura = imagem.size
+    return imagem.crop((
+        int(esquerda * largura), int(topo * altura),
+        int(direita * largura), int(base * altura)
+    ))
+
+
+@dataclass
+class TemplateRegistry:
+    """
+    Conjunto de templates conhecidos, carregado de um arquivo JSON no formato
+    {"templates": [{"nome", "palavras_cabecalho", "proporcao", "campos":
+    {"cpf": [x0, y0, x1, y1], ...}, "cabecalho"?, "tolerancia_proporcao"?}]}.
+    """
+    templates: List[ReceiptTemplate] = field(default_factory=list)
+    versao: str = ''
+
+    @classmethod
+    def carregar(cls, caminho: Path) -> 'TemplateRegistry':
+        try:
+            conteudo = Path(caminho).read_bytes()
+            dados = json.loads(conteudo)
+            templates = [ReceiptTemplate.from_dict(t) for t in dados.get('templates', [])]
+        except FileNotFoundError:
+            return cls()
+        except Exception as e:
+            logger.error(f"Templates de comprovante inválidos em {caminho}: {e}")
+            return cls()
+        return cls(templates, hashlib.sha256(conteudo).hexdigest()[:12] if templates else '')
+
+    def candidatos(self, imagem: Image.Image) -> List[ReceiptTemplate]:
+        proporcao = imagem.height / max(1, imagem.width)
+        return [t for t in self.templates if t.aceita_proporcao(proporcao)]
+
+    def identificar(self, imagem: Image.Image, ler_regiao) -> Tuple[Optional[ReceiptTemplate], str]:
+        """
+        Procura o template da imagem. `ler_regiao(recorte)` faz o OCR de um
+        recorte; cada região de cabeçalho distinta é lida uma única vez.
+        Retorna o template (ou None) e o texto do cabeçalho lido.
+        """
+        lidos: Dict[Caixa, str] = {}
+        for template in self.candidatos(imagem):
+            if template.cabecalho not in lidos:
+                lidos[template.cabecalho] = ler_regiao(recortar(imagem, template.cabecalho))
+            if template.reconhece(lidos[template.cabecalho]):
+                return template, lidos[template.cabecalho]
+        return None, ''
+
+
+_registry_instance = None
+
+def get_template_registry() -> TemplateRegistry:
+    global _registry_instance
+    if _registry_instance is None:
+        if AppConfig.OCR_TEMPLATES:
+            _registry_instance = TemplateRegistry.carregar(AppConfig.OCR_TEMPLATES_FILE)
+        else:
+            _registry_instance = TemplateRegistry()
+    return _registry_instance
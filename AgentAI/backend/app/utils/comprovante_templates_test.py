@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import pytest
+from PIL import Image, ImageOps
+
+from app.utils.comprovante_templates import TemplateRegistry, recortar
+
+pytest.importorskip('reportlab')
+from benchmarks.gerador_comprovantes import ComprovanteSintetico, desenhar_imagem, montar_linhas
+
+
+TEMPLATES_SINTETICOS = Path(__file__).parents[2] / 'benchmarks' / 'templates_sinteticos.json'
+
+# Linha de montar_linhas() que cada campo do template deve recortar.
+LINHAS_DOS_CAMPOS = {
+    'boleto': {'data_pagamento': 5, 'valor': 6, 'cpf': 7, 'autenticacao': 9},
+    'pix': {'data_pagamento': 2, 'valor': 3, 'cpf': 5, 'autenticacao': 8},
+}
+
+
+def _linhas(layout: str):
+    gabarito = ComprovanteSintetico(
+        arquivo='', formato='png', layout=layout, cpf='12345678909', valor=1234.56,
+        data_pagamento='2026-03-09', data_vencimento='2026-03-10',
+        linha_digitavel='23793381286000000000300000000400184340000012345'
+    )
+    return montar_linhas(layout, 'Banco Fictício do Brasil', gabarito, '1A2B-3C4D-5E6F')
+
+
+def _tinta(imagem: Image.Image) -> int:
+    return sum(ImageOps.invert(imagem).point(lambda p: 255 if p > 64 else 0).histogram()[255:])
+
+
+def _so_a_linha(linhas, indice: int) -> Image.Image:
+    return desenhar_imagem([linha if i == indice else ' ' for i, linha in enumerate(linhas)], None)
+
+
+@pytest.fixture(scope='module')
+def registro() -> TemplateRegistry:
+    return TemplateRegistry.carregar(TEMPLATES_SINTETICOS)
+
+
+def test_carrega_templates_sinteticos(registro):
+    assert [t.nome for t in registro.templates] == ['sintetico-boleto', 'sintetico-pix']
+    assert registro.versao
+
+
+@pytest.mark.parametrize('layout', ['boleto', 'pix'])
+def test_caixas_cobrem_a_linha_do_campo(registro, layout):
+    template = registro.templates[0 if layout == 'boleto' else 1]
+    linhas = _linhas(layout)
+    for campo, indice in LINHAS_DOS_CAMPOS[layout].items():
+        imagem = _so_a_linha(linhas, indice)
+        total = _tinta(imagem)
+        assert total > 0
+        for outro, caixa in template.campos.items():
+            tinta = _tinta(recortar(imagem, caixa))
+            if outro == campo:
+                assert tinta == total, f"{layout}: {campo} não cabe na caixa"
+            else:
+                assert tinta == 0, f"{layout}: {campo} invade a caixa de {outro}"
+        assert _tinta(recortar(imagem, template.cabecalho)) == 0
+
+
+@pytest.mark.parametrize('layout, nome', [('boleto', 'sintetico-boleto'), ('pix', 'sintetico-pix')])
+def test_identifica_pelo_cabecalho(registro, layout, nome):
+    linhas = _linhas(layout)
+    imagem = desenhar_imagem(linhas, None)
+    lidos = []
+
+    def ler(recorte):
+        lidos.append(recorte.size)
+        return '\n'.join(linhas[:2])
+
+    template, cabecalho = registro.identificar(imagem, ler)
+    assert template.nome == nome
+    assert cabecalho == '\n'.join(linhas[:2])
+    # As duas faixas de cabeçalho são iguais: uma única leitura.
+    assert len(lidos) == 1
+
+
+def test_proporcao_diferente_nao_e_candidata(registro):
+    assert registro.candidatos(Image.new('L', (1000, 500))) == []
@@ -1,50 +1,346 @@
 import re
+import io
 import os
+import json
+import time
+import queue
 import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Optional
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
 import pytesseract
 from PIL import Image
 import PyPDF2
 
+from app.core.config import AppConfig
+from app.utils.ocr_cache import OCRCache, get_ocr_cache
+from app.utils.image_preprocessing import carregar_imagem, preprocessar, binarizar
+from app.utils.comprovante_templates import CAMPOS_TEMPLATE, TemplateRegistry, get_template_registry, recortar
+from app.utils.comprovante_scanner import PALAVRAS_CHAVE, Token, escanear
+from app.utils.comprovante_codigos import codigos_disponiveis, decodificar_codigos
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
 logger = logging.getLogger(__name__)
 
 
-class ComprovanteValidator:
-    
+class OCRBackend:
+    """
+    Interface dos motores de OCR usados pelo validador.
+    """
+    nome = 'base'
+
+    def disponivel(self) -> bool:
+        raise NotImplementedError
+
+    def image_to_string(self, image: Image.Image, lang: str, psm: Optional[int] = None) -> str:
+        raise NotImplementedError
+
+
+class PytesseractBackend(OCRBackend):
+    """
+    Executa o binário `tesseract` via pytesseract: um subprocesso (e uma nova
+    carga do traineddata) por chamada. Usado como fallback.
+    """
+    nome = 'pytesseract'
+
     def __init__(self):
+        self._disponivel = None
+
+    def disponivel(self) -> bool:
+        if self._disponivel is None:
+            try:
+                pytesseract.get_tesseract_version()
+                self._disponivel = True
+            except Exception:
+                self._disponivel = False
+        return self._disponivel
+
+    def image_to_string(self, image: Image.Image, lang: str, psm: Optional[int] = None) -> str:
+        config = f'--psm {psm}' if psm is not None else ''
+        return pytesseract.image_to_string(image, lang=lang, config=config)
+
+
+class TesserocrPoolBackend(OCRBackend):
+    """
+    Mantém instâncias do Tesseract (via tesserocr) inicializadas e as reutiliza
+    entre requisições. Cada processo tem seu próprio pool; as instâncias são
+    criadas sob demanda até `tamanho` e devolvidas ao pool após o uso.
+    """
+    nome = 'tesserocr'
+
+    def __init__(self, tamanho: int = 2, tessdata: Optional[str] = None):
+        self.tamanho = max(1, tamanho)
+        self.tessdata = tessdata
+        self._livres: Dict[str, queue.LifoQueue] = {}
+        self._criadas: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._disponivel = None
+
+    def disponivel(self) -> bool:
+        if self._disponivel is None:
+            try:
+                with self._engine(AppConfig.OCR_LANG):
+                    pass
+                self._disponivel = True
+            except Exception as e:
+                logger.warning(f"tesserocr indisponível: {e}")
+                self._disponivel = False
+        return self._disponivel
+
+    def _criar(self, lang: str):
+        kwargs = {'lang': lang}
+        if self.tessdata:
+            kwargs['path'] = self.tessdata
+        return tesserocr.PyTessBaseAPI(**kwargs)
+
+    @contextmanager
+    def _engine(self, lang: str):
+        with self._lock:
+            livres = self._livres.setdefault(lang, queue.LifoQueue())
+            criar = livres.empty() and self._criadas.get(lang, 0) < self.tamanho
+            if criar:
+                self._criadas[lang] = self._criadas.get(lang, 0) + 1
+
+        if criar:
+            try:
+                api = self._criar(lang)
+            except Exception:
+                with self._lock:
+                    self._criadas[lang] -= 1
+                raise
+        else:
+            api = livres.get()
+
         try:
-            pytesseract.get_tesseract_version()
-            self.tesseract_available = True
-        except Exception:
-            self.tesseract_available = False
+            yield api
+        finally:
+            api.Clear()
+            livres.put(api)
+
+    def image_to_string(self, image: Image.Image, lang: str, psm: Optional[int] = None) -> str:
+        with self._engine(lang) as api:
+            api.SetPageSegMode(psm if psm is not None else tesserocr.PSM.AUTO)
+            api.SetImage(image)
+            return api.GetUTF8Text()
+
+
+_ocr_backend_instance = None
+
+def get_ocr_backend() -> OCRBackend:
+    """
+    Seleciona o motor de OCR conforme OCR_BACKEND ('auto', 'tesserocr' ou
+    'pytesseract'). Em 'auto' usa o pool do tesserocr quando disponível.
+    """
+    global _ocr_backend_instance
+    if _ocr_backend_instance is None:
+        escolha = AppConfig.OCR_BACKEND
+        backend = None
+        if escolha in ('auto', 'tesserocr') and tesserocr is not None:
+            candidato = TesserocrPoolBackend(AppConfig.OCR_ENGINE_POOL_SIZE, AppConfig.OCR_TESSDATA_PATH)
+            if candidato.disponivel():
+                backend = candidato
+        if backend is None:
+            if escolha == 'tesserocr':
+                logger.warning("OCR_BACKEND=tesserocr indisponível; usando pytesseract")
+            backend = PytesseractBackend()
+        _ocr_backend_instance = backend
+    return _ocr_backend_instance
+
+
+class Cronometro:
+    """
+    Soma o tempo gasto em cada etapa da extração. As páginas de PDF passam
+    por OCR em paralelo, então o total das etapas pode exceder o tempo real.
+    """
+
+    def __init__(self):
+        self.tempos: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def etapa(self, nome: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            decorrido = time.perf_counter() - inicio
+            with self._lock:
+                self.tempos[nome] = self.tempos.get(nome, 0.0) + decorrido
+
+
+# Incrementar quando a extração mudar de forma que invalide textos em cache.
+VERSAO_EXTRATOR = 5
+
+
+@dataclass(frozen=True)
+class OCRSettings:
+    """
+    Parâmetros que influenciam o texto extraído.
+
+    Fazem parte da chave do cache de OCR.
+    """
+    lang: str = AppConfig.OCR_LANG
+    preprocessar: bool = AppConfig.OCR_PREPROCESS
+    max_pixels: int = AppConfig.OCR_PIXEL_BUDGET
+    max_pixels_alta: int = AppConfig.OCR_PIXEL_BUDGET_HIGH
+    pdf_dpi: int = AppConfig.OCR_PDF_DPI
+    pdf_dpi_alta: int = AppConfig.OCR_PDF_DPI_HIGH
+    pdf_max_paginas_ocr: int = AppConfig.OCR_PDF_MAX_PAGES
+    psm: Optional[int] = AppConfig.OCR_PSM
+    decodificar_codigos: bool = AppConfig.OCR_DECODE_CODES
+
+    def assinatura(self) -> str:
+        dados = asdict(self)
+        # Sem o zbar a leitura de códigos não acontece; o texto é o do OCR.
+        dados['decodificar_codigos'] = self.decodificar_codigos and codigos_disponiveis()
+        return json.dumps({'versao': VERSAO_EXTRATOR, **dados}, sort_keys=True)
+
+
+@dataclass
+class ReceiptDocument:
+    """
+    Resultado da extração de um comprovante.
+
+    O arquivo passa por OCR uma única vez e o texto é varrido uma única vez;
+    validador e serviço trabalham somente sobre este objeto.
+    """
+    caminho: str
+    texto: str = ''
+    tokens: List[Token] = field(default_factory=list)
+    cpf: Optional[str] = None
+    cpfs: List[str] = field(default_factory=list)
+    data_pagamento: Optional[datetime] = None
+    data_vencimento: Optional[datetime] = None
+    comprovacao_pagamento: bool = False
+    datas: List[datetime] = field(default_factory=list)
+    valores: List[float] = field(default_factory=list)
+    linhas_digitaveis: List[str] = field(default_factory=list)
+    palavras_chave: List[str] = field(default_factory=list)
+    tempos: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def legivel(self) -> bool:
+        return len(self.texto.strip()) >= 20
+
+    def campos(self) -> Dict:
+        """Campos extraídos em formato JSON (sem texto e tokens), para persistência."""
+        def dia(data: Optional[datetime]) -> Optional[str]:
+            return data.date().isoformat() if data else None
+        
+        return {
+            'versao_extrator': VERSAO_EXTRATOR,
+            'cpf': self.cpf,
+            'cpfs': self.cpfs,
+            'data_pagamento': dia(self.data_pagamento),
+            'data_vencimento': dia(self.data_vencimento),
+            'comprovacao_pagamento': self.comprovacao_pagamento,
+            'datas': [dia(d) for d in self.datas],
+            'valores': self.valores,
+            'linhas_digitaveis': self.linhas_digitaveis,
+            'palavras_chave': self.palavras_chave,
+            'tempos_ms': {etapa: round(segundos * 1000, 1) for etapa, segundos in self.tempos.items()},
+        }
+
+
+class ComprovanteValidator:
+    
+    def __init__(
+        self,
+        settings: Optional[OCRSettings] = None,
+        cache: Optional[OCRCache] = None,
+        ocr: Optional[OCRBackend] = None,
+        templates: Optional[TemplateRegistry] = None
+    ):
+        self.settings = settings or OCRSettings()
+        self.cache = cache if cache is not None else get_ocr_cache()
+        self.ocr = ocr or get_ocr_backend()
+        self.templates = templates if templates is not None else get_template_registry()
     
+    @property
+    def tesseract_available(self) -> bool:
+        return self.ocr.disponivel()
+    
+    def extrair_documento(self, file_path: str) -> ReceiptDocument:
+        """Lê o arquivo uma vez e extrai o documento a partir dos bytes."""
+        file_path = Path(file_path)
+        try:
+            conteudo = file_path.read_bytes()
+        except OSError as e:
+            logger.error(f"Erro ao ler comprovante: {e}")
+            conteudo = b''
+        return self.extrair_documento_bytes(conteudo, file_path.suffix, str(file_path))
+
+    def extrair_documento_bytes(self, conteudo: bytes, extensao: str, caminho: str = '') -> ReceiptDocument:
+        """
+        Extrai o texto do comprovante uma única vez e interpreta todos os campos.
+        O conteúdo é lido da memória (PDF, rasterização e imagem), sem arquivo
+        temporário. `tempos` traz os segundos gastos em cada etapa (cache,
+        texto_pdf, rasterizacao, codigos, preprocessamento, ocr, varredura).
+        """
+        cronometro = Cronometro()
+        texto = self._extrair_texto(conteudo, extensao.lower(), cronometro) or ''
+        return self.interpretar_texto(texto, caminho, cronometro)
+
+    def interpretar_texto(self, texto: str, caminho: str = '', cronometro: Optional[Cronometro] = None) -> ReceiptDocument:
+        """
+        Interpreta um texto já extraído, como o persistido com o comprovante,
+        sem ler o arquivo.
+        """
+        cronometro = cronometro or Cronometro()
+        documento = ReceiptDocument(caminho=caminho, texto=texto, tempos=cronometro.tempos)
+
+        if len(texto.strip()) < 10:
+            return documento
+
+        with cronometro.etapa('varredura'):
+            varredura = escanear(texto)
+        documento.tokens = varredura.tokens
+        documento.cpf = varredura.cpf
+        documento.cpfs = varredura.cpfs
+        documento.data_pagamento = varredura.data_rotulada('pagamento')
+        documento.data_vencimento = varredura.data_rotulada('vencimento')
+        documento.comprovacao_pagamento = varredura.comprova_pagamento
+        documento.datas = varredura.datas
+        documento.valores = varredura.valores
+        documento.linhas_digitaveis = varredura.linhas_digitaveis
+        documento.palavras_chave = varredura.palavras_chave
+        return documento
+
     def validar_comprovante(
         self,
-        file_path: str = None,
-        caminho_arquivo: str = None,
+        documento: ReceiptDocument,
         cpf_esperado: str = None,
         valor_esperado: float = None,
         linha_digitavel_esperada: str = None,
         data_vencimento_esperada: datetime = None,
-        tolerancia_dias: int = 30
+        tolerancia_dias: int = 30,
+        referencia: Optional[datetime] = None
     ) -> Dict:
         """
-        Valida um comprovante de pagamento via OCR.
+        Valida um comprovante de pagamento já extraído.
+        
+        `referencia` é o instante contra o qual a data do pagamento é conferida
+        (padrão: agora); revalidações usam a data de recebimento.
         """
-        path = file_path or caminho_arquivo
-        if not path:
+        if documento is None:
             return {
                 'valido': False,
-                'mensagem': 'Caminho do arquivo não fornecido.',
+                'mensagem': 'Comprovante não fornecido.',
                 'detalhes': {}
             }
         
         try:
-            texto = self._extrair_texto(path)
+            texto = documento.texto
             
-            if not texto or len(texto.strip()) < 20:
+            if not documento.legivel:
                 return {
                     'valido': False,
                     'mensagem': 'Comprovante ilegível ou vazio.',
@@ -52,21 +348,28 @@ class ComprovanteValidator:
                 }
             
             validacoes = {
-                'cpf': self._validar_cpf_no_texto(texto, cpf_esperado),
-                'valor': self._validar_valor_no_texto(texto, valor_esperado),
-                'data': self._validar_data_pagamento(texto, tolerancia_dias),
-                'palavras_chave': self._validar_palavras_chave(texto)
+                'cpf': self._validar_cpf_no_texto(documento, cpf_esperado),
+                'valor': self._validar_valor_no_texto(documento, valor_esperado),
+                'data': self._validar_data_pagamento(documento, tolerancia_dias, referencia),
+                'palavras_chave': self._validar_palavras_chave(documento)
             }
             
             if linha_digitavel_esperada:
-                validacoes['linha_digitavel'] = self._validar_linha_digitavel_no_texto(texto, linha_digitavel_esperada)
+                validacoes['linha_digitavel'] = self._validar_linha_digitavel_no_texto(documento, linha_digitavel_esperada)
             
             if data_vencimento_esperada:
-                validacoes['data_vencimento'] = self._validar_data_vencimento(texto, data_vencimento_esperada)
+                validacoes['data_vencimento'] = self._validar_data_vencimento(documento, data_vencimento_esperada)
+            
+            validacoes['comprovacao_pagamento'] = self._validar_comprovacao_pagamento(documento)
             
             validacoes_passadas = sum(1 for v in validacoes.values() if v['valido'])
             total_validacoes = len(validacoes)
-            valido_geral = validacoes_passadas >= min(3, total_validacoes)
+            # Sem data de pagamento ou autenticação, o arquivo pode ser o
+            # próprio boleto em aberto, com CPF, valor e linha corretos.
+            valido_geral = (
+                validacoes_passadas >= min(3, total_validacoes)
+                and validacoes['comprovacao_pagamento']['valido']
+            )
             
             if valido_geral:
                 mensagem = 'Comprovante validado com sucesso.'
@@ -91,80 +394,235 @@ class ComprovanteValidator:
                 'detalhes': {'erro': str(e)}
             }
     
-    def extrair_texto(self, file_path: str) -> str:
-        return self._extrair_texto(file_path)
-    
-    def _extrair_texto(self, file_path: str) -> str:
-        file_path = Path(file_path)
-        extensao = file_path.suffix.lower()
-        
+    def _extrair_texto(self, conteudo: bytes, extensao: str, cronometro: Cronometro) -> str:
+        if not conteudo:
+            return ''
+        with cronometro.etapa('cache'):
+            configuracao = f"{self.settings.assinatura()}|{self.ocr.nome}"
+            if self.templates.versao:
+                configuracao += f"|templates:{self.templates.versao}"
+            chave = self.cache.gerar_chave(conteudo, configuracao)
+            texto = self.cache.obter(chave)
+        if texto is not None:
+            return texto
+
+        inicio = time.perf_counter()
+        texto = self._extrair_texto_conteudo(conteudo, extensao, cronometro)
+        if texto and texto.strip():
+            self.cache.salvar(chave, texto, time.perf_counter() - inicio)
+        return texto
+
+    def _extrair_texto_conteudo(self, conteudo: bytes, extensao: str, cronometro: Cronometro) -> str:
         try:
             if extensao == '.pdf':
-                return self._extrair_texto_pdf(file_path)
-            elif extensao in ['.jpg', '.jpeg', '.png']:
-                return self._extrair_texto_imagem(file_path)
+                return self._extrair_texto_pdf(conteudo, cronometro)
+            elif extensao in ['.jpg', '.jpeg', '.png', '.webp']:
+                return self._extrair_texto_imagem(conteudo, cronometro)
             else:
                 return ''
         except Exception as e:
             logger.error(f"Erro ao extrair texto: {e}")
             return ''
     
-    def _extrair_texto_pdf(self, file_path: Path) -> str:
-        texto = ''
+    def _extrair_texto_pdf(self, conteudo: bytes, cronometro: Cronometro) -> str:
+        """
+        Extrai o PDF página a página, usando a camada de texto quando existe.
+        Páginas sem texto (digitalizadas) são rasterizadas e passam por OCR em
+        paralelo, em lotes; a extração para assim que CPF, valor e data foram
+        encontrados.
+        """
+        paginas: Dict[int, str] = {}
+        encontrados = set()
         try:
-            with open(file_path, 'rb') as f:
-                reader = PyPDF2.PdfReader(f)
-                for page in reader.pages:
-                    texto += page.extract_text() + '\n'
+            sem_texto = []
+            reader = PyPDF2.PdfReader(io.BytesIO(conteudo))
+            for numero, page in enumerate(reader.pages, start=1):
+                with cronometro.etapa('texto_pdf'):
+                    texto_pagina = page.extract_text() or ''
+                if len(texto_pagina.strip()) < 20:
+                    sem_texto.append(numero)
+                    continue
+                paginas[numero] = texto_pagina
+                encontrados |= self._campos_obrigatorios(texto_pagina, cronometro)
+                if len(encontrados) == 3:
+                    break
             
-            if len(texto.strip()) < 20:
-                try:
-                    from pdf2image import convert_from_path
-                    images = convert_from_path(str(file_path), first_page=1, last_page=1)
-                    if images:
-                        texto = pytesseract.image_to_string(images[0], lang='por')
-                except ImportError:
-                    logger.error("pdf2image não disponível para fallback OCR")
-                except Exception as e:
-                    logger.error(f"Erro no fallback OCR: {e}")
+            if sem_texto and len(encontrados) < 3:
+                self._ocr_paginas_pdf(
+                    conteudo, sem_texto[:self.settings.pdf_max_paginas_ocr], paginas, encontrados, cronometro
+                )
         except Exception as e:
             logger.error(f"Erro ao extrair texto do PDF: {e}")
-        return texto
+        return '\n'.join(paginas[n] for n in sorted(paginas))
     
-    def _extrair_texto_imagem(self, file_path: Path) -> str:
+    def _ocr_paginas_pdf(
+        self,
+        conteudo: bytes,
+        numeros: List[int],
+        paginas: Dict[int, str],
+        encontrados: set,
+        cronometro: Cronometro
+    ) -> None:
         try:
-            image = Image.open(file_path)
-            texto = pytesseract.image_to_string(image, lang='por')
-            return texto
+            from pdf2image import convert_from_bytes
+        except ImportError:
+            logger.error("pdf2image não disponível para fallback OCR")
+            return
+        
+        def ocr_pagina(numero: int) -> str:
+            def renderizar(alta: bool) -> Optional[Image.Image]:
+                dpi = self.settings.pdf_dpi_alta if alta else self.settings.pdf_dpi
+                with cronometro.etapa('rasterizacao'):
+                    images = convert_from_bytes(
+                        conteudo, dpi=dpi, first_page=numero, last_page=numero, grayscale=True
+                    )
+                return images[0] if images else None
+            
+            try:
+                return self._ocr_adaptativo(renderizar, cronometro)
+            except Exception as e:
+                logger.error(f"Erro no OCR da página {numero}: {e}")
+                return ''
+        
+        threads = max(1, AppConfig.OCR_PDF_THREADS)
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for inicio in range(0, len(numeros), threads):
+                lote = numeros[inicio:inicio + threads]
+                for numero, texto_pagina in zip(lote, executor.map(ocr_pagina, lote)):
+                    if texto_pagina.strip():
+                        paginas[numero] = texto_pagina
+                        encontrados |= self._campos_obrigatorios(texto_pagina, cronometro)
+                if len(encontrados) == 3:
+                    break
+    
+    def _extrair_texto_imagem(self, conteudo: bytes, cronometro: Cronometro) -> str:
+        try:
+            reduzida = False
+            
+            def renderizar(alta: bool) -> Optional[Image.Image]:
+                nonlocal reduzida
+                if alta and not reduzida:
+                    return None
+                with cronometro.etapa('rasterizacao'):
+                    if alta:
+                        image, _ = carregar_imagem(io.BytesIO(conteudo), self.settings.max_pixels_alta)
+                    else:
+                        image, reduzida = carregar_imagem(io.BytesIO(conteudo), self.settings.max_pixels)
+                return image
+            
+            return self._ocr_adaptativo(renderizar, cronometro)
         except Exception as e:
             logger.error(f"Erro ao extrair texto da imagem: {e}")
             return ''
     
-    def _validar_cpf_no_texto(self, texto: str, cpf_esperado: str) -> Dict:
+    def _ocr_adaptativo(self, renderizar, cronometro: Cronometro) -> str:
+        """
+        Executa um OCR rápido em baixa resolução e só repete em alta resolução
+        quando CPF, valor ou data não foram encontrados. `renderizar(alta)`
+        devolve a imagem da passada ou None se não houver resolução maior.
+        Antes do OCR, QR codes e códigos de barras são decodificados e seus
+        campos entram no texto junto com o do OCR, nunca no lugar dele: o
+        código de um boleto não prova que ele foi pago.
+        Se a imagem casar com um template conhecido, só as regiões dos campos
+        passam por OCR.
+        """
+        melhor_texto, melhor_campos = '', -1
+        texto_codigos = ''
+        for alta in (False, True):
+            image = renderizar(alta)
+            if image is None:
+                break
+            entrada = image
+            try:
+                if not alta and self.settings.decodificar_codigos:
+                    with cronometro.etapa('codigos'):
+                        codigos = decodificar_codigos(image)
+                    texto_codigos = '\n'.join(c.como_texto() for c in codigos)
+                if not alta and self.templates.templates:
+                    texto = self._ocr_por_template(image, cronometro)
+                    if texto is not None:
+                        return '\n'.join(filter(None, (texto_codigos, texto)))
+                if self.settings.preprocessar:
+                    with cronometro.etapa('preprocessamento'):
+                        entrada = preprocessar(image)
+                with cronometro.etapa('ocr'):
+                    texto = self.ocr.image_to_string(entrada, self.settings.lang, psm=self.settings.psm)
+            finally:
+                image.close()
+                entrada.close()
+            
+            if texto_codigos:
+                texto = f"{texto_codigos}\n{texto}"
+            campos = len(self._campos_obrigatorios(texto, cronometro))
+            if campos >= melhor_campos:
+                melhor_texto, melhor_campos = texto, campos
+            if campos == 3:
+                break
+        return melhor_texto
+    
+    def _ocr_por_template(self, image: Image.Image, cronometro: Cronometro) -> Optional[str]:
+        """
+        OCR apenas das regiões do template reconhecido (cabeçalho em bloco,
+        campos como linha única), com o texto de cada recorte como foi lido.
+        Retorna None quando nenhum template casa, quando o recorte de algum
+        campo não traz o que deveria ou quando falta algum campo obrigatório,
+        para cair na página inteira.
+        """
+        def ler(recorte: Image.Image, psm: int) -> str:
+            entrada = recorte
+            try:
+                if self.settings.preprocessar:
+                    with cronometro.etapa('preprocessamento'):
+                        entrada = binarizar(recorte)
+                with cronometro.etapa('ocr'):
+                    return self.ocr.image_to_string(entrada, self.settings.lang, psm=psm)
+            finally:
+                recorte.close()
+                entrada.close()
+        
+        template, cabecalho = self.templates.identificar(image, lambda recorte: ler(recorte, 6))
+        if template is None:
+            return None
+        
+        linhas = [cabecalho.strip()]
+        for campo, caixa in template.campos.items():
+            lido = ler(recortar(image, caixa), 7).strip()
+            with cronometro.etapa('varredura'):
+                encontrado = CAMPOS_TEMPLATE[campo](escanear(lido))
+            if not encontrado:
+                logger.info(f"Template {template.nome}: recorte de {campo} sem o campo; usando a página inteira")
+                return None
+            linhas.append(lido)
+        texto = '\n'.join(linhas)
+        
+        if len(self._campos_obrigatorios(texto, cronometro)) < 3:
+            logger.info(f"Template {template.nome} reconhecido, mas sem todos os campos; usando a página inteira")
+            return None
+        return texto
+    
+    def _campos_obrigatorios(self, texto: str, cronometro: Cronometro) -> set:
+        """Quais dos campos obrigatórios (cpf, valor, data) aparecem no texto."""
+        with cronometro.etapa('varredura'):
+            return escanear(texto).campos_obrigatorios
+    
+    def _validar_cpf_no_texto(self, documento: ReceiptDocument, cpf_esperado: str) -> Dict:
         cpf_limpo = re.sub(r'\D', '', cpf_esperado)
         cpf_formatado = f'{cpf_limpo[:3]}.{cpf_limpo[3:6]}.{cpf_limpo[6:9]}-{cpf_limpo[9:]}'
-        encontrado = cpf_limpo in texto or cpf_formatado in texto
+        encontrado = documento.cpf == cpf_limpo or cpf_limpo in documento.cpfs
         return {
             'valido': encontrado,
             'mensagem': 'CPF encontrado' if encontrado else 'CPF não encontrado',
             'valor_procurado': cpf_formatado
         }
     
-    def _validar_valor_no_texto(self, texto: str, valor_esperado: float) -> Dict:
+    def _validar_valor_no_texto(self, documento: ReceiptDocument, valor_esperado: float) -> Dict:
         valor_str1 = f'{valor_esperado:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
-        valor_str2 = f'{valor_esperado:.2f}'.replace('.', ',')
         valor_str3 = f'R$ {valor_str1}'
-        valor_str4 = f'R$ {valor_str2}'
-        
-        encontrado = any(v in texto for v in [valor_str1, valor_str2, valor_str3, valor_str4])
         
-        if not encontrado:
-            valores_no_texto = re.findall(r'R?\$?\s*(\d{1,3}(?:\.\d{3})*,\d{2})', texto)
-            for v in valores_no_texto:
-                v_num = float(v.replace('.', '').replace(',', '.'))
-                if abs(v_num - valor_esperado) / valor_esperado <= 0.01:
-                    encontrado = True
-                    break
+        encontrado = any(
+            abs(v - valor_esperado) / valor_esperado <= 0.01
+            for v in documento.valores
+        ) if valor_esperado else False
         
         return {
             'valido': encontrado,
@@ -172,13 +630,12 @@ class ComprovanteValidator:
             'valor_procurado': valor_str3
         }
     
-    def _validar_linha_digitavel_no_texto(self, texto: str, linha_digitavel: str) -> Dict:
-        linha_limpa = re.sub(r'[\s\.]', '', linha_digitavel)
-        texto_limpo = re.sub(r'[\s\.]', '', texto)
-        encontrado = linha_limpa in texto_limpo
+    def _validar_linha_digitavel_no_texto(self, documento: ReceiptDocument, linha_digitavel: str) -> Dict:
+        linha_limpa = re.sub(r'\D', '', linha_digitavel)
+        encontrado = any(linha_limpa in linha for linha in documento.linhas_digitaveis)
         
         if not encontrado and len(linha_limpa) >= 15:
-            encontrado = linha_limpa[:15] in texto_limpo
+            encontrado = any(linha_limpa[:15] in linha for linha in documento.linhas_digitaveis)
         
         return {
             'valido': encontrado,
@@ -186,24 +643,10 @@ class ComprovanteValidator:
             'valor_procurado': linha_digitavel[:20] + '...'
         }
     
-    def _validar_data_pagamento(self, texto: str, tolerancia_dias: int) -> Dict:
-        padroes = [
-            r'(\d{2})[/-](\d{2})[/-](\d{4})',
-            r'(\d{2})[/-](\d{2})[/-](\d{2})',
-        ]
+    def _validar_data_pagamento(self, documento: ReceiptDocument, tolerancia_dias: int, referencia: Optional[datetime] = None) -> Dict:
+        datas_encontradas = documento.datas
         
-        datas_encontradas = []
-        for padrao in padroes:
-            matches = re.findall(padrao, texto)
-            for match in matches:
-                try:
-                    ano = int(match[2]) + 2000 if len(match[2]) == 2 else int(match[2])
-                    data = datetime(ano, int(match[1]), int(match[0]))
-                    datas_encontradas.append(data)
-                except ValueError:
-                    continue
-        
-        agora = datetime.now()
+        agora = referencia or datetime.now()
         data_valida = any(abs((agora - data).days) <= tolerancia_dias for data in datas_encontradas)
         
         return {
@@ -212,31 +655,10 @@ class ComprovanteValidator:
             'datas_encontradas': [d.strftime('%d/%m/%Y') for d in datas_encontradas[:3]]
         }
     
-    def _validar_data_vencimento(self, texto: str, data_vencimento_esperada: datetime) -> Dict:
-        padroes = [
-            r'(?:data|pagamento|pago em|realizado em)[:\s]*(\d{2})[/-](\d{2})[/-](\d{4})',
-            r'(\d{2})[/-](\d{2})[/-](\d{4})',
-            r'(\d{2})[/-](\d{2})[/-](\d{2})',
-        ]
-        
-        data_pagamento = None
-        for padrao in padroes:
-            matches = re.findall(padrao, texto, re.IGNORECASE)
-            for match in matches:
-                try:
-                    if len(match[2]) == 2:
-                        ano = int(match[2]) + 2000
-                    else:
-                        ano = int(match[2])
-                    data = datetime(ano, int(match[1]), int(match[0]))
-                    
-                    if 2020 <= data.year <= 2030:
-                        data_pagamento = data
-                        break
-                except (ValueError, IndexError):
-                    continue
-            if data_pagamento:
-                break
+    def _validar_data_vencimento(self, documento: ReceiptDocument, data_vencimento_esperada: datetime) -> Dict:
+        data_pagamento = documento.data_pagamento
+        if data_pagamento and not 2020 <= data_pagamento.year <= 2030:
+            data_pagamento = None
         
         if not data_pagamento:
             return {
@@ -280,125 +702,22 @@ class ComprovanteValidator:
             'data_pagamento': data_pagamento.strftime('%d/%m/%Y')
         }
     
-    def _validar_palavras_chave(self, texto: str) -> Dict:
-        texto_lower = texto.lower()
-        palavras_chave = [
-            'comprovante', 'pagamento', 'transferência', 'pix', 'boleto',
-            'quitação', 'valor', 'data', 'autenticação', 'banco', 'agência', 'conta'
-        ]
-        encontradas = [p for p in palavras_chave if p in texto_lower]
+    def _validar_comprovacao_pagamento(self, documento: ReceiptDocument) -> Dict:
+        comprovado = documento.comprovacao_pagamento
+        return {
+            'valido': comprovado,
+            'mensagem': 'Data de pagamento ou autenticação encontrada' if comprovado
+            else 'Sem data de pagamento nem autenticação: o arquivo pode ser o boleto em aberto'
+        }
+    
+    def _validar_palavras_chave(self, documento: ReceiptDocument) -> Dict:
+        encontradas = documento.palavras_chave
         score = len(encontradas)
         return {
             'valido': score >= 3,
             'mensagem': f'{score} palavras-chave encontradas',
             'palavras_encontradas': encontradas[:5]
         }
-    
-    def extrair_cpf_do_comprovante(self, file_path: str) -> Optional[str]:
-        try:
-            texto = self._extrair_texto(file_path)
-            if not texto or len(texto.strip()) < 10:
-                return None
-            return self._buscar_cpf_no_texto(texto)
-        except Exception as e:
-            logger.error(f"Erro ao extrair CPF: {e}")
-            return None
-        
-    def extrair_data_do_pagamento(self, file_path: str) -> Optional[datetime]:
-        try:
-            texto = self._extrair_texto(file_path)
-            if not texto or len(texto.strip()) < 10:
-                return None
-            keywords = [
-                'data do pagamento', 'data pagamento', 'data de pagamento',
-                'data do recibo', 'pago em', 'pagamento realizado', 'data pagamento:'
-            ]
-
-            for line in texto.splitlines():
-                low = line.lower()
-                if any(k in low for k in keywords):
-                    m = re.search(r'(\d{2})[/-](\d{2})[/-](\d{4})', line)
-                    if m:
-                        try:
-                            dia, mes, ano = int(m.group(1)), int(m.group(2)), int(m.group(3))
-                            return datetime(ano, mes, dia)
-                        except ValueError:
-                            continue
-
-            padroes = [
-                r'(\d{2})[/-](\d{2})[/-](\d{4})',
-                r'(\d{2})[/-](\d{2})[/-](\d{2})',
-            ]
-
-            for padrao in padroes:
-                matches = re.findall(padrao, texto)
-                for match in matches:
-                    try:
-                        ano = int(match[2]) + 2000 if len(match[2]) == 2 else int(match[2])
-                        data = datetime(ano, int(match[1]), int(match[0]))
-                        return data
-                    except ValueError:
-                        continue
-            return None
-        except Exception as e:
-            logger.error(f"Erro ao extrair data: {e}")
-            return None
-
-    def extrair_data_de_vencimento(self, file_path: str) -> Optional[datetime]:
-        try:
-            texto = self._extrair_texto(file_path)
-            if not texto or len(texto.strip()) < 10:
-                return None
-
-            keywords = ['vencimento', 'venc.', 'venc']
-            for line in texto.splitlines():
-                low = line.lower()
-                if any(k in low for k in keywords):
-                    m = re.search(r'(\d{2})[/-](\d{2})[/-](\d{4})', line)
-                    if m:
-                        try:
-                            dia, mes, ano = int(m.group(1)), int(m.group(2)), int(m.group(3))
-                            return datetime(ano, mes, dia)
-                        except ValueError:
-                            continue
-
-            padroes = [r'(\d{2})[/-](\d{2})[/-](\d{4})', r'(\d{2})[/-](\d{2})[/-](\d{2})']
-            for padrao in padroes:
-                matches = re.findall(padrao, texto)
-                for match in matches:
-                    try:
-                        ano = int(match[2]) + 2000 if len(match[2]) == 2 else int(match[2])
-                        data = datetime(ano, int(match[1]), int(match[0]))
-                        return data
-                    except Exception:
-                        continue
-            return None
-        except Exception as e:
-            logger.error(f"Erro ao extrair data de vencimento: {e}")
-            return None
-    
-    def _buscar_cpf_no_texto(self, texto: str) -> Optional[str]:
-        if not texto:
-            return None
-            
-        texto_limpo = texto.replace('\n', ' ').replace('\r', ' ')
-        
-        patterns = [
-            r'CPF\s*[:\s]*\s*(\d{3}[\.\s]?\d{3}[\.\s]?\d{3}[\-\s]?\d{2})',
-            r'(?:CPF|cpf)\s*(?:do\s+pagador)?[:\s]*\s*(\d{3}[\.\s]?\d{3}[\.\s]?\d{3}[\-\s]?\d{2})',
-            r'\b(\d{3}\.?\d{3}\.?\d{3}\-?\d{2})\b',
-            r'\b(\d{11})\b',
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, texto_limpo, re.IGNORECASE)
-            if matches:
-                cpf_bruto = matches[0]
-                cpf_numeros = re.sub(r'[^\d]', '', cpf_bruto)
-                if len(cpf_numeros) == 11:
-                    return cpf_numeros
-        
-        return None
 
 
 _validator_instance = None
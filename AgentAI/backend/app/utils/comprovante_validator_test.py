@@ -0,0 +1,170 @@
+from datetime import datetime
+
+from PIL import Image
+
+from app.utils import comprovante_validator
+from app.utils.comprovante_codigos import interpretar
+from app.utils.comprovante_templates import ReceiptTemplate, TemplateRegistry
+from app.utils.comprovante_validator import ComprovanteValidator, Cronometro, OCRBackend, OCRSettings
+
+
+LINHA = "23791234546789012345767890123457913810000015000"
+CPF = "12345678909"
+
+
+class OCRFixo(OCRBackend):
+    nome = 'fixo'
+
+    def __init__(self, texto: str):
+        self.texto = texto
+        self.chamadas = 0
+
+    def disponivel(self) -> bool:
+        return True
+
+    def image_to_string(self, image, lang, psm=None) -> str:
+        self.chamadas += 1
+        return self.texto
+
+
+class OCRSequencia(OCRBackend):
+    """Devolve os textos na ordem das chamadas e anota o tamanho de cada imagem."""
+    nome = 'sequencia'
+
+    def __init__(self, *textos: str):
+        self.textos = list(textos)
+        self.tamanhos = []
+
+    def disponivel(self) -> bool:
+        return True
+
+    def image_to_string(self, image, lang, psm=None) -> str:
+        self.tamanhos.append(image.size)
+        return self.textos.pop(0)
+
+
+TEMPLATE = ReceiptTemplate(
+    nome='teste',
+    palavras_cabecalho=('pagamento', 'boleto'),
+    proporcao=1.0,
+    campos={
+        'data_pagamento': (0.0, 0.2, 1.0, 0.3),
+        'valor': (0.0, 0.3, 1.0, 0.4),
+        'cpf': (0.0, 0.4, 1.0, 0.5),
+    },
+    cabecalho=(0.0, 0.0, 1.0, 0.1),
+)
+
+
+def _validator(
+    ocr: OCRBackend,
+    tmp_path,
+    templates: TemplateRegistry = None,
+    decodificar_codigos: bool = False
+) -> ComprovanteValidator:
+    return ComprovanteValidator(
+        settings=OCRSettings(preprocessar=False, decodificar_codigos=decodificar_codigos),
+        cache=comprovante_validator.OCRCache(tmp_path),
+        ocr=ocr,
+        templates=templates or TemplateRegistry()
+    )
+
+
+def _pagina(alta: bool):
+    return None if alta else Image.new('L', (100, 100), 255)
+
+
+def _validar(validator: ComprovanteValidator, texto: str) -> dict:
+    return validator.validar_comprovante(
+        validator.interpretar_texto(texto),
+        cpf_esperado=CPF,
+        valor_esperado=150.0,
+        linha_digitavel_esperada=LINHA,
+        data_vencimento_esperada=datetime(2026, 3, 10),
+        referencia=datetime(2026, 3, 9)
+    )
+
+
+def test_codigo_decodificado_nao_dispensa_o_ocr(tmp_path, monkeypatch):
+    ocr = OCRFixo("Comprovante de pagamento\nCPF 123.456.789-09")
+    monkeypatch.setattr(comprovante_validator, 'decodificar_codigos', lambda imagem: [interpretar(LINHA)])
+
+    validator = _validator(ocr, tmp_path, decodificar_codigos=True)
+    texto = validator._ocr_adaptativo(lambda alta: Image.new('L', (10, 10)), Cronometro())
+
+    assert ocr.chamadas >= 1
+    assert f"Linha digitável: {LINHA}" in texto
+    assert "CPF 123.456.789-09" in texto
+
+
+def test_boleto_em_aberto_nao_passa(tmp_path):
+    # Texto do próprio boleto: código de barras e OCR com CPF, valor e vencimento.
+    texto = interpretar(LINHA).como_texto() + (
+        "\nEmpresa Exemplo\nCPF do pagador: 123.456.789-09\nVencimento: 10/03/2026\n"
+        "Valor: R$ 150,00\nBoleto gerado em 01/03/2026"
+    )
+    validator = _validator(OCRFixo(''), tmp_path)
+    resultado = _validar(validator, texto)
+
+    assert validator.interpretar_texto(texto).data_pagamento == datetime(2026, 3, 1)
+    assert not resultado['valido']
+    assert not resultado['detalhes']['validacoes']['comprovacao_pagamento']['valido']
+
+
+def test_comprovante_com_data_de_pagamento_passa(tmp_path):
+    texto = interpretar(LINHA).como_texto() + (
+        "\nComprovante de pagamento\nCPF: 123.456.789-09\nValor pago: R$ 150,00\n"
+        "Data do pagamento: 09/03/2026"
+    )
+    resultado = _validar(_validator(OCRFixo(''), tmp_path), texto)
+
+    assert resultado['valido'], resultado['mensagem']
+    assert resultado['detalhes']['validacoes']['comprovacao_pagamento']['valido']
+
+
+def test_autenticacao_comprova_pagamento(tmp_path):
+    texto = "Comprovante\nCPF: 123.456.789-09\nValor R$ 150,00\nAutenticação: 8F2A.11C0.99D3"
+    assert _validator(OCRFixo(''), tmp_path).interpretar_texto(texto).comprovacao_pagamento
+
+
+def test_template_le_so_os_recortes_sem_acrescentar_rotulos(tmp_path):
+    ocr = OCRSequencia(
+        "Banco Exemplo\nComprovante de pagamento de boleto",
+        "Data do pagamento: 09/03/2026",
+        "Valor: R$ 150,00",
+        "CPF do pagador: 123.456.789-09",
+    )
+    validator = _validator(ocr, tmp_path, TemplateRegistry([TEMPLATE], 'v1'))
+
+    texto = validator._ocr_adaptativo(_pagina, Cronometro())
+
+    assert texto == '\n'.join([
+        "Banco Exemplo\nComprovante de pagamento de boleto",
+        "Data do pagamento: 09/03/2026",
+        "Valor: R$ 150,00",
+        "CPF do pagador: 123.456.789-09",
+    ])
+    assert ocr.tamanhos == [(100, 10), (100, 10), (100, 10), (100, 10)]
+
+
+def test_recorte_sem_o_campo_cai_na_pagina_inteira(tmp_path):
+    pagina = "Comprovante de pagamento\nData do pagamento: 09/03/2026\nValor R$ 150,00\nCPF 123.456.789-09"
+    ocr = OCRSequencia(
+        "Comprovante de pagamento de boleto",
+        "Data do pagamento: 09/03/2026",
+        "Valor: R$",
+        pagina,
+    )
+    validator = _validator(ocr, tmp_path, TemplateRegistry([TEMPLATE], 'v1'))
+
+    assert validator._ocr_adaptativo(_pagina, Cronometro()) == pagina
+    assert ocr.tamanhos[-1] == (100, 100)
+
+
+def test_sem_template_reconhecido_cai_na_pagina_inteira(tmp_path):
+    pagina = "Comprovante Pix\nPago em 09/03/2026\nValor R$ 150,00\nCPF 123.456.789-09"
+    ocr = OCRSequencia("Comprovante de transferência Pix", pagina)
+    validator = _validator(ocr, tmp_path, TemplateRegistry([TEMPLATE], 'v1'))
+
+    assert validator._ocr_adaptativo(_pagina, Cronometro()) == pagina
+    assert ocr.tamanhos == [(100, 10), (100, 100)]
@@ -0,0 +1,175 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.core.config import AppConfig
+
+logger = logging.getLogger(__name__)
+
+
+class OCRCache:
+    """
+    Cache endereçado por conteúdo para o texto extraído dos comprovantes.
+
+    A chave é o hash dos bytes do arquivo somado às configurações de OCR.
+    Há uma camada em memória (LRU limitada por quantidade de itens) e uma
+    camada em disco (limitada por tamanho, removendo os arquivos mais antigos).
+    """
+
+    def __init__(self, diretorio: Path, max_itens_memoria: int = 256, max_bytes_disco: int = 200 * 1024 * 1024):
+        self.diretorio = Path(diretorio)
+        self.max_itens_memoria = max_itens_memoria
+        self.max_bytes_disco = max_bytes_disco
+
+        self._memoria: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes_disco = None
+
+        self._hits_memoria = 0
+        self._hits_disco = 0
+        self._misses = 0
+        self._segundos_economizados = 0.0
+
+    @staticmethod
+    def gerar_chave(conteudo: bytes, configuracao: str) -> str:
+        h = hashlib.sha256(conteudo)
+        h.update(b'\0')
+        h.update(configuracao.encode('utf-8'))
+        return h.hexdigest()
+
+    def _caminho(self, chave: str) -> Path:
+        return self.diretorio / chave[:2] / f"{chave}.json"
+
+    def obter(self, chave: str) -> Optional[str]:
+        with self._lock:
+            entrada = self._memoria.get(chave)
+            if entrada is not None:
+                self._memoria.move_to_end(chave)
+                self._hits_memoria += 1
+                self._segundos_economizados += entrada['tempo_extracao']
+                return entrada['texto']
+
+        entrada = self._ler_disco(chave)
+        with self._lock:
+            if entrada is None:
+                self._misses += 1
+                return None
+            self._hits_disco += 1
+            self._segundos_economizados += entrada['tempo_extracao']
+            self._guardar_memoria(chave, entrada)
+        return entrada['texto']
+
+    def salvar(self, chave: str, texto: str, tempo_extracao: float = 0.0) -> None:
+        entrada = {'texto': texto, 'tempo_extracao': round(tempo_extracao, 4)}
+        with self._lock:
+            self._guardar_memoria(chave, entrada)
+        self._gravar_disco(chave, entrada)
+
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            hits = self._hits_memoria + self._hits_disco
+            total = hits + self._misses
+            return {
+                'hits_memoria': self._hits_memoria,
+                'hits_disco': self._hits_disco,
+                'misses': self._misses,
+                'taxa_acerto': round(hits / total, 4) if total else 0.0,
+                'segundos_ocr_economizados': round(self._segundos_economizados, 3),
+                'itens_memoria': len(self._memoria),
+                'bytes_disco': self._bytes_disco,
+            }
+
+    def _guardar_memoria(self, chave: str, entrada: Dict) -> None:
+        self._memoria[chave] = entrada
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.max_itens_memoria:
+            self._memoria.popitem(last=False)
+
+    def _ler_disco(self, chave: str) -> Optional[Dict]:
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                entrada = json.load(f)
+            os.utime(caminho)
+            return entrada
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Entrada de cache OCR corrompida ({caminho.name}): {e}")
+            return None
+
+    def _gravar_disco(self, chave: str, entrada: Dict) -> None:
+        caminho = self._caminho(chave)
+        try:
+            caminho.parent.mkdir(parents=True, exist_ok=True)
+            temporario = caminho.with_suffix(f".{os.getpid()}.tmp")
+            dados = json.dumps(entrada, ensure_ascii=False).encode('utf-8')
+            with open(temporario, 'wb') as f:
+                f.write(dados)
+            os.replace(temporario, caminho)
+        except Exception as e:
+            logger.warning(f"Não foi possível gravar cache OCR em disco: {e}")
+            return
+
+        with self._lock:
+            if self._bytes_disco is None:
+                self._bytes_disco = self._calcular_bytes_disco()
+            else:
+                self._bytes_disco += len(dados)
+            excedeu = self._bytes_disco > self.max_bytes_disco
+        if excedeu:
+            self._despejar_disco()
+
+    def _calcular_bytes_disco(self) -> int:
+        total = 0
+        for arquivo in self.diretorio.glob('*/*.json'):
+            try:
+                total += arquivo.stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def _despejar_disco(self) -> None:
+        """Remove as entradas menos usadas até ficar abaixo de 90% do limite."""
+        arquivos = []
+        for arquivo in self.diretorio.glob('*/*.json'):
+            try:
+                st = arquivo.stat()
+                arquivos.append((st.st_mtime, st.st_size, arquivo))
+            except OSError:
+                continue
+
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        alvo = int(self.max_bytes_disco * 0.9)
+        removidos = 0
+        for _, tamanho, arquivo in sorted(arquivos, key=lambda a: a[0]):
+            if total <= alvo:
+                break
+            try:
+                arquivo.unlink()
+                total -= tamanho
+                removidos += 1
+            except OSError:
+                continue
+
+        with self._lock:
+            self._bytes_disco = total
+        logger.info(f"Cache OCR: {removidos} entrada(s) removida(s) do disco")
+
+
+_cache_instance = None
+
+def get_ocr_cache() -> OCRCache:
+    global _cache_instance
+    if _cache_instance is None:
+        _cache_instance = OCRCache(
+            diretorio=AppConfig.OCR_CACHE_DIR,
+            max_itens_memoria=AppConfig.OCR_CACHE_MEMORY_ITEMS,
+            max_bytes_disco=AppConfig.OCR_CACHE_DISK_MAX_MB * 1024 * 1024,
+        )
+    return _cache_instance
@@ -0,0 +1,75 @@
+import io
+import logging
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+
+LADO_HASH = 16
+BITS_HASH = LADO_HASH * LADO_HASH
+
+
+def _recortar_conteudo(imagem: Image.Image) -> Image.Image:
+    # Descarta as margens claras: recortes que só aparam bordas da captura
+    # de tela passam a gerar o mesmo hash.
+    caixa = ImageOps.invert(imagem).point(lambda p: 255 if p > 40 else 0).getbbox()
+    return imagem.crop(caixa) if caixa else imagem
+
+
+def dhash(imagem: Image.Image) -> str:
+    """
+    Hash de diferença (dHash) de 256 bits sobre a área com conteúdo.
+
+    Cada bit indica se um bloco é mais claro que o vizinho da direita numa
+    grade 17x16; recompressão e mudança de escala alteram poucos bits. O
+    retorno é a string de bits aceita pelo tipo `bit` do Postgres.
+    """
+    if imagem.mode != 'L':
+        imagem = imagem.convert('L')
+    reduzida = _recortar_conteudo(imagem).resize((LADO_HASH + 1, LADO_HASH), Image.Resampling.BOX)
+    pixels = list(reduzida.getdata())
+
+    bits = []
+    for linha in range(LADO_HASH):
+        inicio = linha * (LADO_HASH + 1)
+        for coluna in range(LADO_HASH):
+            bits.append('1' if pixels[inicio + coluna] > pixels[inicio + coluna + 1] else '0')
+    return ''.join(bits)
+
+
+def hash_perceptual_arquivo(caminho: str) -> Optional[str]:
+    caminho = Path(caminho)
+    try:
+        conteudo = caminho.read_bytes()
+    except OSError as e:
+        logger.warning(f"Não foi possível ler {caminho.name} para o hash perceptual: {e}")
+        return None
+    return hash_perceptual_bytes(conteudo, caminho.suffix)
+
+
+def hash_perceptual_bytes(conteudo: bytes, extensao: str) -> Optional[str]:
+    """
+    dHash da imagem do comprovante ou da primeira página do PDF.
+    Retorna None quando o conteúdo não pode ser rasterizado.
+    """
+    try:
+        if extensao.lower() == '.pdf':
+            from pdf2image import convert_from_bytes
+            paginas = convert_from_bytes(conteudo, dpi=40, first_page=1, last_page=1, grayscale=True)
+            if not paginas:
+                return None
+            imagem = paginas[0]
+        else:
+            imagem = Image.open(io.BytesIO(conteudo))
+            if imagem.format == 'JPEG':
+                imagem.draft('L', (256, 256))
+            imagem = ImageOps.exif_transpose(imagem)
+
+        with imagem:
+            return dhash(imagem)
+    except Exception as e:
+        logger.warning(f"Não foi possível calcular o hash perceptual: {e}")
+        return None
@@ -0,0 +1,112 @@
+import os
+import uuid
+import logging
+from pathlib import Path
+from typing import BinaryIO, Iterable, Optional, Tuple
+
+from app.core.config import AppConfig
+
+logger = logging.getLogger(__name__)
+
+
+TAMANHO_BLOCO = 64 * 1024
+
+ASSINATURAS = (
+    (b'%PDF-', '.pdf'),
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'PK\x03\x04', '.zip'),
+)
+
+EXTENSOES_COMPROVANTE = frozenset({'.pdf', '.jpg', '.png'})
+
+
+class UploadRejeitado(Exception):
+    """Upload recusado durante a gravação no spool."""
+
+    def __init__(self, codigo: str, mensagem: str):
+        super().__init__(mensagem)
+        self.codigo = codigo
+        self.mensagem = mensagem
+
+
+def detectar_extensao(cabecalho: bytes) -> Optional[str]:
+    """Identifica o tipo do arquivo pelos magic bytes do primeiro bloco."""
+    for assinatura, extensao in ASSINATURAS:
+        if cabecalho.startswith(assinatura):
+            return extensao
+    return None
+
+
+def gravar_spool(
+    origem: BinaryIO,
+    limite_bytes: Optional[int] = None,
+    extensoes: Iterable[str] = EXTENSOES_COMPROVANTE,
+    diretorio: Optional[Path] = None
+) -> str:
+    """
+    Copia um stream em blocos para um arquivo no spool de uploads.
+
+    O tipo é decidido pelos magic bytes do primeiro bloco e vira a extensão
+    do arquivo; a cópia é interrompida assim que `limite_bytes` é excedido.
+    Usado pelo envio em lote, que grava o PDF, a imagem ou o ZIP recebido
+    no spool antes de abrir seus itens; comprovantes avulsos são lidos com
+    `ler_upload` e gravados por `ComprovanteStorage.salvar`.
+    """
+    diretorio = Path(diretorio or AppConfig.UPLOAD_SPOOL_DIR)
+    diretorio.mkdir(parents=True, exist_ok=True)
+
+    bloco = origem.read(TAMANHO_BLOCO)
+    extensao = detectar_extensao(bloco)
+    if extensao not in extensoes:
+        raise UploadRejeitado('FORMATO_INVALIDO', 'Formato de arquivo não suportado. Envie PDF, JPG ou PNG.')
+
+    caminho = diretorio / f"{uuid.uuid4().hex}{extensao}"
+    copiados = 0
+    try:
+        with open(caminho, 'wb') as destino:
+            while bloco:
+                copiados += len(bloco)
+                if limite_bytes is not None and copiados > limite_bytes:
+                    raise UploadRejeitado(
+                        'ARQUIVO_MUITO_GRANDE',
+                        f"Arquivo muito grande. Máximo: {limite_bytes // (1024 * 1024)}MB."
+                    )
+                destino.write(bloco)
+                bloco = origem.read(TAMANHO_BLOCO)
+    except BaseException:
+        try:
+            os.unlink(caminho)
+        except FileNotFoundError:
+            pass
+        raise
+
+    return str(caminho)
+
+
+def ler_upload(
+    origem: BinaryIO,
+    limite_bytes: Optional[int] = None,
+    extensoes: Iterable[str] = EXTENSOES_COMPROVANTE
+) -> Tuple[bytes, str]:
+    """
+    Lê um stream para a memória com as mesmas regras de `gravar_spool`
+    (tipo pelos magic bytes, leitura interrompida acima de `limite_bytes`).
+    Retorna o conteúdo e a extensão detectada.
+    """
+    bloco = origem.read(TAMANHO_BLOCO)
+    extensao = detectar_extensao(bloco)
+    if extensao not in extensoes:
+        raise UploadRejeitado('FORMATO_INVALIDO', 'Formato de arquivo não suportado. Envie PDF, JPG ou PNG.')
+
+    partes, lidos = [], 0
+    while bloco:
+        lidos += len(bloco)
+        if limite_bytes is not None and lidos > limite_bytes:
+            raise UploadRejeitado(
+                'ARQUIVO_MUITO_GRANDE',
+                f"Arquivo muito grande. Máximo: {limite_bytes // (1024 * 1024)}MB."
+            )
+        partes.append(bloco)
+        bloco = origem.read(TAMANHO_BLOCO)
+    return b''.join(partes), extensao
@@ -0,0 +1,46 @@
+import sys
+import os
+import logging
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.config import AppConfig
+from app.infrastructure.database.connection import init_db
+from app.services.comprovante_arquivamento import arquivar_comprovantes
+
+logging.basicConfig(level=logging.INFO)
+
+
+def _imprimir(resumo) -> None:
+    print(
+        f"{resumo['arquivados']} arquivados | {resumo['ausentes']} sem arquivo | "
+        f"{resumo['bytes_empacotados'] / (1024 * 1024):.1f} MB empacotados"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Empacota em zips mensais os comprovantes antigos, mantendo a leitura individual"
+    )
+    parser.add_argument("--dias", type=int, default=AppConfig.RECEIPT_ARCHIVE_AFTER_DAYS, help="Idade mínima, em dias")
+    parser.add_argument("--lote", type=int, default=1000, help="Comprovantes por consulta e por zip")
+    parser.add_argument("--simular", action="store_true", help="Só conta o que seria arquivado")
+    args = parser.parse_args()
+
+    try:
+        init_db()
+        resumo = arquivar_comprovantes(args.dias, args.lote, args.simular, progresso=_imprimir)
+        print("\nArquivamento concluído:")
+        _imprimir(resumo)
+    except KeyboardInterrupt:
+        print("\nInterrompido; os lotes já gravados permanecem arquivados.")
+        sys.exit(130)
+    except Exception as e:
+        print(f"\n Erro no arquivamento de comprovantes: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmark da geração de PDFs de boleto.
+
+Compara o desenho completo da página com o canvas do reportlab (como era
+feito em agent.py) com o modelo em cache de app.utils.boleto_pdf, que
+reaproveita o layout fixo e só gera o fluxo dos campos variáveis. Mede
+boletos por segundo em um núcleo e, com --processos, o total com vários
+processos.
+
+Uso:
+    python backend/benchmarks/bench_boletos.py --quantidade 2000
+    python backend/benchmarks/bench_boletos.py --quantidade 5000 --processos 4
+"""
+import sys
+import os
+import io
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.graphics.barcode import code128
+from reportlab.lib import colors
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.boleto_pdf import get_modelo_boleto
+
+Entrada = Tuple[str, str, float, datetime, str]
+
+
+def renderizar_reportlab(
+    cpf: str,
+    linha_digitavel: str,
+    valor: float,
+    vencimento: datetime,
+    id_boleto: Optional[str] = None,
+    nome_beneficiario: str = "Empresa Exemplo",
+    observacao: str = "Boleto gerado para fins de teste (fictício)."
+) -> bytes:
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+
+    left_margin = 15 * mm
+    right_margin = 15 * mm
+    top = height - 20 * mm
+
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(left_margin, top, nome_beneficiario)
+    c.setFont("Helvetica", 9)
+    c.drawString(left_margin, top - 14, f"Documento: Boleto Fictício  •  ID: {id_boleto or '-'}")
+    c.setStrokeColor(colors.grey)
+    c.line(left_margin, top - 18, width - right_margin, top - 18)
+
+    y = top - 36
+    c.setFont("Helvetica", 10)
+    c.drawString(left_margin, y, f"CPF do pagador: {cpf}")
+    y -= 14
+    c.drawString(left_margin, y, f"Vencimento: {vencimento.strftime('%d/%m/%Y') if isinstance(vencimento, datetime) else str(vencimento)}")
+    y -= 14
+    valor_formatado = f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    c.drawString(left_margin, y, f"Valor: {valor_formatado}")
+    y -= 20
+
+    c.setFont("Helvetica-Oblique", 8)
+    c.drawString(left_margin, y, observacao)
+    y -= 26
+
+    c.setFont("Helvetica-Bold", 12)
+    txt_width = c.stringWidth(linha_digitavel, "Helvetica-Bold", 12)
+    c.drawString((width - txt_width) / 2, y, linha_digitavel)
+    y -= 26
+
+    try:
+        barcode_value = ''.join(ch for ch in linha_digitavel if ch.isdigit())
+        barcode = code128.Code128(barcode_value, barHeight=20*mm, barWidth=0.4)
+        barcode_x = left_margin
+        barcode_y = y - 20*mm
+        barcode.drawOn(c, barcode_x, barcode_y)
+    except Exception:
+        c.setStrokeColor(colors.red)
+        c.rect(left_margin, y - 20*mm, width - left_margin - right_margin, 20*mm, stroke=1, fill=0)
+
+    c.setFont("Helvetica", 8)
+    rodape_y = 30 * mm
+    c.setFillColor(colors.grey)
+    c.drawString(left_margin, rodape_y + 8, "Instruções: Este é um boleto fictício gerado para testes. Não possui validade bancária.")
+    c.setFillColor(colors.black)
+
+    c.setFont("Helvetica", 7)
+    c.drawRightString(width - right_margin, rodape_y + 25, f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+
+    c.showPage()
+    c.save()
+    buffer.seek(0)
+    return buffer.read()
+
+
+def renderizar_modelo(cpf: str, linha_digitavel: str, valor: float, vencimento: datetime, id_boleto: str) -> bytes:
+    return get_modelo_boleto().renderizar(cpf, linha_digitavel, valor, vencimento, id_boleto)
+
+
+RENDERIZADORES = {'antes': renderizar_reportlab, 'depois': renderizar_modelo}
+
+
+def gerar_entradas(quantidade: int, semente: int = 42) -> List[Entrada]:
+    aleatorio = random.Random(semente)
+    hoje = datetime.now()
+    entradas = []
+    for i in range(quantidade):
+        digitos = ''.join(str(aleatorio.randint(0, 9)) for _ in range(47))
+        linha = f"{digitos[:5]}.{digitos[5:10]} {digitos[10:15]}.{digitos[15:21]} {digitos[21:26]}.{digitos[26:32]} {digitos[32]} {digitos[33:]}"
+        entradas.append((
+            ''.join(str(aleatorio.randint(0, 9)) for _ in range(11)),
+            linha,
+            round(aleatorio.uniform(50, 5000), 2),
+            hoje + timedelta(days=aleatorio.randint(1, 30)),
+            f"bench-{i}",
+        ))
+    return entradas
+
+
+def _rodar(nome: str, entradas: List[Entrada]) -> int:
+    renderizar = RENDERIZADORES[nome]
+    return sum(len(renderizar(*entrada)) for entrada in entradas)
+
+
+def medir(nome: str, entradas: List[Entrada], processos: int) -> Tuple[float, int]:
+    """Segundos para renderizar todas as entradas e total de bytes gerados."""
+    inicio = time.perf_counter()
+    if processos <= 1:
+        total_bytes = _rodar(nome, entradas)
+    else:
+        fatias = [entradas[i::processos] for i in range(processos)]
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            total_bytes = sum(executor.map(_rodar, [nome] * processos, fatias))
+    return time.perf_counter() - inicio, total_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quantidade", type=int, default=2000, help="boletos por renderizador")
+    parser.add_argument("--processos", type=int, default=1, help="processos em paralelo (1 = só um núcleo)")
+    parser.add_argument("--aquecimento", type=int, default=50, help="boletos descartados antes de medir")
+    args = parser.parse_args()
+
+    entradas = gerar_entradas(args.quantidade)
+    for nome in RENDERIZADORES:
+        _rodar(nome, entradas[:args.aquecimento])
+
+    print(f"{'renderizador':<14}{'processos':>10}{'segundos':>10}{'boletos/s':>12}{'por núcleo':>12}{'KB/boleto':>11}")
+    taxas = {}
+    for nome in RENDERIZADORES:
+        segundos, total_bytes = medir(nome, entradas, args.processos)
+        taxas[nome] = len(entradas) / segundos
+        print(
+            f"{nome:<14}{args.processos:>10}{segundos:>10.2f}{taxas[nome]:>12.0f}"
+            f"{taxas[nome] / args.processos:>12.0f}{total_bytes / len(entradas) / 1024:>11.1f}"
+        )
+    print(f"\nGanho: {taxas['depois'] / taxas['antes']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
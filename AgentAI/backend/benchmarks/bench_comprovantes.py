@@ -0,0 +1,240 @@
+"""
+Benchmark do pipeline de comprovantes sobre comprovantes sintéticos.
+
+Mede cada etapa de processar_comprovante (hash, leitura da camada
+de texto, rasterização, leitura de códigos, pré-processamento, OCR,
+varredura, hash perceptual e, com --banco, as consultas ao Postgres) e a
+acurácia por campo contra o gabarito do gerador. As combinações de DPI,
+modo de segmentação (psm) e pré-processamento são comparadas lado a lado,
+sempre sem o cache de OCR. Com --templates, cada combinação roda também
+com o OCR só das regiões dos templates do arquivo (roi=sim) para comparar
+com a página inteira (roi=nao); templates_sinteticos.json descreve os
+layouts do gerador.
+
+O DPI vale para a rasterização de PDFs digitalizados; imagens usam o
+orçamento de pixels configurado.
+
+Uso:
+    python backend/benchmarks/bench_comprovantes.py --quantidade 5 --dpi 150,300 --psm auto,6 --preprocessar sim,nao
+    python backend/benchmarks/bench_comprovantes.py --entrada /tmp/comprovantes --json resultado.json
+    python backend/benchmarks/bench_comprovantes.py --formatos png,jpg_ruido --templates backend/benchmarks/templates_sinteticos.json
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import tempfile
+import itertools
+import statistics
+from pathlib import Path
+from datetime import date
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+# O serviço importa módulos como `backend.app...`, como no container.
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from benchmarks.gerador_comprovantes import FORMATOS, ComprovanteSintetico, carregar_gabarito, gerar_conjunto
+from app.utils.ocr_cache import OCRCache
+from app.utils.comprovante_validator import ComprovanteValidator, OCRSettings, ReceiptDocument, get_ocr_backend
+from app.utils.comprovante_templates import TemplateRegistry
+from app.utils.perceptual_hash import hash_perceptual_bytes
+from app.services.comprovante_service import calcular_hash_conteudo
+
+ETAPAS = (
+    'hash', 'cache', 'texto_pdf', 'rasterizacao', 'codigos', 'preprocessamento',
+    'ocr', 'varredura', 'hash_perceptual', 'banco'
+)
+CAMPOS = ('cpf', 'valor', 'data_pagamento', 'data_vencimento', 'linha_digitavel')
+
+
+class SemCache(OCRCache):
+    """Cache que nunca acerta: cada extração passa por todas as etapas."""
+
+    def __init__(self):
+        super().__init__(Path(tempfile.gettempdir()), max_itens_memoria=0, max_bytes_disco=0)
+
+    def obter(self, chave: str) -> Optional[str]:
+        return None
+
+    def salvar(self, chave: str, texto: str, tempo_extracao: float = 0.0) -> None:
+        pass
+
+
+def conferir(documento: ReceiptDocument, gabarito: ComprovanteSintetico) -> Dict[str, Optional[bool]]:
+    """Acerto de cada campo; None quando o campo não está no layout."""
+    def mesma_data(extraida, esperada: str) -> bool:
+        return extraida is not None and extraida.date() == date.fromisoformat(esperada)
+
+    return {
+        'cpf': documento.cpf == gabarito.cpf,
+        'valor': any(abs(v - gabarito.valor) < 0.005 for v in documento.valores),
+        'data_pagamento': mesma_data(documento.data_pagamento, gabarito.data_pagamento),
+        'data_vencimento': mesma_data(documento.data_vencimento, gabarito.data_vencimento),
+        'linha_digitavel': (gabarito.linha_digitavel in documento.linhas_digitaveis)
+        if gabarito.layout == 'boleto' else None,
+    }
+
+
+def consultar_banco(documento: ReceiptDocument, content_hash: str, perceptual_hash: Optional[str]) -> None:
+    """As consultas somente-leitura que o serviço faz para cada comprovante."""
+    from app.core.config import AppConfig
+    from app.utils.comprovante_codigos import formas_do_codigo
+    from app.infrastructure.database.connection import (
+        listar_boletos,
+        obter_boleto_por_codigo,
+        obter_comprovante_por_hash,
+        buscar_comprovantes_similares,
+    )
+
+    obter_comprovante_por_hash(content_hash)
+    obter_boleto_por_codigo([f for linha in documento.linhas_digitaveis for f in formas_do_codigo(linha)])
+    if documento.cpf:
+        listar_boletos(cpf=documento.cpf)
+    if perceptual_hash:
+        buscar_comprovantes_similares(perceptual_hash, AppConfig.RECEIPT_PHASH_MAX_DISTANCE)
+
+
+def processar(
+    validator: ComprovanteValidator,
+    caminho: Path,
+    gabarito: ComprovanteSintetico,
+    banco: bool
+) -> Dict:
+    tempos: Dict[str, float] = {}
+    inicio_total = time.perf_counter()
+
+    # Como na rota de upload, o arquivo é lido uma vez e processado em memória.
+    conteudo = caminho.read_bytes()
+
+    inicio = time.perf_counter()
+    content_hash = calcular_hash_conteudo(conteudo)
+    tempos['hash'] = time.perf_counter() - inicio
+
+    documento = validator.extrair_documento_bytes(conteudo, caminho.suffix, str(caminho))
+    tempos.update(documento.tempos)
+
+    inicio = time.perf_counter()
+    perceptual_hash = hash_perceptual_bytes(conteudo, caminho.suffix)
+    tempos['hash_perceptual'] = time.perf_counter() - inicio
+
+    if banco:
+        inicio = time.perf_counter()
+        consultar_banco(documento, content_hash, perceptual_hash)
+        tempos['banco'] = time.perf_counter() - inicio
+
+    return {
+        'arquivo': gabarito.arquivo,
+        'formato': gabarito.formato,
+        'tempos': tempos,
+        'total': time.perf_counter() - inicio_total,
+        'acertos': conferir(documento, gabarito),
+    }
+
+
+def resumir(medicoes: List[Dict]) -> Dict:
+    totais = sorted(m['total'] for m in medicoes)
+    acuracia = {}
+    for campo in CAMPOS:
+        conferidos = [m['acertos'][campo] for m in medicoes if m['acertos'][campo] is not None]
+        acuracia[campo] = sum(conferidos) / len(conferidos) if conferidos else None
+    return {
+        'n': len(medicoes),
+        'etapas_ms': {
+            etapa: statistics.mean(m['tempos'].get(etapa, 0.0) for m in medicoes) * 1000
+            for etapa in ETAPAS
+        },
+        'media_ms': statistics.mean(totais) * 1000,
+        'p95_ms': totais[max(0, int(len(totais) * 0.95) - 1)] * 1000,
+        'acuracia': acuracia,
+    }
+
+
+def imprimir(resultados: List[Dict], banco: bool) -> None:
+    etapas = [e for e in ETAPAS if banco or e != 'banco']
+    abreviadas = {'rasterizacao': 'raster', 'preprocessamento': 'preproc', 'hash_perceptual': 'phash', 'texto_pdf': 'txt_pdf'}
+
+    print("Tempo médio por etapa (ms)")
+    cabecalho = f"{'configuração':<36} {'formato':<17}" + ''.join(f"{abreviadas.get(e, e):>10}" for e in etapas)
+    print(cabecalho + f"{'média':>10}{'p95':>10}")
+    for r in resultados:
+        linha = f"{r['configuracao']:<36} {r['formato']:<17}"
+        linha += ''.join(f"{r['etapas_ms'][e]:>10.1f}" for e in etapas)
+        print(linha + f"{r['media_ms']:>10.1f}{r['p95_ms']:>10.1f}")
+
+    print("\nAcurácia por campo")
+    print(f"{'configuração':<36} {'formato':<17}" + ''.join(f"{c:>17}" for c in CAMPOS))
+    for r in resultados:
+        linha = f"{r['configuracao']:<36} {r['formato']:<17}"
+        for campo in CAMPOS:
+            valor = r['acuracia'][campo]
+            linha += f"{'-':>17}" if valor is None else f"{valor:>16.0%} "
+        print(linha)
+
+
+def _lista(texto: str) -> List[str]:
+    return [parte.strip() for parte in texto.split(',') if parte.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entrada", type=Path, help="diretório já gerado (com gabarito.json)")
+    parser.add_argument("--quantidade", type=int, default=5, help="comprovantes por formato, se gerados agora")
+    parser.add_argument("--formatos", default=','.join(FORMATOS))
+    parser.add_argument("--dpi", default="150", help="DPIs de rasterização de PDF, separados por vírgula")
+    parser.add_argument("--psm", default="auto", help="modos de segmentação do Tesseract (auto = padrão)")
+    parser.add_argument("--preprocessar", default="sim", help="sim, nao ou sim,nao")
+    parser.add_argument("--banco", action="store_true", help="inclui as consultas ao Postgres")
+    parser.add_argument("--templates", type=Path, help="compara o OCR por regiões destes templates com a página inteira")
+    parser.add_argument("--json", type=Path, help="grava as medições detalhadas neste arquivo")
+    args = parser.parse_args()
+
+    formatos = _lista(args.formatos)
+    with tempfile.TemporaryDirectory() as temporario:
+        if args.entrada:
+            diretorio = args.entrada
+            comprovantes = [c for c in carregar_gabarito(diretorio) if c.formato in formatos]
+        else:
+            diretorio = Path(temporario)
+            comprovantes = gerar_conjunto(diretorio, args.quantidade, formatos)
+
+        ocr = get_ocr_backend()
+        if not ocr.disponivel():
+            print(f"Aviso: motor de OCR {ocr.nome} indisponível; só a camada de texto dos PDFs será lida.\n")
+
+        registros = {'': TemplateRegistry()}
+        if args.templates:
+            registros = {' roi=nao': TemplateRegistry(), ' roi=sim': TemplateRegistry.carregar(args.templates)}
+            if not registros[' roi=sim'].templates:
+                parser.error(f"nenhum template em {args.templates}")
+
+        resultados, detalhes = [], []
+        combinacoes = itertools.product(
+            _lista(args.dpi), _lista(args.psm), _lista(args.preprocessar), registros.items()
+        )
+        for dpi, psm, preprocessar, (roi, templates) in combinacoes:
+            settings = OCRSettings(
+                pdf_dpi=int(dpi),
+                psm=None if psm == 'auto' else int(psm),
+                preprocessar=preprocessar == 'sim',
+            )
+            validator = ComprovanteValidator(settings=settings, cache=SemCache(), ocr=ocr, templates=templates)
+            configuracao = f"dpi={dpi} psm={psm} preproc={preprocessar}{roi}"
+
+            medicoes = [processar(validator, diretorio / c.arquivo, c, args.banco) for c in comprovantes]
+            for formato in formatos:
+                do_formato = [m for m in medicoes if m['formato'] == formato]
+                if do_formato:
+                    resultados.append({'configuracao': configuracao, 'formato': formato, **resumir(do_formato)})
+            detalhes.extend({'configuracao': configuracao, **m} for m in medicoes)
+
+    imprimir(resultados, args.banco)
+    if args.json:
+        args.json.write_text(
+            json.dumps({'resumo': resultados, 'medicoes': detalhes}, ensure_ascii=False, indent=2), encoding='utf-8'
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark dos motores de OCR do validador de comprovantes.
+
+Compara o pytesseract (um subprocesso por imagem) com o pool de engines do
+tesserocr (engines inicializadas uma vez e reutilizadas).
+
+Uso:
+    python backend/benchmarks/bench_ocr_backends.py --repeticoes 20
+"""
+import sys
+import os
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.core.config import AppConfig
+from app.utils.comprovante_validator import PytesseractBackend, TesserocrPoolBackend, tesserocr
+
+
+LINHAS = [
+    "Comprovante de Pagamento",
+    "Banco Exemplo S.A.  Agência 0001  Conta 12345-6",
+    "CPF do pagador: 301.318.640-25",
+    "Valor: R$ 1.350,68",
+    "Data do pagamento: 10/10/2026",
+    "Autenticação: 9F3A-21C7-88B0",
+]
+
+
+def gerar_imagem() -> Image.Image:
+    fonte = ImageFont.load_default(size=28)
+    imagem = Image.new('L', (1240, 60 * len(LINHAS) + 80), color=255)
+    desenho = ImageDraw.Draw(imagem)
+    for i, linha in enumerate(LINHAS):
+        desenho.text((40, 40 + 60 * i), linha, fill=0, font=fonte)
+    return imagem
+
+
+def medir(backend, imagem: Image.Image, repeticoes: int) -> dict:
+    inicio = time.perf_counter()
+    backend.image_to_string(imagem, AppConfig.OCR_LANG)
+    primeira = time.perf_counter() - inicio
+
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        backend.image_to_string(imagem, AppConfig.OCR_LANG)
+        tempos.append(time.perf_counter() - inicio)
+
+    return {
+        'primeira_ms': primeira * 1000,
+        'media_ms': statistics.mean(tempos) * 1000,
+        'p95_ms': sorted(tempos)[int(len(tempos) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    imagem = gerar_imagem()
+    backends = [PytesseractBackend()]
+    if tesserocr is not None:
+        backends.append(TesserocrPoolBackend(tamanho=1, tessdata=AppConfig.OCR_TESSDATA_PATH))
+
+    resultados = {}
+    for backend in backends:
+        if not backend.disponivel():
+            print(f"{backend.nome:<12} indisponível")
+            continue
+        resultados[backend.nome] = medir(backend, imagem, args.repeticoes)
+
+    print(f"{'motor':<12} {'1ª chamada':>12} {'média':>10} {'p95':>10}")
+    for nome, r in resultados.items():
+        print(f"{nome:<12} {r['primeira_ms']:>10.1f}ms {r['media_ms']:>8.1f}ms {r['p95_ms']:>8.1f}ms")
+
+    if len(resultados) == 2:
+        economia = resultados['pytesseract']['media_ms'] - resultados['tesserocr']['media_ms']
+        print(f"\nEconomia por imagem com engines aquecidas: {economia:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
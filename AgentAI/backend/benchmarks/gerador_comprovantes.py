@@ -0,0 +1,288 @@
+"""
+Gerador de comprovantes sintéticos com gabarito conhecido.
+
+Cada comprovante é desenhado a partir da mesma lista de linhas em quatro
+formatos:
+    pdf               PDF com camada de texto (reportlab)
+    pdf_digitalizado  PDF só com a imagem da página (força o OCR)
+    png               imagem limpa
+    jpg_ruido         foto simulada: inclinação, desfoque, ruído e JPEG forte
+
+O CPF é válido e a linha digitável tem dígitos verificadores corretos; no
+layout de boleto ela é repetida como código de barras ITF no rodapé. O gabarito vai para
+gabarito.json no diretório de saída.
+
+Uso:
+    python backend/benchmarks/gerador_comprovantes.py --quantidade 20 --saida /tmp/comprovantes
+"""
+import sys
+import os
+import io
+import json
+import random
+import argparse
+from pathlib import Path
+from datetime import date, timedelta
+from dataclasses import dataclass, asdict
+from typing import List, Optional, Sequence
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import reportlab
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+from reportlab.graphics.barcode.common import I2of5
+
+from app.utils.comprovante_codigos import BASE_FATOR_VENCIMENTO_2025, codigo_barras_para_linha
+
+
+FORMATOS = ('pdf', 'pdf_digitalizado', 'png', 'jpg_ruido')
+BANCOS = ('Banco Exemplo S.A.', 'Banco Fictício do Brasil', 'Cooperativa de Crédito Teste')
+
+# Resolução das imagens geradas; a página tem a largura de um A4.
+DPI_IMAGEM = 200
+
+# Fontes Vera distribuídas com o reportlab: cobrem os acentos, ao contrário
+# da fonte padrão do Pillow.
+FONTES = Path(reportlab.__file__).parent / 'fonts'
+
+# Padrões ITF (1 = elemento largo) de cada dígito.
+_ITF = ('00110', '10001', '01001', '11000', '00101', '10100', '01100', '00011', '10010', '01010')
+
+
+@dataclass
+class ComprovanteSintetico:
+    arquivo: str
+    formato: str
+    layout: str
+    cpf: str
+    valor: float
+    data_pagamento: str
+    data_vencimento: str
+    linha_digitavel: str
+
+
+def gerar_cpf(rng: random.Random) -> str:
+    base = [rng.randint(0, 9) for _ in range(9)]
+    while len(set(base)) == 1:
+        base = [rng.randint(0, 9) for _ in range(9)]
+    for tamanho in (9, 10):
+        soma = sum(d * (tamanho + 1 - i) for i, d in enumerate(base))
+        resto = soma % 11
+        base.append(0 if resto < 2 else 11 - resto)
+    return ''.join(map(str, base))
+
+
+def _dv_codigo_barras(codigo: str) -> int:
+    soma = sum(int(d) * (2 + i % 8) for i, d in enumerate(reversed(codigo)))
+    dv = 11 - soma % 11
+    return 1 if dv in (0, 10, 11) else dv
+
+
+def gerar_codigo_barras(rng: random.Random, valor: float, vencimento: date) -> str:
+    """Código de barras de 44 dígitos de um boleto de cobrança fictício."""
+    fator = 1000 + (vencimento - BASE_FATOR_VENCIMENTO_2025).days
+    campo_livre = ''.join(str(rng.randint(0, 9)) for _ in range(25))
+    sem_dv = f"2379{fator:04d}{round(valor * 100):010d}{campo_livre}"
+    return sem_dv[:4] + str(_dv_codigo_barras(sem_dv)) + sem_dv[4:]
+
+
+def formatar_cpf(cpf: str) -> str:
+    return f'{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}'
+
+
+def formatar_valor(valor: float) -> str:
+    return f'{valor:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+def formatar_linha(linha: str) -> str:
+    return f'{linha[0:5]}.{linha[5:10]} {linha[10:15]}.{linha[15:21]} {linha[21:26]}.{linha[26:32]} {linha[32]} {linha[33:]}'
+
+
+def montar_linhas(layout: str, banco: str, gabarito: ComprovanteSintetico, autenticacao: str) -> List[str]:
+    pagamento = date.fromisoformat(gabarito.data_pagamento).strftime('%d/%m/%Y')
+    vencimento = date.fromisoformat(gabarito.data_vencimento).strftime('%d/%m/%Y')
+    if layout == 'pix':
+        return [
+            banco,
+            'Comprovante de transferência Pix',
+            f'Pago em {pagamento} às 14:32',
+            f'Valor: R$ {formatar_valor(gabarito.valor)}',
+            'Pagador',
+            f'CPF: {formatar_cpf(gabarito.cpf)}',
+            'Agência 0001  Conta 12345-6',
+            f'Boleto com vencimento em {vencimento}',
+            f'Autenticação: {autenticacao}',
+        ]
+    return [
+        banco,
+        'Comprovante de pagamento de boleto',
+        'Linha digitável:',
+        formatar_linha(gabarito.linha_digitavel),
+        f'Vencimento: {vencimento}',
+        f'Data do pagamento: {pagamento}',
+        f'Valor: R$ {formatar_valor(gabarito.valor)}',
+        f'CPF do pagador: {formatar_cpf(gabarito.cpf)}',
+        'Agência 0001  Conta 12345-6',
+        f'Autenticação: {autenticacao}',
+    ]
+
+
+def desenhar_pdf(linhas: Sequence[str], codigo_barras: Optional[str], destino) -> None:
+    largura, altura = A4
+    c = canvas.Canvas(destino, pagesize=A4)
+    y = altura - 30 * mm
+    c.setFont('Helvetica-Bold', 14)
+    c.drawString(20 * mm, y, linhas[0])
+    c.setFont('Helvetica', 11)
+    for linha in linhas[1:]:
+        y -= 9 * mm
+        c.drawString(20 * mm, y, linha)
+    if codigo_barras:
+        barras = I2of5(codigo_barras, checksum=0, bearers=0, barHeight=13 * mm, barWidth=0.3 * mm, ratio=3)
+        barras.drawOn(c, 20 * mm, y - 25 * mm)
+    c.showPage()
+    c.save()
+
+
+def _desenhar_itf(desenho: ImageDraw.ImageDraw, codigo: str, x: int, y: int, estreita: int, altura: int) -> None:
+    larga = estreita * 3
+    elementos = '0000'
+    for i in range(0, len(codigo), 2):
+        barras, espacos = _ITF[int(codigo[i])], _ITF[int(codigo[i + 1])]
+        elementos += ''.join(b + e for b, e in zip(barras, espacos))
+    elementos += '100'
+    for i, elemento in enumerate(elementos):
+        tamanho = larga if elemento == '1' else estreita
+        if i % 2 == 0:
+            desenho.rectangle((x, y, x + tamanho - 1, y + altura), fill=0)
+        x += tamanho
+
+
+def desenhar_imagem(linhas: Sequence[str], codigo_barras: Optional[str], dpi: int = DPI_IMAGEM) -> Image.Image:
+    escala = dpi / 25.4
+    largura, altura = int(210 * escala), int(297 * escala)
+    imagem = Image.new('L', (largura, altura), color=255)
+    desenho = ImageDraw.Draw(imagem)
+    margem = int(20 * escala)
+    y = int(24 * escala)
+    desenho.text((margem, y), linhas[0], fill=0, font=ImageFont.truetype(str(FONTES / 'VeraBd.ttf'), int(5 * escala)))
+    fonte = ImageFont.truetype(str(FONTES / 'Vera.ttf'), int(3.9 * escala))
+    for linha in linhas[1:]:
+        y += int(9 * escala)
+        desenho.text((margem, y), linha, fill=0, font=fonte)
+    if codigo_barras:
+        _desenhar_itf(desenho, codigo_barras, margem, y + int(12 * escala), max(2, int(0.3 * escala)), int(13 * escala))
+    return imagem
+
+
+def aplicar_ruido(imagem: Image.Image, rng: random.Random) -> Image.Image:
+    """Simula uma foto de celular: inclinação leve, desfoque, ruído e fundo acinzentado."""
+    angulo = rng.uniform(-2.5, 2.5)
+    imagem = imagem.rotate(angulo, resample=Image.Resampling.BICUBIC, expand=True, fillcolor=235)
+    imagem = imagem.filter(ImageFilter.GaussianBlur(rng.uniform(0.4, 1.1)))
+    ruido = Image.effect_noise(imagem.size, rng.uniform(12, 25))
+    return Image.blend(imagem, ruido, 0.12).point(lambda p: min(255, int(p * 0.92 + 12)))
+
+
+def gerar_comprovante(
+    rng: random.Random,
+    diretorio: Path,
+    indice: int,
+    formato: str,
+    hoje: Optional[date] = None
+) -> ComprovanteSintetico:
+    hoje = hoje or date.today()
+    pagamento = hoje - timedelta(days=rng.randint(0, 3))
+    vencimento = pagamento + timedelta(days=rng.randint(0, 20))
+    valor = round(rng.uniform(50, 5000), 2)
+    codigo = gerar_codigo_barras(rng, valor, vencimento)
+    layout = rng.choice(('boleto', 'pix'))
+    extensao = {'pdf': '.pdf', 'pdf_digitalizado': '.pdf', 'png': '.png', 'jpg_ruido': '.jpg'}[formato]
+
+    gabarito = ComprovanteSintetico(
+        arquivo=f'comprovante_{indice:04d}_{formato}{extensao}',
+        formato=formato,
+        layout=layout,
+        cpf=gerar_cpf(rng),
+        valor=valor,
+        data_pagamento=pagamento.isoformat(),
+        data_vencimento=vencimento.isoformat(),
+        linha_digitavel=codigo_barras_para_linha(codigo),
+    )
+    autenticacao = '-'.join(f'{rng.getrandbits(16):04X}' for _ in range(3))
+    linhas = montar_linhas(layout, rng.choice(BANCOS), gabarito, autenticacao)
+    caminho = diretorio / gabarito.arquivo
+    # Só o comprovante de boleto reproduz o código de barras pago.
+    if layout != 'boleto':
+        codigo = None
+
+    if formato == 'pdf':
+        desenhar_pdf(linhas, codigo, str(caminho))
+        return gabarito
+
+    imagem = desenhar_imagem(linhas, codigo)
+    if formato == 'png':
+        imagem.save(caminho, optimize=True)
+    elif formato == 'jpg_ruido':
+        aplicar_ruido(imagem, rng).save(caminho, quality=rng.randint(45, 70))
+    else:
+        buffer = io.BytesIO()
+        imagem.save(buffer, format='PNG')
+        buffer.seek(0)
+        c = canvas.Canvas(str(caminho), pagesize=A4)
+        c.drawImage(ImageReader(buffer), 0, 0, *A4)
+        c.showPage()
+        c.save()
+    return gabarito
+
+
+def gerar_conjunto(
+    diretorio: Path,
+    quantidade: int,
+    formatos: Sequence[str] = FORMATOS,
+    semente: int = 42
+) -> List[ComprovanteSintetico]:
+    """Gera `quantidade` comprovantes em cada formato e grava o gabarito."""
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(semente)
+
+    comprovantes = [
+        gerar_comprovante(rng, diretorio, indice, formato)
+        for indice in range(quantidade)
+        for formato in formatos
+    ]
+    (diretorio / 'gabarito.json').write_text(
+        json.dumps([asdict(c) for c in comprovantes], ensure_ascii=False, indent=2), encoding='utf-8'
+    )
+    return comprovantes
+
+
+def carregar_gabarito(diretorio: Path) -> List[ComprovanteSintetico]:
+    dados = json.loads((Path(diretorio) / 'gabarito.json').read_text(encoding='utf-8'))
+    return [ComprovanteSintetico(**c) for c in dados]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quantidade", type=int, default=10, help="comprovantes por formato")
+    parser.add_argument("--formatos", default=','.join(FORMATOS))
+    parser.add_argument("--saida", type=Path, required=True)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    formatos = [f for f in args.formatos.split(',') if f]
+    invalidos = set(formatos) - set(FORMATOS)
+    if invalidos:
+        parser.error(f"formatos desconhecidos: {', '.join(sorted(invalidos))}")
+
+    comprovantes = gerar_conjunto(args.saida, args.quantidade, formatos, args.semente)
+    print(f"{len(comprovantes)} comprovantes gerados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import sys
+import os
+import csv
+import json
+import logging
+import argparse
+from typing import Iterator, TextIO, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.config import AppConfig
+from app.infrastructure.database.connection import init_db
+from app.services.boleto_lote import gerar_boletos_em_lote
+
+logging.basicConfig(level=logging.INFO)
+
+
+def _ler_pares(arquivo: TextIO) -> Iterator[Tuple[str, str]]:
+    """Linhas "cpf,id_plano" do CSV; um cabeçalho com esses nomes é ignorado."""
+    for linha in csv.reader(arquivo):
+        if not linha or not linha[0].strip():
+            continue
+        cpf, id_plano = (linha + [''])[:2]
+        if cpf.strip().lower() == 'cpf':
+            continue
+        yield cpf.strip(), id_plano.strip()
+
+
+def _imprimir(resumo) -> None:
+    print(
+        f"{resumo['total']} processados | {resumo['GERADO']} gerados | "
+        f"{resumo['ERRO']} com erro | {resumo['sem_pdf']} sem PDF pronto"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gera boletos em lote para os pares (CPF, plano) de um CSV, para campanhas de cobrança"
+    )
+    parser.add_argument("entrada", help="CSV com as colunas cpf,id_plano (- para a entrada padrão)")
+    parser.add_argument("--saida", default="boletos_lote.ndjson", help="Relatório NDJSON, uma linha por boleto")
+    parser.add_argument("--dias", type=int, default=7, help="Dias até o vencimento")
+    parser.add_argument("--lote", type=int, default=AppConfig.BOLETO_BATCH_CHUNK_SIZE, help="Boletos por INSERT")
+    parser.add_argument("--workers", type=int, default=AppConfig.BOLETO_BATCH_WORKERS, help="Processos renderizando os PDFs")
+    args = parser.parse_args()
+
+    entrada = sys.stdin if args.entrada == '-' else open(args.entrada, newline='', encoding='utf-8')
+    resumo = {'total': 0, 'GERADO': 0, 'ERRO': 0, 'sem_pdf': 0}
+    try:
+        init_db()
+        with entrada, open(args.saida, 'w', encoding='utf-8') as saida:
+            for linha in gerar_boletos_em_lote(_ler_pares(entrada), args.dias, args.lote, args.workers):
+                saida.write(json.dumps(linha, ensure_ascii=False, default=str) + '\n')
+                if 'resumo' in linha:
+                    resumo = linha['resumo']
+                    continue
+                resumo['total'] += 1
+                resumo[linha['status']] += 1
+                resumo['sem_pdf'] += linha['status'] == 'GERADO' and not linha['pdf']
+                if resumo['total'] % args.lote == 0:
+                    _imprimir(resumo)
+        print("\nGeração em lote concluída:")
+        _imprimir(resumo)
+    except KeyboardInterrupt:
+        print(f"\nInterrompido; os boletos já gravados estão em {args.saida}.")
+        sys.exit(130)
+    except Exception as e:
+        print(f"\n Erro na geração de boletos em lote: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
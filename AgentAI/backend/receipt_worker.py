@@ -0,0 +1,40 @@
+import sys
+import os
+import signal
+import socket
+import logging
+import argparse
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.infrastructure.database.connection import init_db
+from app.services.comprovante_jobs import executar_worker
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de validação assíncrona de comprovantes")
+    parser.add_argument(
+        "--worker-id",
+        default=f"{socket.gethostname()}-{os.getpid()}",
+        help="Identificador do worker (padrão: host-pid)"
+    )
+    args = parser.parse_args()
+
+    parar = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: parar.set())
+    signal.signal(signal.SIGINT, lambda *_: parar.set())
+
+    try:
+        init_db()
+        executar_worker(args.worker_id, parar)
+    except Exception as e:
+        print(f"\n Erro no worker de comprovantes: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
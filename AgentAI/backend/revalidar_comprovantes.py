@@ -0,0 +1,66 @@
+import sys
+import os
+import logging
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.config import AppConfig
+from app.infrastructure.database.connection import init_db
+from app.services.comprovante_revalidacao import executar_revalidacao
+
+logging.basicConfig(level=logging.INFO)
+
+
+def _data(valor: str) -> datetime:
+    return datetime.strptime(valor, '%Y-%m-%d')
+
+
+def _imprimir(checkpoint) -> None:
+    print(
+        f"{checkpoint.processados} processados | {checkpoint.validos} válidos | "
+        f"{checkpoint.invalidos} inválidos | {checkpoint.alterados} mudaram | {checkpoint.erros} erros"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Revalida os comprovantes armazenados com as regras atuais do validador (retomável)"
+    )
+    parser.add_argument("--execucao", default="revalidacao", help="Nome da execução; o checkpoint é salvo com ele")
+    parser.add_argument("--workers", type=int, default=AppConfig.OCR_WORKERS, help="Processos do pool")
+    parser.add_argument("--lote", type=int, default=50, help="Comprovantes por tarefa enviada ao pool")
+    parser.add_argument("--escrita", type=int, default=1000, help="Vereditos gravados por transação")
+    parser.add_argument("--desde", type=_data, help="Recebidos a partir de (AAAA-MM-DD)")
+    parser.add_argument("--ate", type=_data, help="Recebidos antes de (AAAA-MM-DD)")
+    parser.add_argument("--simular", action="store_true", help="Não grava vereditos nem checkpoint")
+    parser.add_argument("--reiniciar", action="store_true", help="Descarta o checkpoint e começa do início")
+    args = parser.parse_args()
+
+    try:
+        init_db()
+        checkpoint = executar_revalidacao(
+            args.execucao,
+            workers=args.workers,
+            tamanho_lote=args.lote,
+            tamanho_escrita=args.escrita,
+            desde=args.desde,
+            ate=args.ate,
+            simular=args.simular,
+            reiniciar=args.reiniciar,
+            progresso=_imprimir
+        )
+        print("\nRevalidação concluída:")
+        _imprimir(checkpoint)
+    except KeyboardInterrupt:
+        print("\nInterrompido; execute novamente com a mesma --execucao para continuar.")
+        sys.exit(130)
+    except Exception as e:
+        print(f"\n Erro na revalidação de comprovantes: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,6 @@ import uuid
 from datetime import datetime
 import os
 import re
-import base64
 
 st.set_page_config(
     page_title="ResolveBank - Negociação de Dívidas",
@@ -16,6 +15,8 @@ st.set_page_config(
 from dotenv import load_dotenv
 load_dotenv()
 API_URL = os.getenv("API_URL", "http://localhost:5000")
+# Endereço da API visto pelo navegador (API_URL pode ser um host interno do Docker).
+PUBLIC_API_URL = os.getenv("PUBLIC_API_URL", API_URL)
 
 st.markdown("""
     <style>
@@ -202,26 +203,13 @@ def extrair_info_boleto(content: str) -> dict:
     
     return info
 
-def download_boleto(id_boleto: str, filename: str = None):
-    try:
-        response = requests.get(
-            f"{API_URL}/api/v1/boletos/download/{id_boleto}",
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            if not filename:
-                filename = f"boleto_{id_boleto[:8]}.pdf"
-            
-            b64 = base64.b64encode(response.content).decode()
-            href = f'<a href="data:application/pdf;base64,{b64}" download="{filename}" class="download-button">📥 Baixar Boleto PDF</a>'
-            return href, response.content
-        else:
-            st.error(f"Erro ao baixar boleto: {response.status_code}")
-            return None, None
-    except Exception as e:
-        st.error(f"Erro ao fazer download: {str(e)}")
-        return None, None
+def link_download_boleto(id_boleto: str, filename: str = None) -> str:
+    # O navegador baixa direto da API (com cache e retomada), sem o PDF
+    # passar pelo Streamlit nem ser embutido na página.
+    if not filename:
+        filename = f"boleto_{id_boleto[:8]}.pdf"
+    download_link = f"{PUBLIC_API_URL}/api/v1/boletos/download/{id_boleto}"
+    return f'<a href="{download_link}" download="{filename}" target="_blank" class="download-button">📥 Baixar Boleto PDF</a>'
 
 def display_message(role: str, content: str, timestamp: str = None):
     if timestamp is None:
@@ -280,15 +268,7 @@ def display_message(role: str, content: str, timestamp: str = None):
             with col2:
                 st.markdown("#### 📥 Download")
                 
-                href, pdf_content = download_boleto(info_boleto['id_boleto'])
-                if href:
-                    st.markdown(href, unsafe_allow_html=True)
-                    st.success("✅ Clique no botão acima para baixar")
-                else:
-                    st.error("❌ Erro ao preparar download")
-                
-                download_link = f"{API_URL}/api/v1/boletos/download/{info_boleto['id_boleto']}"
-                st.markdown(f"<a href='{download_link}' target='_blank' style='font-size: 0.9em;'>🔗 Ou clique aqui para link direto</a>", unsafe_allow_html=True)
+                st.markdown(link_download_boleto(info_boleto['id_boleto']), unsafe_allow_html=True)
             
             st.markdown("---")
 